@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.utils.translation import gettext_lazy as _
-from .models import DailyEntry, Task, Account, InventoryItem, WeeklyInventory
+from .models import (
+    DailyEntry, Task, Account, AccountTransaction, InventoryItem, Job, WeeklyInventory, WeeklyUsage
+)
 
 
 @admin.register(DailyEntry)
@@ -12,6 +14,43 @@ class DailyEntryAdmin(admin.ModelAdmin):
     date_hierarchy = 'date'
 
 
+@admin.register(WeeklyUsage)
+class WeeklyUsageAdmin(admin.ModelAdmin):
+    list_display = ('item', 'year', 'week_number', 'start', 'end', 'used', 'unit_cost', 'cost', 'closed_at')
+    list_filter = ('year', 'item')
+    ordering = ('-year', '-week_number', 'item')
+    readonly_fields = ('item', 'year', 'week_number', 'start', 'end', 'used', 'unit_cost', 'cost', 'closed_at')
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(AccountTransaction)
+class AccountTransactionAdmin(admin.ModelAdmin):
+    list_display = ('account', 'kind', 'amount', 'note', 'occurred_at')
+    list_filter = ('kind', 'account')
+    ordering = ('-occurred_at',)
+    date_hierarchy = 'occurred_at'
+
+    # Append-only: balances change through core.ledger
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'payload', 'status', 'attempts', 'run_after', 'finished_at')
+    list_filter = ('status', 'kind')
+    ordering = ('-run_after',)
+    readonly_fields = ('kind', 'payload', 'attempts', 'error', 'created_at', 'started_at', 'finished_at')
+
+
 @admin.register(Task)
 class TaskAdmin(admin.ModelAdmin):
     list_display = ('name', 'deadline', 'completed', 'parent_task', 'created_at')
@@ -27,6 +66,12 @@ class AccountAdmin(admin.ModelAdmin):
     search_fields = ('name',)
     readonly_fields = ('created_at', 'updated_at')
 
+    def get_readonly_fields(self, request, obj=None):
+        # Existing balances change through the ledger
+        if obj is not None:
+            return self.readonly_fields + ('balance',)
+        return self.readonly_fields
+
     def progress_percentage(self, obj):
         return f"{obj.progress_percentage():.1f}%"
 
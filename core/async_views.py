@@ -0,0 +1,105 @@
+"""Async versions of the read-only dashboard, report and JSON views
+
+These are served under /async/ and share their forms, templates and report
+composition with core.views and read through the same core.caching entries;
+only the data loading differs.
+"""
+from datetime import datetime
+
+from django.http import JsonResponse
+from django.shortcuts import render
+from django.utils import timezone
+from django.utils.translation import gettext as _
+from django.views.decorators.http import require_http_methods
+
+from . import caching, metrics
+from .forms import BarberShopForm, DateRangeForm, MeatballStandForm, ShoeShopForm
+from .views import series_response
+
+
+async def home(request):
+    selected_date = request.GET.get('start_date', timezone.now().date())
+    end_date = request.GET.get('end_date', selected_date)
+
+    if isinstance(selected_date, str):
+        selected_date = datetime.strptime(selected_date, '%Y-%m-%d').date()
+    if isinstance(end_date, str):
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
+
+    profits = await caching.ahome_profits(selected_date, end_date)
+
+    context = {
+        'barber_form': BarberShopForm(initial={'date': timezone.now().date()}),
+        'shoe_form': ShoeShopForm(initial={'date': timezone.now().date()}),
+        'meatball_form': MeatballStandForm(initial={'date': timezone.now().date()}),
+        'selected_date': selected_date,
+        'end_date': end_date,
+        'profits': profits
+    }
+
+    return render(request, 'core/home.html', context)
+
+
+async def reports(request):
+    form = DateRangeForm(request.GET or None)
+    report_data = None
+
+    if form.is_valid():
+        report_data = await caching.arange_report(
+            form.cleaned_data['start_date'], form.cleaned_data['end_date']
+        )
+
+    context = {
+        'form': form,
+        'report_data': report_data,
+    }
+    return render(request, 'core/reports.html', context)
+
+
+async def inventory_report_ajax(request):
+    start_date = request.GET.get('start_date')
+    end_date = request.GET.get('end_date')
+    report_data = None
+    report_error = None
+
+    if start_date and end_date:
+        try:
+            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+            end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
+            report_data, report_error = await caching.ainventory_report(start_date, end_date)
+        except Exception as e:
+            report_error = f"Error generating report: {str(e)}"
+
+    context = {
+        'start_date': start_date,
+        'end_date': end_date,
+        'report_data': report_data,
+        'report_error': report_error
+    }
+
+    return render(request, 'core/inventory_report_ajax.html', context)
+
+
+@require_http_methods(["GET"])
+async def profit_series(request):
+    form = DateRangeForm(request.GET)
+    bucket = request.GET.get('bucket', 'day')
+    if not form.is_valid():
+        return JsonResponse({'status': 'error', 'errors': form.errors}, status=400)
+    if bucket not in metrics.BUCKETS:
+        return JsonResponse({
+            'status': 'error',
+            'message': _('Bucket must be one of: %s') % ', '.join(metrics.BUCKETS)
+        }, status=400)
+
+    data = await metrics.aseries(form.cleaned_data['start_date'], form.cleaned_data['end_date'], bucket)
+    return series_response(data)
+
+
+@require_http_methods(["GET"])
+async def cache_stats(request):
+    return JsonResponse({
+        'status': 'success',
+        'data_version': await caching.adata_version(),
+        'stats': await caching.acache_stats()
+    })
@@ -0,0 +1,287 @@
+"""Versioned result cache for the dashboard and report views
+
+Every cached value is keyed on a global data version. Writes to DailyEntry,
+WeeklyInventory or InventoryItem replace the version once their transaction
+commits, so invalidation is a single cache write and entries computed from
+older data are simply never read again. Versions live in the default cache,
+which settings.CACHES requires to be shared by every process, and each bump
+stores a fresh random token rather than incrementing, so a version that was
+evicted and re-seeded can never match an old one.
+
+Inventory reports are keyed on finer versions instead: one per ISO week,
+bumped by changes to that week's counts or meatball entries, and one for
+the item list. Concurrent misses for the same report are coalesced so only
+one request computes it.
+"""
+import hashlib
+import threading
+import time
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import translation
+
+from . import inventory_reports, metrics
+
+DATA_VERSION_KEY = 'data-version'
+WEEK_VERSION_KEY = 'inventory-version:{year}:{week}'
+ITEMS_VERSION_KEY = 'inventory-version:items'
+LOCK_KEY = 'lock:{key}'
+STATS_KEY = 'cache-stats:{namespace}:{result}'
+NAMESPACES = ('home', 'reports', 'inventory')
+INVENTORY_ENTRY_TYPES = {'MEATBALL_SALES', 'MEATBALL_SALAD'}
+
+
+def _setting(name, default):
+    return getattr(settings, 'REPORT_CACHE', {}).get(name, default)
+
+
+def _timeout():
+    return _setting('TIMEOUT', 300)
+
+
+def _new_version():
+    # Unique so an evicted or concurrently replaced version never reuses an old one
+    return uuid.uuid4().hex
+
+
+def data_version():
+    version = cache.get(DATA_VERSION_KEY)
+    if version is None:
+        cache.add(DATA_VERSION_KEY, _new_version(), None)
+        version = cache.get(DATA_VERSION_KEY)
+    return version
+
+
+async def adata_version():
+    version = await cache.aget(DATA_VERSION_KEY)
+    if version is None:
+        await cache.aadd(DATA_VERSION_KEY, _new_version(), None)
+        version = await cache.aget(DATA_VERSION_KEY)
+    return version
+
+
+def _bump(key):
+    version = _new_version()
+    cache.set(key, version, None)
+    return version
+
+
+def bump_data_version():
+    return _bump(DATA_VERSION_KEY)
+
+
+def bump_inventory_weeks(weeks):
+    """Invalidates cached inventory reports covering any of the (year, week) pairs"""
+    for year, week in set(weeks):
+        _bump(WEEK_VERSION_KEY.format(year=year, week=week))
+
+
+def bump_inventory_dates(dates):
+    bump_inventory_weeks(tuple(date.isocalendar()[:2]) for date in dates)
+
+
+def bump_inventory_items():
+    _bump(ITEMS_VERSION_KEY)
+
+
+def inventory_versions(weeks):
+    """Current version of the item list followed by the version of every week, seeding missing ones"""
+    keys = [ITEMS_VERSION_KEY] + [WEEK_VERSION_KEY.format(year=year, week=week) for year, week in weeks]
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        for key in missing:
+            cache.add(key, _new_version(), None)
+        versions.update(cache.get_many(missing))
+    return [versions.get(key) for key in keys]
+
+
+def _count(namespace, result):
+    key = STATS_KEY.format(namespace=namespace, result=result)
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+async def _acount(namespace, result):
+    key = STATS_KEY.format(namespace=namespace, result=result)
+    if not await cache.aadd(key, 1, None):
+        try:
+            await cache.aincr(key)
+        except ValueError:
+            await cache.aset(key, 1, None)
+
+
+def _stats_keys():
+    return [
+        STATS_KEY.format(namespace=namespace, result=result)
+        for namespace in NAMESPACES for result in ('hits', 'misses')
+    ]
+
+
+def _stats(values):
+    return {
+        namespace: {
+            result: values.get(STATS_KEY.format(namespace=namespace, result=result), 0)
+            for result in ('hits', 'misses')
+        }
+        for namespace in NAMESPACES
+    }
+
+
+def cache_stats():
+    """Returns hit/miss counters per namespace"""
+    return _stats(cache.get_many(_stats_keys()))
+
+
+async def acache_stats():
+    return _stats(await cache.aget_many(_stats_keys()))
+
+
+def _key(namespace, version, params):
+    return ':'.join(
+        [namespace, str(version), translation.get_language() or '']
+        + [str(param) for param in params]
+    )
+
+
+class _Flight:
+    """A computation in progress in this process, awaited by concurrent misses"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+
+
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+def single_flight(key, compute, timeout):
+    """Returns (value, computed) for cache `key`, running compute() at most once at a time
+
+    Threads of this process missing the same key wait on the first one's
+    result. Across processes, the computing one holds a cache.add() lock and
+    the others poll the cache for its result; if the lock outlives
+    LOCK_TIMEOUT they give up waiting and compute themselves.
+    """
+    value = cache.get(key)
+    if value is not None:
+        return value, False
+
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+
+    lock_timeout = _setting('LOCK_TIMEOUT', 30)
+    if not leader:
+        flight.done.wait(lock_timeout)
+        if flight.value is not None:
+            return flight.value, False
+        return compute(), True
+
+    try:
+        lock_key = LOCK_KEY.format(key=key)
+        locked = cache.add(lock_key, 1, lock_timeout)
+        deadline = time.monotonic() + lock_timeout
+        while not locked and time.monotonic() < deadline:
+            time.sleep(_setting('LOCK_POLL', 0.05))
+            value = cache.get(key)
+            if value is not None:
+                flight.value = value
+                return value, False
+            locked = cache.add(lock_key, 1, lock_timeout)
+
+        try:
+            value = compute()
+            cache.set(key, value, timeout)
+        finally:
+            if locked:
+                cache.delete(lock_key)
+        flight.value = value
+        return value, True
+    finally:
+        with _flights_lock:
+            _flights.pop(key, None)
+        flight.done.set()
+
+
+def cached(namespace, params, compute):
+    """Returns compute() cached under (namespace, params, language, data version)"""
+    key = _key(namespace, data_version(), params)
+    value = cache.get(key)
+    if value is not None:
+        _count(namespace, 'hits')
+        return value
+
+    _count(namespace, 'misses')
+    value = compute()
+    cache.set(key, value, _timeout())
+    return value
+
+
+async def acached(namespace, params, compute):
+    """Async cached(); `compute` returns an awaitable"""
+    key = _key(namespace, await adata_version(), params)
+    value = await cache.aget(key)
+    if value is not None:
+        await _acount(namespace, 'hits')
+        return value
+
+    await _acount(namespace, 'misses')
+    value = await compute()
+    await cache.aset(key, value, _timeout())
+    return value
+
+
+def home_profits(start_date, end_date):
+    return cached(
+        'home', [start_date, end_date],
+        lambda: metrics.collect_totals(start_date, end_date).profits()
+    )
+
+
+async def ahome_profits(start_date, end_date):
+    async def compute():
+        return (await metrics.acollect_totals(start_date, end_date)).profits()
+    return await acached('home', [start_date, end_date], compute)
+
+
+def range_report(start_date, end_date):
+    return cached(
+        'reports', [start_date, end_date],
+        lambda: metrics.collect(start_date, end_date).report()
+    )
+
+
+async def arange_report(start_date, end_date):
+    async def compute():
+        return (await metrics.acollect(start_date, end_date)).report()
+    return await acached('reports', [start_date, end_date], compute)
+
+
+def inventory_report(start_date, end_date):
+    """inventory_reports.range_report() cached until the range's weeks, meatball entries or items change
+
+    Returns (report_data, report_error) like range_report().
+    """
+    weeks = inventory_reports.iso_weeks(start_date, end_date)
+    versions = ':'.join(str(version) for version in inventory_versions(weeks))
+    key = _key('inventory', hashlib.md5(versions.encode()).hexdigest(), [start_date, end_date])
+    value, computed = single_flight(
+        key, lambda: inventory_reports.range_report(start_date, end_date), _timeout()
+    )
+    _count('inventory', 'misses' if computed else 'hits')
+    return value
+
+
+async def ainventory_report(start_date, end_date):
+    """Async inventory_report(); runs in the ORM's sync thread so misses share its single flight"""
+    return await sync_to_async(inventory_report)(start_date, end_date)
@@ -0,0 +1,40 @@
+"""Streaming CSV/NDJSON responses for entry, inventory and report exports"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object whose write() hands the line back to csv.writer's caller"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(header, rows):
+    writer = csv.writer(Echo())
+    # The header goes out before the first row is fetched from the database
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(header, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder) + '\n'
+
+
+def stream(filename, file_format, header, rows):
+    """Returns a StreamingHttpResponse writing `rows` (an iterable of tuples) lazily"""
+    lines = csv_lines(header, rows) if file_format == 'csv' else ndjson_lines(header, rows)
+    response = StreamingHttpResponse(lines, content_type=FORMATS[file_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{file_format}"'
+    return response
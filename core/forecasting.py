@@ -0,0 +1,184 @@
+"""Consumption rates, trends and runout forecasts for inventory items
+
+Usage history is read once from the WeeklyUsage snapshots into an
+item x week matrix, and every statistic is computed for all items at once
+with NumPy. Weeks an item was not counted are NaN and ignored.
+"""
+import datetime
+from dataclasses import dataclass
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .models import InventoryItem, WeeklyUsage
+
+
+def _setting(name, default):
+    return getattr(settings, 'INVENTORY_FORECAST', {}).get(name, default)
+
+
+@dataclass(frozen=True)
+class ItemForecast:
+    """Consumption forecast of one inventory item; None where history is too short"""
+    item_id: int
+    name: str
+    weeks_recorded: int
+    average_usage: float = None
+    rolling_usage: float = None
+    trend: float = None
+    stock: int = None
+    weeks_left: float = None
+    runout_week: datetime.date = None
+    reorder: bool = False
+
+    def as_dict(self):
+        return {
+            'item_id': self.item_id,
+            'name': self.name,
+            'weeks_recorded': self.weeks_recorded,
+            'average_usage': _round(self.average_usage),
+            'rolling_usage': _round(self.rolling_usage),
+            'trend': _round(self.trend),
+            'stock': self.stock,
+            'weeks_left': _round(self.weeks_left),
+            'runout_week': self.runout_week.strftime('%Y-%m-%d') if self.runout_week else None,
+            'reorder': self.reorder,
+        }
+
+
+def _round(value):
+    return None if value is None else round(value, 2)
+
+
+def _value(array, index):
+    value = array[index]
+    return None if np.isnan(value) else float(value)
+
+
+def usage_matrix(first_week, weeks):
+    """Loads (item ids, names, usage, end counts) for `weeks` weeks from `first_week`
+
+    `usage` and `end` are float matrices of shape (items, weeks) holding
+    NaN where an item has no snapshot for the week. Two queries.
+    """
+    items = list(InventoryItem.objects.order_by('name').values_list('id', 'name'))
+    item_ids = np.array([item_id for item_id, _name in items], dtype=np.int64)
+    usage = np.full((len(items), weeks), np.nan)
+    end = np.full((len(items), weeks), np.nan)
+
+    rows = np.array(
+        WeeklyUsage.objects
+        .filter(week_start__range=(first_week, first_week + datetime.timedelta(weeks=weeks - 1)))
+        .values_list('item_id', 'week_start', 'used', 'end')
+        .order_by(),
+        dtype=object,
+    ).reshape(-1, 4)
+    if len(rows) and len(items):
+        order = np.argsort(item_ids)
+        positions = np.searchsorted(item_ids, rows[:, 0].astype(np.int64), sorter=order)
+        item_index = order[positions]
+        days = rows[:, 1].astype('datetime64[D]') - np.datetime64(first_week, 'D')
+        week_index = days.astype(np.int64) // 7
+        usage[item_index, week_index] = rows[:, 2].astype(float)
+        end[item_index, week_index] = rows[:, 3].astype(float)
+
+    return item_ids, [name for _item_id, name in items], usage, end
+
+
+def nan_mean(values, axis=1):
+    """Mean over `axis` ignoring NaN; NaN where every value is missing"""
+    counts = (~np.isnan(values)).sum(axis=axis)
+    sums = np.nansum(values, axis=axis)
+    return np.divide(sums, counts, out=np.full(sums.shape, np.nan), where=counts > 0)
+
+
+def rolling_mean(values, window):
+    """Trailing `window`-week mean of every column, ignoring NaN"""
+    present = ~np.isnan(values)
+    zero_pad = np.zeros((values.shape[0], 1))
+    sums = np.concatenate([zero_pad, np.cumsum(np.where(present, values, 0), axis=1)], axis=1)
+    counts = np.concatenate([zero_pad, np.cumsum(present, axis=1)], axis=1)
+    lagged = np.maximum(np.arange(1, values.shape[1] + 1) - window, 0)
+    window_sums = sums[:, 1:] - sums[:, lagged]
+    window_counts = counts[:, 1:] - counts[:, lagged]
+    return np.divide(
+        window_sums, window_counts, out=np.full(values.shape, np.nan), where=window_counts > 0
+    )
+
+
+def trend(values):
+    """Least-squares slope per row in units per week; NaN with fewer than two points"""
+    present = ~np.isnan(values)
+    counts = present.sum(axis=1)
+    weeks = np.broadcast_to(np.arange(values.shape[1], dtype=float), values.shape)
+    safe_counts = np.maximum(counts, 1)
+    mean_week = np.where(present, weeks, 0).sum(axis=1) / safe_counts
+    mean_value = np.nansum(values, axis=1) / safe_counts
+    week_offsets = np.where(present, weeks - mean_week[:, None], 0)
+    value_offsets = np.where(present, values - mean_value[:, None], 0)
+    variance = (week_offsets ** 2).sum(axis=1)
+    covariance = (week_offsets * value_offsets).sum(axis=1)
+    return np.divide(
+        covariance, variance, out=np.full(counts.shape, np.nan), where=(counts > 1) & (variance > 0)
+    )
+
+
+def last_present(values):
+    """(column index, value) of the latest non-NaN value per row; -1/NaN when none"""
+    present = ~np.isnan(values)
+    has_value = present.any(axis=1)
+    index = np.where(has_value, values.shape[1] - 1 - np.argmax(present[:, ::-1], axis=1), -1)
+    latest = np.where(has_value, values[np.arange(values.shape[0]), np.maximum(index, 0)], np.nan)
+    return index, latest
+
+
+def forecast(today=None, weeks=None, window=None, reorder_weeks=None):
+    """Forecasts every item from the last `weeks` ISO weeks up to the current one
+
+    The consumption rate is the trailing `window`-week mean usage up to the
+    latest END count, which is the stock; items expected to run out within `reorder_weeks`
+    weeks are flagged for reordering.
+    """
+    today = today or timezone.now().date()
+    weeks = weeks or _setting('WEEKS', 12)
+    window = window or _setting('WINDOW', 4)
+    reorder_weeks = _setting('REORDER_WEEKS', 2) if reorder_weeks is None else reorder_weeks
+
+    current_week = today - datetime.timedelta(days=today.weekday())
+    first_week = current_week - datetime.timedelta(weeks=weeks - 1)
+    item_ids, names, usage, end = usage_matrix(first_week, weeks)
+    if not len(item_ids):
+        return []
+
+    recorded = (~np.isnan(usage)).sum(axis=1)
+    average = nan_mean(usage)
+    slopes = trend(usage)
+    stock_index, stock = last_present(end)
+    # Consumption rate as of each item's latest count, which may be before an open current week
+    rolling = rolling_mean(usage, window)[np.arange(len(item_ids)), np.maximum(stock_index, 0)]
+    rolling = np.where(stock_index >= 0, rolling, np.nan)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        weeks_left = np.where(rolling > 0, stock / rolling, np.nan)
+    # Stock is counted at the end of its week, so it starts running down the week after
+    runout_index = stock_index + 1 + np.floor(np.nan_to_num(weeks_left))
+
+    forecasts = []
+    for index, item_id in enumerate(item_ids):
+        left = _value(weeks_left, index)
+        forecasts.append(ItemForecast(
+            item_id=int(item_id),
+            name=names[index],
+            weeks_recorded=int(recorded[index]),
+            average_usage=_value(average, index),
+            rolling_usage=_value(rolling, index),
+            trend=_value(slopes, index),
+            stock=None if np.isnan(stock[index]) else int(stock[index]),
+            weeks_left=left,
+            runout_week=(
+                first_week + datetime.timedelta(weeks=int(runout_index[index])) if left is not None else None
+            ),
+            reorder=left is not None and left < reorder_weeks,
+        ))
+    return forecasts
@@ -1,7 +1,7 @@
 from django import forms
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
-from .models import DailyEntry, Task, Account, InventoryItem, WeeklyInventory
+from .models import DailyEntry, Task, Account, InventoryItem, WeeklyInventory, iso_week_start
 
 # core/forms.py
 class BaseEntryForm(forms.Form):
@@ -31,6 +31,29 @@ class DailyEntryForm(forms.ModelForm):
         }
 
 
+class DailyEntryRowForm(forms.Form):
+    """Validates one (date, entry_type, value) row of a bulk upsert"""
+    date = forms.DateField(label=_('Date'))
+    entry_type = forms.ChoiceField(label=_('Entry Type'), choices=DailyEntry.ENTRY_TYPES)
+    value = forms.DecimalField(label=_('Value'), min_value=0, max_digits=10, decimal_places=2)
+
+
+class WeeklyInventoryRowForm(forms.Form):
+    """Validates one count of a bulk weekly inventory upsert"""
+    item_id = forms.IntegerField(label=_('Item'))
+    week_number = forms.IntegerField(label=_('Week Number'), min_value=1, max_value=53)
+    year = forms.IntegerField(label=_('Year'), min_value=1)
+    inventory_type = forms.ChoiceField(label=_('Type'), choices=WeeklyInventory.INVENTORY_TYPES)
+    quantity = forms.IntegerField(label=_('Quantity'), min_value=0)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        year, week_number = cleaned_data.get('year'), cleaned_data.get('week_number')
+        if year and week_number and tuple(iso_week_start(year, week_number).isocalendar()[:2]) != (year, week_number):
+            self.add_error('week_number', _('%(year)s has no ISO week %(week)s') % {'year': year, 'week': week_number})
+        return cleaned_data
+
+
 class ShoeShopForm(forms.Form):
     date = forms.DateField(
         label=_('Date'),
@@ -40,6 +63,7 @@ class ShoeShopForm(forms.Form):
     revenue = forms.DecimalField(
         label=_('Revenue (฿)'),
         min_value=0,
+        max_digits=10,
         decimal_places=2,
         widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'placeholder': '0.00'})
     )
@@ -77,12 +101,14 @@ class MeatballStandForm(forms.Form):
     sales = forms.DecimalField(
         label=_('Sales (฿)'),
         min_value=0,
+        max_digits=10,
         decimal_places=2,
         widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'placeholder': '0.00'})
     )
     salad_cost = forms.DecimalField(
         label=_('Salad Cost (฿)'),
         min_value=0,
+        max_digits=10,
         decimal_places=2,
         widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'placeholder': '0.00'})
     )
@@ -105,6 +131,13 @@ class TaskForm(forms.ModelForm):
             raise forms.ValidationError(_('Deadline cannot be in the past'))
         return deadline
 
+    def clean_parent_task(self):
+        parent = self.cleaned_data.get('parent_task')
+        # A task cannot be moved into its own subtree
+        if parent and self.instance.path and parent.path.startswith(self.instance.path):
+            raise forms.ValidationError(_('A task cannot be its own subtask'))
+        return parent
+
 
 class AccountForm(forms.ModelForm):
     class Meta:
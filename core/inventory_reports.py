@@ -0,0 +1,182 @@
+"""Weekly inventory usage reports computed with set-based queries"""
+import datetime
+from decimal import Decimal
+
+from django.db.models import FilteredRelation, Max, Q
+from django.utils.translation import gettext as _
+
+from . import metrics
+from .models import InventoryItem, WeeklyUsage, iso_week_start, units_used
+
+
+def week_usage(year, week):
+    """START/END quantity, usage and cost of every item for one week in a single query
+
+    The week's counts are LEFT JOINed onto InventoryItem and pivoted into
+    `start` and `end` columns with conditional aggregation. Usage follows
+    models.units_used(), so items without an END count get None for
+    units_used and cost_of_used.
+    """
+    rows = (
+        InventoryItem.objects
+        .annotate(counts=FilteredRelation(
+            'weekly_counts',
+            condition=Q(weekly_counts__year=year, weekly_counts__week_number=week),
+        ))
+        .annotate(
+            start=Max('counts__quantity', filter=Q(counts__inventory_type='START')),
+            end=Max('counts__quantity', filter=Q(counts__inventory_type='END')),
+        )
+        .order_by('name')
+        .values('id', 'name', 'cost', 'start', 'end')
+    )
+
+    usage = []
+    for row in rows:
+        used = units_used(row['start'], row['end'])
+        usage.append({
+            'item_id': row['id'],
+            'name': row['name'],
+            'price': row['cost'],
+            'start': row['start'],
+            'end': row['end'],
+            'units_used': used,
+            'cost_of_used': None if used is None else used * row['cost'],
+        })
+    return usage
+
+
+def week_report(year, week):
+    """Usage of every item closed in the week against its meatball sales and salad costs
+
+    Reads the WeeklyUsage snapshot only. Returns data in the shape rendered
+    by core/inventory_report.html, or None when the week has no END counts.
+    """
+    items = [
+        {
+            'item_id': usage.item_id,
+            'name': usage.item.name,
+            'price': usage.unit_cost,
+            'start': usage.start,
+            'end': usage.end,
+            'units_used': usage.used,
+            'cost_of_used': usage.cost,
+        }
+        for usage in WeeklyUsage.objects.filter(year=year, week_number=week)
+        .select_related('item').order_by('item__name')
+    ]
+    if not items:
+        return None
+
+    monday = datetime.date.fromisocalendar(year, week, 1)
+    range_metrics = metrics.collect(monday, monday + datetime.timedelta(days=6))
+    meatball_sales = range_metrics.total('MEATBALL_SALES')
+    salad_costs = range_metrics.total('MEATBALL_SALAD')
+
+    for item in items:
+        item['salad_cost'] = salad_costs
+        item['revenue'] = meatball_sales
+        item['profit'] = meatball_sales - (item['cost_of_used'] + salad_costs)
+
+    total_cost = sum(item['cost_of_used'] for item in items)
+    return {
+        'items': items,
+        'totals': {
+            'total_cost': total_cost,
+            'total_salad': salad_costs,
+            'total_revenue': meatball_sales,
+            'total_profit': meatball_sales - total_cost - salad_costs,
+        }
+    }
+
+
+def iso_weeks(start_date, end_date):
+    """(ISO year, ISO week) of every week overlapping the inclusive date range, in order"""
+    monday = start_date - datetime.timedelta(days=start_date.weekday())
+    weeks = []
+    while monday <= end_date:
+        weeks.append(tuple(monday.isocalendar()[:2]))
+        monday += datetime.timedelta(weeks=1)
+    return weeks
+
+
+def range_usage(weeks):
+    """WeeklyUsage snapshots from the first to the last of `weeks`, as one week_start range scan"""
+    return (
+        WeeklyUsage.objects
+        .filter(week_start__range=(iso_week_start(*weeks[0]), iso_week_start(*weeks[-1])))
+        .values_list('item_id', 'year', 'week_number', 'used', 'cost')
+        .order_by()
+    )
+
+
+def compose_range_report(weeks, usage, items, range_metrics):
+    """Builds (report_data, report_error) from loaded usage snapshots, items and sales metrics"""
+    if not usage:
+        return None, _("No ending inventory found for the selected week. Please set end of week inventory before generating the report.")
+
+    meatball_sales = range_metrics.total('MEATBALL_SALES')
+    salad_costs = range_metrics.total('MEATBALL_SALAD')
+
+    used = {item.id: 0 for item in items}
+    costs = {item.id: Decimal('0') for item in items}
+    week_totals = {}
+    for item_id, year, week_number, units_used, cost in usage:
+        used[item_id] += units_used
+        costs[item_id] += cost
+        week_units, week_cost = week_totals.get((year, week_number), (0, Decimal('0')))
+        week_totals[(year, week_number)] = (week_units + units_used, week_cost + cost)
+
+    weeks_report = []
+    for week in weeks:
+        week_units, week_cost = week_totals.get(week, (0, Decimal('0')))
+        weeks_report.append({
+            'year': week[0],
+            'week_number': week[1],
+            'closed': week in week_totals,
+            'units_used': week_units,
+            'cost_of_used': week_cost,
+        })
+
+    items_report = []
+    for item in items:
+        items_report.append({
+            'name': item.name,
+            'price': item.cost,
+            'units_used': used[item.id],
+            'cost_of_used': costs[item.id],
+            'salad_cost': salad_costs,
+            'revenue': meatball_sales,
+            'profit': meatball_sales - (costs[item.id] + salad_costs)
+        })
+
+    total_cost = sum(item['cost_of_used'] for item in items_report)
+    report_data = {
+        'items': items_report,
+        'weeks': weeks_report,
+        'totals': {
+            'total_cost': total_cost,
+            'total_salad': salad_costs,
+            'total_revenue': meatball_sales,
+            'total_profit': meatball_sales - total_cost - salad_costs
+        }
+    }
+    return report_data, None
+
+
+def range_report(start_date, end_date):
+    """Inventory usage for any date range, spanning as many ISO weeks and years as needed
+
+    Loads items, the WeeklyUsage snapshots of the closed weeks in the range
+    and the sales metrics in three queries, then sums per week and per item.
+    """
+    if end_date < start_date:
+        return None, _('End date must be after start date')
+    weeks = iso_weeks(start_date, end_date)
+    return compose_range_report(
+        weeks,
+        list(range_usage(weeks)),
+        list(InventoryItem.objects.all()),
+        metrics.collect(start_date, end_date),
+    )
+
@@ -0,0 +1,125 @@
+"""Local job queue stored in the Job table, run by `manage.py run_worker`
+
+Handlers are registered per kind with @handler and receive the job payload
+as keyword arguments. Workers claim jobs with a conditional UPDATE, so
+several can share the queue without a broker or row locks. Failed jobs are
+retried with a growing delay until they run out of attempts.
+"""
+import calendar
+import datetime
+import logging
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone, translation
+
+from . import caching
+from .models import Job
+
+logger = logging.getLogger('core')
+
+HANDLERS = {}
+
+
+def _setting(name, default):
+    return getattr(settings, 'JOBS', {}).get(name, default)
+
+
+def handler(kind):
+    def register(function):
+        HANDLERS[kind] = function
+        return function
+    return register
+
+
+def enqueue(kind, **payload):
+    """Queues a job unless an identical one is still pending; returns the pending job"""
+    job = Job.objects.filter(kind=kind, payload=payload, status='PENDING').first()
+    if job is None:
+        job = Job.objects.create(kind=kind, payload=payload)
+    return job
+
+
+def claim(now=None):
+    """Marks the next due pending job RUNNING and returns it, or None when the queue is empty"""
+    now = now or timezone.now()
+    due = (
+        Job.objects.filter(status='PENDING', run_after__lte=now)
+        .order_by('run_after', 'id').values_list('id', flat=True)
+    )
+    for job_id in due[:10]:
+        # Only one worker's UPDATE can still see the job PENDING
+        claimed = Job.objects.filter(id=job_id, status='PENDING').update(
+            status='RUNNING', started_at=now, attempts=F('attempts') + 1
+        )
+        if claimed:
+            return Job.objects.get(id=job_id)
+    return None
+
+
+def run(job):
+    """Runs a claimed job and records the outcome"""
+    try:
+        HANDLERS[job.kind](**job.payload)
+    except Exception as e:
+        logger.exception(f'Job {job.id} ({job.kind}) failed')
+        job.error = str(e)
+        if job.attempts < _setting('MAX_ATTEMPTS', 3):
+            job.status = 'PENDING'
+            job.run_after = timezone.now() + datetime.timedelta(seconds=_setting('RETRY_DELAY', 60) * job.attempts)
+        else:
+            job.status = 'FAILED'
+    else:
+        job.status = 'DONE'
+        job.error = ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'run_after', 'finished_at'])
+    return job
+
+
+def run_pending(limit=None):
+    """Runs due jobs until the queue is empty or `limit` jobs ran; returns how many ran"""
+    ran = 0
+    while limit is None or ran < limit:
+        job = claim()
+        if job is None:
+            break
+        run(job)
+        ran += 1
+    return ran
+
+
+def requeue_stale(now=None):
+    """Returns jobs left RUNNING by a worker that died to the queue"""
+    now = now or timezone.now()
+    return Job.objects.filter(
+        status='RUNNING', started_at__lt=now - datetime.timedelta(seconds=_setting('STALE_AFTER', 600))
+    ).update(status='PENDING', run_after=now)
+
+
+def week_ranges(year, week):
+    """The ISO week and every calendar month it overlaps, as (start, end) date pairs"""
+    monday = datetime.date.fromisocalendar(year, week, 1)
+    sunday = monday + datetime.timedelta(days=6)
+    ranges = [(monday, sunday)]
+    for day in (monday, sunday):
+        month = (day.replace(day=1), day.replace(day=calendar.monthrange(day.year, day.month)[1]))
+        if month not in ranges:
+            ranges.append(month)
+    return ranges
+
+
+@handler('warm_week')
+def warm_week(year, week):
+    """Pre-computes the inventory report, dashboard and revenue report ranges overlapping a week"""
+    for language, _name in settings.LANGUAGES:
+        with translation.override(language):
+            for start_date, end_date in week_ranges(year, week):
+                caching.inventory_report(start_date, end_date)
+                caching.home_profits(start_date, end_date)
+                caching.range_report(start_date, end_date)
+
+
+def enqueue_week_warmups(weeks):
+    for year, week in sorted(set(weeks)):
+        enqueue('warm_week', year=year, week=week)
@@ -0,0 +1,121 @@
+"""Account balance ledger
+
+Every balance change is an AccountTransaction row. Recording one also
+moves the cached Account.balance with an F() update in the same database
+transaction, and every LEDGER['SNAPSHOT_EVERY'] transactions an
+AccountSnapshot checkpoints the running balance. The balance at any moment
+is then the latest snapshot before it plus a bounded sum of transactions.
+
+Each write also bumps Account.version. Callers passing the version they
+last read as `expected_version` get ConflictError instead of overwriting a
+change they have not seen.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Account, AccountSnapshot, AccountTransaction, ConflictError
+
+# How often set_balance() re-reads the balance when it keeps changing underneath it
+SET_BALANCE_ATTEMPTS = 5
+
+
+def _snapshot_every():
+    return getattr(settings, 'LEDGER', {}).get('SNAPSHOT_EVERY', 100)
+
+
+def open_account(account):
+    """Records the balance of a newly created account as its opening transaction"""
+    return AccountTransaction.objects.create(
+        account=account, kind='OPENING', amount=account.balance, occurred_at=account.created_at
+    )
+
+
+def record(account, amount, kind, note='', occurred_at=None, expected_version=None):
+    """Appends a transaction and applies it to the cached balance and later snapshots"""
+    occurred_at = occurred_at or timezone.now()
+    with transaction.atomic():
+        accounts = Account.objects.filter(pk=account.pk)
+        if expected_version is not None:
+            accounts = accounts.filter(version=expected_version)
+        if not accounts.update(balance=F('balance') + amount, version=F('version') + 1, updated_at=timezone.now()):
+            raise ConflictError(account.pk)
+        entry = AccountTransaction.objects.create(
+            account=account, kind=kind, amount=amount, note=note, occurred_at=occurred_at
+        )
+        # A backdated transaction is part of every snapshot taken after it
+        AccountSnapshot.objects.filter(account=account, as_of__gte=occurred_at).update(
+            balance=F('balance') + amount
+        )
+        account.refresh_from_db(fields=['balance', 'version', 'updated_at'])
+        _maybe_snapshot(account)
+    return entry
+
+
+def set_balance(account, balance, note='', expected_version=None):
+    """Brings the balance to `balance` with an adjustment for the difference, if any
+
+    The adjustment is only applied to the version it was computed from; if
+    the balance moved in between, it is re-read and retried, unless the caller
+    pinned `expected_version`, in which case ConflictError is raised.
+    """
+    for _attempt in range(SET_BALANCE_ATTEMPTS):
+        current, version = Account.objects.values_list('balance', 'version').get(pk=account.pk)
+        if expected_version is not None and version != expected_version:
+            raise ConflictError(account.pk)
+        if balance == current:
+            account.balance, account.version = current, version
+            return None
+        try:
+            return record(account, balance - current, 'ADJUSTMENT', note, expected_version=version)
+        except ConflictError:
+            if expected_version is not None:
+                raise
+    raise ConflictError(account.pk)
+
+
+def _latest_snapshot(account, at=None):
+    snapshots = AccountSnapshot.objects.filter(account=account)
+    if at is not None:
+        snapshots = snapshots.filter(as_of__lte=at)
+    return snapshots.order_by('-as_of').first()
+
+
+def _transactions_after(account, snapshot):
+    entries = AccountTransaction.objects.filter(account=account)
+    if snapshot is not None:
+        entries = entries.filter(occurred_at__gt=snapshot.as_of)
+    return entries
+
+
+def _maybe_snapshot(account):
+    entries = _transactions_after(account, _latest_snapshot(account))
+    # Bounded: there are never more than SNAPSHOT_EVERY rows past the latest snapshot
+    if entries.count() >= _snapshot_every():
+        snapshot(account)
+
+
+def snapshot(account, as_of=None):
+    """Checkpoints the balance including every transaction up to `as_of` (default: the latest one)"""
+    if as_of is None:
+        as_of = AccountTransaction.objects.filter(account=account).order_by('-occurred_at').values_list(
+            'occurred_at', flat=True
+        ).first()
+        if as_of is None:
+            return None
+    checkpoint, _created = AccountSnapshot.objects.update_or_create(
+        account=account, as_of=as_of, defaults={'balance': balance_at(account, as_of)}
+    )
+    return checkpoint
+
+
+def balance_at(account, at):
+    """Balance including every transaction up to and including `at`: one snapshot lookup plus a bounded sum"""
+    latest = _latest_snapshot(account, at)
+    delta = _transactions_after(account, latest).filter(occurred_at__lte=at).aggregate(
+        total=Sum('amount')
+    )['total'] or Decimal('0')
+    return (latest.balance if latest else Decimal('0')) + delta
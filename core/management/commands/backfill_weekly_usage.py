@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.models import WeeklyUsage
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the WeeklyUsage snapshots from all WeeklyInventory counts, keeping stored prices'
+
+    def handle(self, *args, **options):
+        rows = WeeklyUsage.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Snapshotted {rows} weekly usage rows'))
@@ -0,0 +1,111 @@
+import asyncio
+import datetime
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.conf import settings
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+
+# Sync view name -> async counterpart
+VIEWS = {
+    'home': 'async_home',
+    'reports': 'async_reports',
+    'inventory_report_ajax': 'async_inventory_report_ajax',
+    'profit_series': 'async_profit_series',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares throughput of the sync views and their async counterparts '
+        'under concurrent clients'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Requests per view and mode')
+        parser.add_argument('--concurrency', type=int, default=10)
+        parser.add_argument('--view', action='append', choices=sorted(VIEWS),
+                            help='Views to benchmark, defaults to all')
+        parser.add_argument('--days', type=int, default=30,
+                            help='Length of the date ranges requested')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be positive')
+
+        # The test clients always send Host: testserver
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            self.benchmark(options)
+
+    def benchmark(self, options):
+        self.stdout.write(f"{'view':<24}{'mode':<7}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+        for name in options['view'] or sorted(VIEWS):
+            params = self.params(options['requests'], options['days'])
+            for mode, path in [('sync', reverse(name)), ('async', reverse(VIEWS[name]))]:
+                # Start every run cold so both modes compute the same reports
+                cache.clear()
+                if mode == 'sync':
+                    elapsed, latencies = self.run_sync(path, params, options['concurrency'])
+                else:
+                    elapsed, latencies = asyncio.run(self.run_async(path, params, options['concurrency']))
+                self.report(name, mode, elapsed, latencies)
+
+    def params(self, count, days):
+        """Distinct date ranges so cached results are not reused within a run"""
+        end = datetime.date.today()
+        params = []
+        for offset in range(count):
+            end_date = end - datetime.timedelta(days=offset)
+            start_date = end_date - datetime.timedelta(days=days - 1)
+            params.append({
+                'start_date': start_date.strftime('%Y-%m-%d'),
+                'end_date': end_date.strftime('%Y-%m-%d'),
+            })
+        return params
+
+    def run_sync(self, path, params, concurrency):
+        def fetch(query):
+            client = Client()
+            started = time.perf_counter()
+            response = client.get(path, query)
+            latency = time.perf_counter() - started
+            connection.close()
+            if response.status_code != 200:
+                raise CommandError(f'{path} returned {response.status_code}')
+            return latency
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(fetch, params))
+        return time.perf_counter() - started, latencies
+
+    async def run_async(self, path, params, concurrency):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(query):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path, query)
+                latency = time.perf_counter() - started
+            if response.status_code != 200:
+                raise CommandError(f'{path} returned {response.status_code}')
+            return latency
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(fetch(query) for query in params))
+        return time.perf_counter() - started, latencies
+
+    def report(self, name, mode, elapsed, latencies):
+        latencies = sorted(latencies)
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        self.stdout.write(
+            f'{name:<24}{mode:<7}{len(latencies) / elapsed:>10.1f}'
+            f'{statistics.median(latencies) * 1000:>10.1f}{p95 * 1000:>10.1f}'
+        )
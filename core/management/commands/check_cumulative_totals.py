@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import CumulativeTotal
+
+
+class Command(BaseCommand):
+    help = 'Compares the CumulativeTotal table against the raw DailyEntry aggregates'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repair',
+            action='store_true',
+            help='Rebuild the table from DailyEntry when inconsistencies are found',
+        )
+
+    def handle(self, *args, **options):
+        problems = CumulativeTotal.find_inconsistencies()
+        if not problems:
+            self.stdout.write(self.style.SUCCESS('Cumulative totals are consistent'))
+            return
+
+        for date, entry_type, expected, stored in problems:
+            self.stdout.write(
+                f'{date} {entry_type or "*"}: expected {expected}, stored {stored}'
+            )
+
+        if options['repair']:
+            rows = CumulativeTotal.rebuild()
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} cumulative rows'))
+            return
+
+        raise CommandError(f'{len(problems)} inconsistent cumulative totals found')
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Task
+
+
+class Command(BaseCommand):
+    help = 'Compares the stored task progress counters against the task tree'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repair',
+            action='store_true',
+            help='Rewrite the counters from the task tree when inconsistencies are found',
+        )
+
+    def handle(self, *args, **options):
+        problems = Task.find_progress_inconsistencies()
+        if not problems:
+            self.stdout.write(self.style.SUCCESS('Task progress counters are consistent'))
+            return
+
+        for task_id, expected, stored in problems:
+            self.stdout.write(
+                f'Task {task_id}: expected {expected[0]} subtasks ({expected[1]} done), '
+                f'stored {stored[0]} ({stored[1]} done)' if stored else f'Task {task_id}: missing'
+            )
+
+        if options['repair']:
+            rows = Task.rebuild_progress()
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt progress of {rows} tasks'))
+            return
+
+        raise CommandError(f'{len(problems)} inconsistent task progress counters found')
@@ -0,0 +1,125 @@
+import csv
+import json
+import os
+import time
+from contextlib import nullcontext
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import services
+from core.models import InventoryItem
+from core.signals import deferred_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        'Streams DailyEntry or WeeklyInventory history from a CSV or NDJSON file '
+        'and upserts it in batches, resuming from a checkpoint after a failure. '
+        'Daily rollups are rebuilt once when the import ends'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (with a header row) or NDJSON file')
+        parser.add_argument('--model', choices=['entries', 'inventory'], default='entries')
+        parser.add_argument('--format', choices=['csv', 'ndjson'],
+                            help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--checkpoint',
+                            help='Checkpoint file, defaults to <path>.checkpoint')
+        parser.add_argument('--resume', action='store_true',
+                            help='Skip the rows committed by a previous run')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'{path} does not exist')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+
+        file_format = options['format'] or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+        checkpoint = options['checkpoint'] or f'{path}.checkpoint'
+        skip = self.read_checkpoint(checkpoint, path) if options['resume'] else 0
+
+        if options['model'] == 'inventory':
+            items = dict(InventoryItem.objects.values_list('name', 'id'))
+            upsert = services.upsert_weekly_inventory
+            rollups = nullcontext()
+        else:
+            items = None
+            upsert = services.upsert_daily_entries
+            # Running totals are rebuilt once at the end instead of after every batch
+            rollups = deferred_rollups()
+
+        started = time.monotonic()
+        imported = 0
+        with rollups, open(path, newline='', encoding='utf-8') as handle:
+            rows = self.read_rows(handle, file_format)
+            rows = islice(rows, skip, None)
+            while True:
+                batch = list(islice(rows, options['batch_size']))
+                if not batch:
+                    break
+                if items is not None:
+                    batch = [self.resolve_item(row, items) for row in batch]
+
+                results = upsert(batch)
+                errors = [result for result in results if result['status'] == 'error']
+                if errors:
+                    first_row = skip + imported + 1
+                    for error in errors[:10]:
+                        self.stderr.write(f"Row {first_row + error['index']}: {error['errors']}")
+                    raise CommandError(
+                        f'{len(errors)} invalid rows in batch starting at row {first_row}; '
+                        f'fix them and rerun with --resume'
+                    )
+
+                imported += len(batch)
+                self.write_checkpoint(checkpoint, path, skip + imported)
+                elapsed = max(time.monotonic() - started, 1e-6)
+                self.stdout.write(f'{skip + imported} rows committed ({imported / elapsed:.0f} rows/s)')
+
+        elapsed = max(time.monotonic() - started, 1e-6)
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} rows in {elapsed:.1f}s '
+            f'({imported / elapsed:.0f} rows/s)'
+        ))
+
+    def read_rows(self, handle, file_format):
+        if file_format == 'csv':
+            yield from csv.DictReader(handle)
+            return
+        for number, line in enumerate(handle, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise CommandError(f'Line {number}: invalid JSON ({e.msg})') from e
+            if not isinstance(row, dict):
+                raise CommandError(f'Line {number}: expected a JSON object')
+            yield row
+
+    def resolve_item(self, row, items):
+        row = dict(row)
+        if not row.get('item_id') and 'item' in row:
+            row['item_id'] = items.get(row.pop('item'))
+        return row
+
+    def read_checkpoint(self, checkpoint, path):
+        if not os.path.exists(checkpoint):
+            return 0
+        with open(checkpoint, encoding='utf-8') as handle:
+            data = json.load(handle)
+        if data.get('path') != os.path.abspath(path):
+            raise CommandError(f'{checkpoint} belongs to another file')
+        return data['rows']
+
+    def write_checkpoint(self, checkpoint, path, rows):
+        temporary = f'{checkpoint}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as handle:
+            json.dump({'path': os.path.abspath(path), 'rows': rows}, handle)
+        os.replace(temporary, checkpoint)
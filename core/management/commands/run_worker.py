@@ -0,0 +1,34 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = 'Runs queued background jobs, polling the Job table until interrupted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Run the jobs that are due, then exit')
+        parser.add_argument('--interval', type=float,
+                            help='Seconds between queue checks when idle')
+
+    def handle(self, *args, **options):
+        interval = options['interval'] or getattr(settings, 'JOBS', {}).get('POLL_INTERVAL', 2)
+        try:
+            while True:
+                requeued = jobs.requeue_stale()
+                if requeued:
+                    self.stdout.write(self.style.WARNING(f'Requeued {requeued} stale jobs'))
+                ran = jobs.run_pending()
+                if ran:
+                    self.stdout.write(f'Ran {ran} jobs')
+                if options['once']:
+                    break
+                if not ran:
+                    time.sleep(interval)
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping worker')
+        self.stdout.write(self.style.SUCCESS('Worker finished'))
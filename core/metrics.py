@@ -0,0 +1,250 @@
+"""Business metrics shared by the dashboard, report and inventory report views"""
+import asyncio
+import datetime
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.db.models import Avg, Count, Sum
+from django.db.models.functions import Trunc
+
+from .models import CumulativeTotal, DailyEntry
+
+BUCKETS = ('day', 'week', 'month')
+BUSINESSES = ('barber', 'shoe', 'meatball')
+
+# Fixed cost charged against each business for every day of a range
+DAILY_COSTS = {
+    'barber': Decimal('260'),
+    'shoe': Decimal('110'),
+    'meatball': Decimal('200'),
+}
+BARBER_PRICES = {
+    'BARBER_ADULT': Decimal('120'),
+    'BARBER_CHILD': Decimal('100'),
+}
+
+
+def revenues(totals):
+    """Returns gross revenue per business for a dict of entry type totals"""
+    def total(entry_type):
+        return Decimal(totals.get(entry_type) or 0)
+
+    return {
+        'barber': sum(
+            (total(entry_type) * price for entry_type, price in BARBER_PRICES.items()),
+            Decimal('0')
+        ),
+        'shoe': total('SHOE_REVENUE'),
+        'meatball': total('MEATBALL_SALES'),
+    }
+
+
+def calculate_profits(totals, days=1):
+    """Returns per-business profits for entry totals summed over `days` days"""
+    days = Decimal(days)
+
+    gross = revenues(totals)
+    profits = {
+        'barber': gross['barber'] / 2 - DAILY_COSTS['barber'] * days,
+        'shoe': gross['shoe'] - DAILY_COSTS['shoe'] * days,
+        'meatball': (gross['meatball'] / 2 - Decimal(totals.get('MEATBALL_SALAD') or 0)
+                     - DAILY_COSTS['meatball'] * days),
+    }
+    profits['total'] = profits['barber'] + profits['shoe'] + profits['meatball']
+    return profits
+
+
+@dataclass(frozen=True)
+class EntryStats:
+    """SUM/AVG/COUNT of one entry type over a date range"""
+    total: Decimal = Decimal('0')
+    average: Decimal = Decimal('0')
+    count: int = 0
+
+
+@dataclass(frozen=True)
+class RangeMetrics:
+    """Per entry type statistics for an inclusive date range"""
+    start_date: datetime.date
+    end_date: datetime.date
+    stats: dict = field(default_factory=dict)
+
+    def __getitem__(self, entry_type):
+        return self.stats.get(entry_type, EntryStats())
+
+    @property
+    def days(self):
+        return (self.end_date - self.start_date).days + 1
+
+    def total(self, entry_type):
+        return self[entry_type].total
+
+    def totals(self):
+        return {entry_type: self.total(entry_type) for entry_type, _label in DailyEntry.ENTRY_TYPES}
+
+    def profits(self):
+        """Dashboard profits per business, fixed daily costs included"""
+        return calculate_profits(self.totals(), self.days)
+
+    def report(self):
+        """Revenue summary in the shape rendered by core/reports.html"""
+        shoe = self['SHOE_REVENUE']
+        sales = self['MEATBALL_SALES']
+        salad = self['MEATBALL_SALAD']
+        total_haircuts = self.total('BARBER_ADULT') + self.total('BARBER_CHILD')
+
+        report = {
+            'shoe_shop': {
+                'total': shoe.total,
+                'average': shoe.average,
+            },
+            'barber_shop': {
+                'total_haircuts': total_haircuts,
+                'free_haircuts': self.total('BARBER_FREE'),
+                'adult_avg': self['BARBER_ADULT'].average,
+                'child_avg': self['BARBER_CHILD'].average,
+            },
+            'meatball_stand': {
+                'total_sales': sales.total,
+                'total_costs': salad.total,
+                'net_profit': sales.total - salad.total,
+                'sales_avg': sales.average,
+                'costs_avg': salad.average,
+            },
+        }
+        report['total_revenue'] = shoe.total + total_haircuts + sales.total
+        report['average_daily_revenue'] = report['total_revenue'] / self.days
+        return report
+
+
+def _grouped_entries(start_date, end_date):
+    return (
+        DailyEntry.objects
+        .filter(date__range=[start_date, end_date])
+        .values('entry_type')
+        .annotate(total=Sum('value'), average=Avg('value'), count=Count('id'))
+        .order_by()
+    )
+
+
+def _entry_stats(rows):
+    return {
+        row['entry_type']: EntryStats(
+            total=row['total'] or Decimal('0'),
+            average=Decimal(row['average'] or 0),
+            count=row['count'],
+        )
+        for row in rows
+    }
+
+
+def _total_stats(totals):
+    return {
+        entry_type: EntryStats(total=total, average=None, count=None)
+        for entry_type, total in totals.items()
+    }
+
+
+def collect(start_date, end_date):
+    """Computes SUM/AVG/COUNT for every entry type in one GROUP BY query"""
+    rows = _grouped_entries(start_date, end_date)
+    return RangeMetrics(start_date, end_date, _entry_stats(rows))
+
+
+async def acollect(start_date, end_date):
+    rows = [row async for row in _grouped_entries(start_date, end_date)]
+    return RangeMetrics(start_date, end_date, _entry_stats(rows))
+
+
+def collect_totals(start_date, end_date):
+    """Range totals only, read from the cumulative table in two indexed lookups
+
+    Averages and counts are not tracked there and are left as None.
+    """
+    totals = CumulativeTotal.range_totals(start_date, end_date)
+    return RangeMetrics(start_date, end_date, _total_stats(totals))
+
+
+async def acollect_totals(start_date, end_date):
+    # The async ORM runs queries one at a time on its sync thread, so gather()
+    # only saves an await here; the two lookups still execute in sequence
+    end, before = await asyncio.gather(
+        CumulativeTotal.atotals_at(end_date),
+        CumulativeTotal.atotals_at(start_date - datetime.timedelta(days=1)),
+    )
+    totals = {entry_type: end[entry_type] - before[entry_type] for entry_type in end}
+    return RangeMetrics(start_date, end_date, _total_stats(totals))
+
+
+def bucket_start(date, bucket):
+    """Returns the first day of the day/ISO week/month bucket containing `date`"""
+    if bucket == 'week':
+        return date - datetime.timedelta(days=date.weekday())
+    if bucket == 'month':
+        return date.replace(day=1)
+    return date
+
+
+def next_bucket(start, bucket):
+    if bucket == 'week':
+        return start + datetime.timedelta(weeks=1)
+    if bucket == 'month':
+        return (start.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+    return start + datetime.timedelta(days=1)
+
+
+def _bucketed_entries(start_date, end_date, bucket):
+    if bucket not in BUCKETS:
+        raise ValueError(f"Unknown bucket {bucket!r}")
+    return (
+        DailyEntry.objects
+        .filter(date__range=[start_date, end_date])
+        .annotate(bucket=Trunc('date', bucket))
+        .values('bucket', 'entry_type')
+        .annotate(total=Sum('value'))
+        .order_by()
+    )
+
+
+def _compose_series(rows, start_date, end_date, bucket):
+    totals = {}
+    for row in rows:
+        totals.setdefault(row['bucket'], {})[row['entry_type']] = row['total']
+
+    labels = []
+    data = {
+        business: {'revenue': [], 'profit': []}
+        for business in BUSINESSES + ('total',)
+    }
+    start = bucket_start(start_date, bucket)
+    while start <= end_date:
+        end = next_bucket(start, bucket)
+        days = (min(end - datetime.timedelta(days=1), end_date) - max(start, start_date)).days + 1
+        bucket_totals = totals.get(start, {})
+        bucket_revenues = revenues(bucket_totals)
+        bucket_revenues['total'] = sum(bucket_revenues.values())
+        profits = calculate_profits(bucket_totals, days)
+
+        labels.append(start)
+        for business, values in data.items():
+            values['revenue'].append(bucket_revenues[business])
+            values['profit'].append(profits[business])
+        start = end
+
+    return {'bucket': bucket, 'labels': labels, 'series': data}
+
+
+def series(start_date, end_date, bucket='day'):
+    """Revenue and profit per business bucketed by day, ISO week or month
+
+    Bucketing runs in the database as one GROUP BY (bucket, entry_type)
+    query; buckets without entries are zero-filled here. Fixed daily costs
+    are charged for the days of each bucket that fall inside the range.
+    """
+    rows = _bucketed_entries(start_date, end_date, bucket)
+    return _compose_series(rows, start_date, end_date, bucket)
+
+
+async def aseries(start_date, end_date, bucket='day'):
+    rows = [row async for row in _bucketed_entries(start_date, end_date, bucket)]
+    return _compose_series(rows, start_date, end_date, bucket)
@@ -0,0 +1,51 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:38
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+def fill_cumulative_totals(apps, schema_editor):
+    DailyEntry = apps.get_model('core', 'DailyEntry')
+    CumulativeTotal = apps.get_model('core', 'CumulativeTotal')
+
+    running = {}
+    rows = {}
+    entries = DailyEntry.objects.order_by('date').values_list('date', 'entry_type', 'value')
+    for date, entry_type, value in entries:
+        field = entry_type.lower()
+        running[field] = running.get(field, Decimal('0')) + value
+        rows[date] = dict(running)
+
+    CumulativeTotal.objects.bulk_create(
+        [CumulativeTotal(date=date, **totals) for date, totals in rows.items()],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_account_inventoryitem_task_weeklyinventory'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CumulativeTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(unique=True, verbose_name='Date')),
+                ('shoe_revenue', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=14, verbose_name='Shoe Shop Revenue')),
+                ('barber_adult', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=14, verbose_name='Barber Adult Haircut')),
+                ('barber_child', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=14, verbose_name='Barber Child Haircut')),
+                ('barber_free', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=14, verbose_name='Barber Free Haircut')),
+                ('meatball_sales', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=14, verbose_name='Meatball Sales')),
+                ('meatball_salad', models.DecimalField(decimal_places=2, default=Decimal('0'), max_digits=14, verbose_name='Meatball Salad Cost')),
+            ],
+            options={
+                'verbose_name': 'Cumulative Total',
+                'verbose_name_plural': 'Cumulative Totals',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.RunPython(fill_cumulative_totals, migrations.RunPython.noop),
+    ]
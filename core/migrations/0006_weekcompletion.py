@@ -0,0 +1,45 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:47
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_week_completion(apps, schema_editor):
+    InventoryItem = apps.get_model('core', 'InventoryItem')
+    WeeklyInventory = apps.get_model('core', 'WeeklyInventory')
+    WeekCompletion = apps.get_model('core', 'WeekCompletion')
+
+    complete = 2 * InventoryItem.objects.count()
+    rows = WeeklyInventory.objects.values('year', 'week_number').annotate(count=Count('id')).order_by()
+    WeekCompletion.objects.bulk_create(
+        [WeekCompletion(is_complete=row['count'] == complete, **row) for row in rows],
+        batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_cumulativetotal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeekCompletion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField(verbose_name='Year')),
+                ('week_number', models.IntegerField(verbose_name='Week Number')),
+                ('count', models.IntegerField(default=0, verbose_name='Count')),
+                ('is_complete', models.BooleanField(default=False, verbose_name='Complete')),
+            ],
+            options={
+                'verbose_name': 'Week Completion',
+                'verbose_name_plural': 'Week Completions',
+                'ordering': ['-year', '-week_number'],
+                'indexes': [models.Index(fields=['is_complete', 'year', 'week_number'], name='core_weekco_is_comp_15a9a4_idx')],
+                'unique_together': {('year', 'week_number')},
+            },
+        ),
+        migrations.RunPython(fill_week_completion, migrations.RunPython.noop),
+    ]
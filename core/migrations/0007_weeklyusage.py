@@ -0,0 +1,62 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_weekly_usage(apps, schema_editor):
+    WeeklyInventory = apps.get_model('core', 'WeeklyInventory')
+    WeeklyUsage = apps.get_model('core', 'WeeklyUsage')
+
+    counts = {}
+    rows = WeeklyInventory.objects.values_list(
+        'item_id', 'year', 'week_number', 'inventory_type', 'quantity', 'item__cost'
+    )
+    for item_id, year, week_number, inventory_type, quantity, unit_cost in rows:
+        count = counts.setdefault((item_id, year, week_number), {'unit_cost': unit_cost})
+        count[inventory_type] = quantity
+
+    usage = []
+    for (item_id, year, week_number), count in counts.items():
+        if 'END' not in count:
+            continue
+        start = count.get('START')
+        used = count['END'] if start is None else start - count['END']
+        usage.append(WeeklyUsage(
+            item_id=item_id, year=year, week_number=week_number, start=start, end=count['END'],
+            used=used, unit_cost=count['unit_cost'], cost=used * count['unit_cost'],
+        ))
+    WeeklyUsage.objects.bulk_create(usage, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_weekcompletion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WeeklyUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField(verbose_name='Year')),
+                ('week_number', models.IntegerField(verbose_name='Week Number')),
+                ('start', models.IntegerField(blank=True, null=True, verbose_name='Start of Week')),
+                ('end', models.IntegerField(verbose_name='End of Week')),
+                ('used', models.IntegerField(verbose_name='Units Used')),
+                ('unit_cost', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Item Price')),
+                ('cost', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Cost of Used')),
+                ('closed_at', models.DateTimeField(auto_now=True, verbose_name='Closed At')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weekly_usage', to='core.inventoryitem', verbose_name='Item')),
+            ],
+            options={
+                'verbose_name': 'Weekly Usage',
+                'verbose_name_plural': 'Weekly Usage',
+                'ordering': ['-year', '-week_number', 'item'],
+                'indexes': [models.Index(fields=['year', 'week_number'], name='core_weekly_year_326f37_idx')],
+                'unique_together': {('item', 'year', 'week_number')},
+            },
+        ),
+        migrations.RunPython(fill_weekly_usage, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:05
+
+import datetime
+
+from django.db import migrations, models
+
+
+def iso_week_start(year, week_number):
+    january_4 = datetime.date(year, 1, 4)
+    return january_4 - datetime.timedelta(days=january_4.weekday()) + datetime.timedelta(weeks=week_number - 1)
+
+
+def fill_week_start(apps, schema_editor):
+    for model_name in ('WeeklyInventory', 'WeeklyUsage'):
+        model = apps.get_model('core', model_name)
+        weeks = model.objects.values_list('year', 'week_number').distinct().order_by()
+        for year, week_number in weeks:
+            model.objects.filter(year=year, week_number=week_number).update(
+                week_start=iso_week_start(year, week_number)
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_weeklyusage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='weeklyinventory',
+            name='week_start',
+            field=models.DateField(editable=False, null=True, verbose_name='Week Start'),
+        ),
+        migrations.AddField(
+            model_name='weeklyusage',
+            name='week_start',
+            field=models.DateField(null=True, verbose_name='Week Start'),
+        ),
+        migrations.RunPython(fill_week_start, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='weeklyinventory',
+            name='week_start',
+            field=models.DateField(editable=False, verbose_name='Week Start'),
+        ),
+        migrations.AlterField(
+            model_name='weeklyusage',
+            name='week_start',
+            field=models.DateField(verbose_name='Week Start'),
+        ),
+        migrations.AddIndex(
+            model_name='weeklyinventory',
+            index=models.Index(fields=['inventory_type', 'week_start', 'item'], name='core_weekly_invento_7d2277_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='weeklyusage',
+            index=models.Index(fields=['week_start'], name='core_weekly_week_st_23407c_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:01
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_weeklyinventory_week_start'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=50, verbose_name='Kind')),
+                ('payload', models.JSONField(default=dict, verbose_name='Payload')),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], default='PENDING', max_length=10, verbose_name='Status')),
+                ('attempts', models.IntegerField(default=0, verbose_name='Attempts')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Run After')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Started At')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finished At')),
+            ],
+            options={
+                'verbose_name': 'Job',
+                'verbose_name_plural': 'Jobs',
+                'ordering': ['run_after', 'id'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='core_job_status_df1a33_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_paths(apps, schema_editor):
+    Task = apps.get_model('core', 'Task')
+    tasks = list(Task.objects.only('id', 'parent_task_id'))
+    children = {}
+    for task in tasks:
+        children.setdefault(task.parent_task_id, []).append(task)
+    stack = [(task, '') for task in children.get(None, [])]
+    while stack:
+        task, parent_path = stack.pop()
+        task.path = f'{parent_path}{task.pk}/'
+        task.depth = task.path.count('/') - 1
+        stack.extend((child, task.path) for child in children.get(task.pk, []))
+    Task.objects.bulk_update(tasks, ['path', 'depth'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='depth',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Depth'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=1000, verbose_name='Path'),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='task',
+            name='parent_task',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='subtasks', to='core.task', verbose_name='Parent Task'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:11
+
+from django.db import migrations, models
+
+
+def fill_progress(apps, schema_editor):
+    Task = apps.get_model('core', 'Task')
+    rows = list(Task.objects.values_list('id', 'path', 'completed'))
+    counts = {task_id: [0, 0] for task_id, _path, _completed in rows}
+    for _task_id, path, completed in rows:
+        for ancestor_id in path.split('/')[:-2]:
+            if int(ancestor_id) in counts:
+                counts[int(ancestor_id)][0] += 1
+                counts[int(ancestor_id)][1] += int(completed)
+    Task.objects.bulk_update(
+        [Task(pk=task_id, total_descendants=total, completed_descendants=completed)
+         for task_id, (total, completed) in counts.items()],
+        ['total_descendants', 'completed_descendants'],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_task_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='completed_descendants',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Completed Subtasks'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='total_descendants',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Subtasks'),
+        ),
+        migrations.RunPython(fill_progress, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_task_progress'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('completed', False)), fields=['completed', 'deadline'], name='core_task_open_deadline_idx'),
+        ),
+    ]
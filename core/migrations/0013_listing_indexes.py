@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_task_open_deadline_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='account',
+            index=models.Index(fields=['name', 'id'], name='core_accoun_name_51b570_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['deadline', '-created_at', '-id'], name='core_task_listing_idx'),
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:15
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def open_ledgers(apps, schema_editor):
+    # Earlier balance changes were not recorded, so each ledger starts from the current balance.
+    # Like the account_created signal, zero balances get no opening entry.
+    Account = apps.get_model('core', 'Account')
+    AccountTransaction = apps.get_model('core', 'AccountTransaction')
+    AccountTransaction.objects.bulk_create([
+        AccountTransaction(account=account, kind='OPENING', amount=account.balance, occurred_at=account.created_at)
+        for account in Account.objects.exclude(balance=0)
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('as_of', models.DateTimeField(verbose_name='As Of')),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Balance')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='core.account', verbose_name='Account')),
+            ],
+            options={
+                'verbose_name': 'Account Snapshot',
+                'verbose_name_plural': 'Account Snapshots',
+                'ordering': ['-as_of'],
+                'unique_together': {('account', 'as_of')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AccountTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('OPENING', 'Opening Balance'), ('DEPOSIT', 'Deposit'), ('WITHDRAWAL', 'Withdrawal'), ('ADJUSTMENT', 'Adjustment')], max_length=20, verbose_name='Kind')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='Amount')),
+                ('note', models.CharField(blank=True, max_length=200, verbose_name='Note')),
+                ('occurred_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Occurred At')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Created At')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transactions', to='core.account', verbose_name='Account')),
+            ],
+            options={
+                'verbose_name': 'Account Transaction',
+                'verbose_name_plural': 'Account Transactions',
+                'ordering': ['-occurred_at', '-id'],
+                'indexes': [models.Index(fields=['account', 'occurred_at'], name='core_accoun_account_75b707_idx')],
+            },
+        ),
+        migrations.RunPython(open_ledgers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_account_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='version',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Version'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='version',
+            field=models.IntegerField(default=0, editable=False, verbose_name='Version'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.4 on 2026-10-18 20:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_task_account_version'),
+    ]
+
+    # Paths grow with the depth of the task, so they are not capped at a length
+    operations = [
+        migrations.AlterField(
+            model_name='task',
+            name='path',
+            field=models.TextField(db_index=True, default='', editable=False, verbose_name='Path'),
+        ),
+    ]
@@ -1,11 +1,37 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F, Max, Min, Q, Sum, Value
+from django.db.models.functions import Coalesce, Concat, Substr
 from django.core.validators import MinValueValidator
 from django.utils.translation import gettext_lazy as _
 from decimal import Decimal
 from django.utils import timezone
+from itertools import islice
 import datetime
 
 
+def iso_week_start(year, week_number):
+    """Monday of ISO week `week_number` of ISO year `year`
+
+    Week 1 is the week containing January 4th. Unlike date.fromisocalendar
+    this never raises, so a week 53 in a 52-week year maps to the Monday
+    after week 52.
+    """
+    january_4 = datetime.date(year, 1, 4)
+    return january_4 - datetime.timedelta(days=january_4.weekday()) + datetime.timedelta(weeks=week_number - 1)
+
+
+def units_used(start, end):
+    """Units used in a week given its START and END counts, either of which may be None
+
+    Without an END count there is no usage; without a START count all of
+    the END stock is assumed to have been used. WeeklyUsage snapshots and
+    the live week reports both follow this rule.
+    """
+    if end is None:
+        return None
+    return end if start is None else start - end
+
+
 class DailyEntry(models.Model):
     ENTRY_TYPES = [
         ('SHOE_REVENUE', _('Shoe Shop Revenue')),
@@ -39,8 +65,334 @@ class DailyEntry(models.Model):
     def __str__(self):
         return f"{self.get_entry_type_display()} - {self.date} - ฿{self.value}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored date so rollups can follow an entry moved to another day
+        instance._loaded_date = getattr(instance, 'date', None)
+        return instance
+
+
+class CumulativeTotal(models.Model):
+    """Running totals of every DailyEntry type up to and including `date`
+
+    Any range total is two indexed lookups: totals_at(end) - totals_at(start - 1).
+    Rows exist only for dates that have entries; a lookup takes the latest row
+    on or before the requested date.
+    """
+
+    FIELDS = {entry_type: entry_type.lower() for entry_type, _label in DailyEntry.ENTRY_TYPES}
+
+    date = models.DateField(_('Date'), unique=True)
+    shoe_revenue = models.DecimalField(_('Shoe Shop Revenue'), max_digits=14, decimal_places=2, default=Decimal('0'))
+    barber_adult = models.DecimalField(_('Barber Adult Haircut'), max_digits=14, decimal_places=2, default=Decimal('0'))
+    barber_child = models.DecimalField(_('Barber Child Haircut'), max_digits=14, decimal_places=2, default=Decimal('0'))
+    barber_free = models.DecimalField(_('Barber Free Haircut'), max_digits=14, decimal_places=2, default=Decimal('0'))
+    meatball_sales = models.DecimalField(_('Meatball Sales'), max_digits=14, decimal_places=2, default=Decimal('0'))
+    meatball_salad = models.DecimalField(_('Meatball Salad Cost'), max_digits=14, decimal_places=2, default=Decimal('0'))
+
+    class Meta:
+        ordering = ['-date']
+        verbose_name = _('Cumulative Total')
+        verbose_name_plural = _('Cumulative Totals')
+
+    def __str__(self):
+        return f"{self.date}"
+
+    @classmethod
+    def zero_totals(cls):
+        return {entry_type: Decimal('0') for entry_type in cls.FIELDS}
+
+    def totals(self):
+        return {entry_type: getattr(self, field) for entry_type, field in self.FIELDS.items()}
+
+    @classmethod
+    def totals_at(cls, date):
+        """Returns running totals per entry type as of the end of `date`"""
+        row = cls.objects.filter(date__lte=date).order_by('-date').first()
+        return row.totals() if row else cls.zero_totals()
+
+    @classmethod
+    async def atotals_at(cls, date):
+        row = await cls.objects.filter(date__lte=date).order_by('-date').afirst()
+        return row.totals() if row else cls.zero_totals()
+
+    @classmethod
+    def range_totals(cls, start_date, end_date):
+        """Returns per entry type totals for an inclusive date range"""
+        end = cls.totals_at(end_date)
+        before = cls.totals_at(start_date - datetime.timedelta(days=1))
+        return {entry_type: end[entry_type] - before[entry_type] for entry_type in cls.FIELDS}
+
+    @classmethod
+    def refresh_for_dates(cls, dates):
+        """Re-reads the entries of `dates` and shifts every later running total
+
+        Rows between the first and last changed date are rewritten in one
+        pass; rows after the last one get the accumulated difference with a
+        single UPDATE.
+        """
+        dates = set(dates)
+        if not dates:
+            return
+        first, last = min(dates), max(dates)
+
+        with transaction.atomic():
+            actual = {}
+            entries = DailyEntry.objects.filter(date__in=dates).order_by()
+            for date, entry_type, value in entries.values_list('date', 'entry_type', 'value'):
+                actual.setdefault(date, {})[entry_type] = value
+
+            previous = cls.objects.filter(date__lt=first).order_by('-date').first()
+            old_before = previous.totals() if previous else cls.zero_totals()
+            new_before = dict(old_before)
+            rows = {row.date: row for row in cls.objects.filter(date__range=[first, last])}
+
+            changed, created, deleted = [], [], []
+            for date in sorted(dates | set(rows)):
+                row = rows.get(date)
+                old = row.totals() if row else old_before
+                if date in dates:
+                    day = actual.get(date, {})
+                    day_values = {t: Decimal(day.get(t) or 0) for t in cls.FIELDS}
+                else:
+                    day_values = {t: old[t] - old_before[t] for t in cls.FIELDS}
+                new = {t: new_before[t] + day_values[t] for t in cls.FIELDS}
+                old_before = old
+
+                if date in dates and date not in actual:
+                    if row:
+                        deleted.append(row.pk)
+                    continue
+
+                new_before = new
+                values = {cls.FIELDS[t]: value for t, value in new.items()}
+                if row is None:
+                    created.append(cls(date=date, **values))
+                elif new != old:
+                    for field, value in values.items():
+                        setattr(row, field, value)
+                    changed.append(row)
+
+            if deleted:
+                cls.objects.filter(pk__in=deleted).delete()
+            if changed:
+                cls.objects.bulk_update(changed, list(cls.FIELDS.values()), batch_size=500)
+            if created:
+                cls.objects.bulk_create(created, batch_size=500)
+
+            shift = {
+                cls.FIELDS[t]: F(cls.FIELDS[t]) + (new_before[t] - old_before[t])
+                for t in cls.FIELDS if new_before[t] != old_before[t]
+            }
+            if shift:
+                cls.objects.filter(date__gt=last).update(**shift)
+
+    @classmethod
+    def expected_rows(cls):
+        """Yields (date, running totals) recomputed from the raw entries"""
+        running = cls.zero_totals()
+        daily = (
+            DailyEntry.objects
+            .values('date', 'entry_type')
+            .annotate(total=Sum('value'))
+            .order_by('date')
+        )
+        current_date = None
+        for row in daily.iterator():
+            if current_date is not None and row['date'] != current_date:
+                yield current_date, dict(running)
+            current_date = row['date']
+            running[row['entry_type']] += row['total']
+        if current_date is not None:
+            yield current_date, dict(running)
+
+    @classmethod
+    def rebuild(cls):
+        """Drops and recomputes every running total in batches, returns the number of rows written"""
+        rows = (
+            cls(date=date, **{cls.FIELDS[entry_type]: value for entry_type, value in totals.items()})
+            for date, totals in cls.expected_rows()
+        )
+        written = 0
+        with transaction.atomic():
+            cls.objects.all().delete()
+            while True:
+                batch = list(islice(rows, 500))
+                if not batch:
+                    break
+                cls.objects.bulk_create(batch)
+                written += len(batch)
+        return written
+
+    @classmethod
+    def find_inconsistencies(cls):
+        """Compares stored running totals against the raw aggregates
+
+        Returns a list of (date, entry_type, expected, stored) tuples.
+        """
+        expected = dict(cls.expected_rows())
+        problems = []
+        for row in cls.objects.order_by('date').iterator():
+            totals = expected.pop(row.date, None)
+            if totals is None:
+                problems.append((row.date, None, None, row.totals()))
+                continue
+            for entry_type, value in row.totals().items():
+                if value != totals[entry_type]:
+                    problems.append((row.date, entry_type, totals[entry_type], value))
+        for date, totals in expected.items():
+            problems.append((date, None, totals, None))
+        return sorted(problems, key=lambda problem: problem[0])
+
+
+def subtree_q(path):
+    """Tasks whose materialized path starts with `path`, as an index range scan
+
+    Paths only contain digits and '/', which all sort before '~'.
+    """
+    return Q(path__gte=path, path__lt=path + '~')
+
+
+def assign_paths(tasks):
+    """Sets path and depth on `tasks` from their parent_task_id, parents first
+
+    Tasks on a parent cycle, or whose parent is missing, are left with an
+    empty path.
+    """
+    children = {}
+    for task in tasks:
+        task.path, task.depth = '', 0
+        children.setdefault(task.parent_task_id, []).append(task)
+    stack = [(task, '') for task in children.get(None, [])]
+    while stack:
+        task, parent_path = stack.pop()
+        task.path = f'{parent_path}{task.pk}/'
+        task.depth = task.path.count('/') - 1
+        stack.extend((child, task.path) for child in children.get(task.pk, []))
+
+
+def path_ancestor_ids(path):
+    """Ids of the ancestors in a materialized path, root first"""
+    return [int(task_id) for task_id in path.split('/')[:-2]]
+
+
+def _versioned(model, pk, expected_version=None):
+    """The row `pk`, narrowed to `expected_version` when one is given"""
+    rows = model.objects.filter(pk=pk)
+    if expected_version is not None:
+        rows = rows.filter(version=expected_version)
+    return rows
+
+
+def add_to_ancestors(changes, path, total, completed):
+    """Accumulates a (total, completed) increment for every ancestor in `path` into `changes`"""
+    for task_id in path_ancestor_ids(path):
+        current_total, current_completed = changes.get(task_id, (0, 0))
+        changes[task_id] = (current_total + total, current_completed + completed)
+    return changes
+
+
+class ConflictError(Exception):
+    """The row changed since the caller read it; raised by version-checked writes"""
+
+
+class TaskQuerySet(models.QuerySet):
+    def open(self):
+        return self.filter(completed=False)
+
+    def overdue(self, today=None):
+        """Open tasks whose deadline has passed, served by the open-deadline index"""
+        return self.open().filter(deadline__lt=today or timezone.now().date())
+
+    def due_within(self, days, today=None):
+        """Open tasks due from today up to `days` days ahead, inclusive"""
+        today = today or timezone.now().date()
+        return self.open().filter(deadline__gte=today, deadline__lte=today + datetime.timedelta(days=days))
+
+    def by_urgency(self):
+        """Open tasks with a deadline, earliest first"""
+        return self.open().filter(deadline__isnull=False).order_by('deadline', 'id')
+
+    def subtrees(self):
+        """Every task in this queryset together with all of its descendants"""
+        return self._subtrees([path for path in self.values_list('path', flat=True) if path])
+
+    def _subtrees(self, paths):
+        if not paths:
+            return self.none()
+        query = Q()
+        for path in paths:
+            query |= subtree_q(path)
+        return self.model.objects.filter(query)
+
+    def delete(self):
+        # Whole subtrees go in one DELETE; parent_task is DO_NOTHING so the
+        # collector never has to load descendants to cascade
+        rows = list(self.values_list('path', 'completed', 'total_descendants', 'completed_descendants', 'pk'))
+        # Tasks without a path (see assign_paths) have no subtree range, so they
+        # go by pk along with everything below them through parent_task
+        orphan_ids = level = {row[-1] for row in rows if not row[0]}
+        while level:
+            level = set(self.model.objects.filter(parent_task_id__in=level).values_list('pk', flat=True)) - orphan_ids
+            orphan_ids = orphan_ids | level
+        rows = sorted(row[:-1] for row in rows if row[0])
+        # Subtrees are contiguous in path order, so nested selections follow their root
+        roots = []
+        for row in rows:
+            if not roots or not row[0].startswith(roots[-1][0]):
+                roots.append(row)
+
+        with transaction.atomic():
+            changes = {}
+            for path, completed, total_descendants, completed_descendants in roots:
+                add_to_ancestors(changes, path, -1 - total_descendants, -int(completed) - completed_descendants)
+            self.model.adjust_progress(changes)
+            doomed = self._subtrees([row[0] for row in roots])
+            if orphan_ids:
+                doomed = doomed | self.model.objects.filter(pk__in=orphan_ids)
+            return super(TaskQuerySet, doomed).delete()
+
+    delete.queryset_only = True
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """bulk_create() that also sets the path, depth and ancestor progress of the new tasks"""
+        with transaction.atomic():
+            objs = super().bulk_create(objs, *args, **kwargs)
+            parent_ids = {obj.parent_task_id for obj in objs if obj.parent_task_id}
+            paths = dict(self.model.objects.filter(pk__in=parent_ids).values_list('id', 'path'))
+            created = [obj for obj in objs if obj.pk]
+            changes = {}
+            for obj in created:
+                obj.path = f"{paths.get(obj.parent_task_id, '')}{obj.pk}/"
+                obj.depth = obj.path.count('/') - 1
+                paths[obj.pk] = obj.path
+                add_to_ancestors(changes, obj.path, 1, int(obj.completed))
+            self.model.objects.bulk_update(created, ['path', 'depth'], batch_size=500)
+            self.model.adjust_progress(changes)
+        return objs
+
 
 class Task(models.Model):
+    """A to-do item, optionally nested under a parent task
+
+    `path` is the materialized path of ids from the root down to the task,
+    like "3/17/42/", and `depth` its number of ancestors. Both are kept up
+    to date by save(), so subtree and ancestor lookups are single indexed
+    queries whatever the depth.
+
+    `total_descendants` and `completed_descendants` count the subtree below
+    the task. save(), delete() and bulk_create() adjust them on every
+    ancestor with F() expressions; QuerySet.update() does not, see
+    `manage.py check_task_progress`.
+
+    `version` goes up by one on every save() and complete(). Passing the
+    version a client last saw as `expected_version` makes the write fail
+    with ConflictError if someone else changed the task in between.
+    """
+    # Maintained by the model itself; plain saves never write them back
+    DERIVED_FIELDS = ('path', 'depth', 'total_descendants', 'completed_descendants', 'version')
+
     name = models.CharField(_('Name'), max_length=200)
     description = models.TextField(_('Description'), blank=True)
     deadline = models.DateField(_('Deadline'), null=True, blank=True)
@@ -48,15 +400,30 @@ class Task(models.Model):
     parent_task = models.ForeignKey(
         'self',
         verbose_name=_('Parent Task'),
-        on_delete=models.CASCADE,
+        on_delete=models.DO_NOTHING,
         null=True,
         blank=True,
         related_name='subtasks'
     )
+    path = models.TextField(_('Path'), db_index=True, editable=False, default='')
+    depth = models.IntegerField(_('Depth'), default=0, editable=False)
+    total_descendants = models.IntegerField(_('Subtasks'), default=0, editable=False)
+    completed_descendants = models.IntegerField(_('Completed Subtasks'), default=0, editable=False)
+    version = models.IntegerField(_('Version'), default=0, editable=False)
     created_at = models.DateTimeField(_('Created At'), auto_now_add=True)
     updated_at = models.DateTimeField(_('Updated At'), auto_now=True)
 
+    objects = TaskQuerySet.as_manager()
+
     class Meta:
+        indexes = [
+            # Only open tasks are ever searched by deadline, so completed ones stay out of the index
+            models.Index(
+                fields=['completed', 'deadline'], condition=Q(completed=False), name='core_task_open_deadline_idx'
+            ),
+            # Keyset pagination in Meta.ordering, see core.pagination
+            models.Index(fields=['deadline', '-created_at', '-id'], name='core_task_listing_idx'),
+        ]
         ordering = ['deadline', '-created_at']
         verbose_name = _('Task')
         verbose_name_plural = _('Tasks')
@@ -64,12 +431,190 @@ class Task(models.Model):
     def __str__(self):
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored parent so save() only recomputes paths on a move
+        instance._loaded_parent_id = getattr(instance, 'parent_task_id', None)
+        return instance
+
+    @classmethod
+    def adjust_progress(cls, changes):
+        """Applies {task_id: (total, completed)} increments, one UPDATE per distinct increment"""
+        groups = {}
+        for task_id, change in changes.items():
+            if change != (0, 0):
+                groups.setdefault(change, []).append(task_id)
+        for (total, completed), task_ids in groups.items():
+            cls.objects.filter(pk__in=task_ids).update(
+                total_descendants=F('total_descendants') + total,
+                completed_descendants=F('completed_descendants') + completed,
+            )
+
+    def save(self, *args, expected_version=None, **kwargs):
+        if self._state.adding:
+            with transaction.atomic():
+                parent_path = ''
+                if self.parent_task_id:
+                    parent_path = Task.objects.values_list('path', flat=True).get(pk=self.parent_task_id)
+                super().save(*args, **kwargs)
+                self._move_subtree(f'{parent_path}{self.pk}/')
+                Task.adjust_progress(add_to_ancestors({}, self.path, 1, int(self.completed)))
+            self._loaded_parent_id = self.parent_task_id
+            return
+
+        moved = self.parent_task_id != getattr(self, '_loaded_parent_id', None)
+        if kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DERIVED_FIELDS
+            ]
+        with transaction.atomic():
+            # Bumping the version first also locks the row for the rest of the save
+            if not _versioned(Task, self.pk, expected_version).update(version=F('version') + 1):
+                if expected_version is not None:
+                    raise ConflictError(self.pk)
+            stored = None
+            if moved:
+                stored = Task.objects.values_list(*self.DERIVED_FIELDS).get(pk=self.pk)
+                parent_path = ''
+                if self.parent_task_id:
+                    parent_path = Task.objects.values_list('path', flat=True).get(pk=self.parent_task_id)
+                    if stored[0] and parent_path.startswith(stored[0]):
+                        raise ValueError(_('A task cannot be moved under itself or one of its subtasks'))
+            # Only the save that actually flips `completed` adjusts the ancestors
+            flipped = 'completed' in kwargs['update_fields'] and Task.objects.filter(pk=self.pk).exclude(
+                completed=self.completed
+            ).update(completed=self.completed)
+            super().save(*args, **kwargs)
+            stored = stored or Task.objects.values_list(*self.DERIVED_FIELDS).get(pk=self.pk)
+            self.path, self.depth, self.total_descendants, self.completed_descendants, self.version = stored
+            if flipped:
+                Task.adjust_progress(add_to_ancestors({}, self.path, 0, 1 if self.completed else -1))
+            if moved:
+                total = 1 + self.total_descendants
+                completed = int(self.completed) + self.completed_descendants
+                Task.adjust_progress(add_to_ancestors({}, self.path, -total, -completed))
+                self._move_subtree(f'{parent_path}{self.pk}/')
+                Task.adjust_progress(add_to_ancestors({}, self.path, total, completed))
+        self._loaded_parent_id = self.parent_task_id
+
+    def complete(self, expected_version=None):
+        """Marks the task completed with one conditional UPDATE; False if it already was
+
+        Only the columns that change are written, so concurrent edits of other
+        fields are kept. Raises ConflictError if `expected_version` is stale.
+        """
+        with transaction.atomic():
+            completed = _versioned(Task, self.pk, expected_version).filter(completed=False).update(
+                completed=True, version=F('version') + 1, updated_at=timezone.now()
+            )
+            self.path, self.completed, self.version, self.updated_at = Task.objects.values_list(
+                'path', 'completed', 'version', 'updated_at'
+            ).get(pk=self.pk)
+            if completed:
+                Task.adjust_progress(add_to_ancestors({}, self.path, 0, 1))
+            elif expected_version is not None and self.version != expected_version:
+                raise ConflictError(self.pk)
+        return bool(completed)
+
+    def _move_subtree(self, path):
+        """Rewrites the path and depth of this task and all its descendants in one UPDATE"""
+        depth = path.count('/') - 1
+        if path == self.path:
+            return
+        if self.path:
+            Task.objects.filter(subtree_q(self.path)).update(
+                path=Concat(Value(path), Substr('path', len(self.path) + 1), output_field=models.TextField()),
+                depth=F('depth') + (depth - self.depth),
+            )
+        else:
+            Task.objects.filter(pk=self.pk).update(path=path, depth=depth)
+        self.path, self.depth = path, depth
+
+    def delete(self, *args, **kwargs):
+        return Task.objects.filter(pk=self.pk).delete()
+
+    def subtree(self):
+        """This task and all its descendants"""
+        return Task.objects.filter(subtree_q(self.path))
+
+    def descendants(self):
+        return self.subtree().exclude(pk=self.pk)
+
+    def ancestor_ids(self):
+        return path_ancestor_ids(self.path)
+
+    def ancestors(self):
+        """Ancestors from the root down, read by primary key from the path"""
+        return Task.objects.filter(pk__in=self.ancestor_ids()).order_by('depth')
+
+    def subtree_summary(self):
+        """Aggregates over the descendants in one query"""
+        today = timezone.now().date()
+        return self.descendants().aggregate(
+            total=Count('id'),
+            done=Count('id', filter=Q(completed=True)),
+            overdue=Count('id', filter=Q(completed=False, deadline__lt=today)),
+            max_depth=Coalesce(Max('depth'), Value(self.depth)) - self.depth,
+            next_deadline=Min('deadline', filter=Q(completed=False)),
+        )
+
+    @classmethod
+    def rebuild_paths(cls):
+        """Recomputes every path and depth from parent_task; returns the number of tasks"""
+        with transaction.atomic():
+            tasks = list(cls.objects.only('id', 'parent_task_id'))
+            assign_paths(tasks)
+            cls.objects.bulk_update(tasks, ['path', 'depth'], batch_size=500)
+        return len(tasks)
+
+    @classmethod
+    def expected_progress(cls):
+        """{task_id: (total_descendants, completed_descendants)} re-derived from the paths"""
+        rows = list(cls.objects.values_list('id', 'path', 'completed'))
+        changes = {task_id: (0, 0) for task_id, _path, _completed in rows}
+        for _task_id, path, completed in rows:
+            add_to_ancestors(changes, path, 1, int(completed))
+        return changes
+
+    @classmethod
+    def find_progress_inconsistencies(cls):
+        """(task_id, expected, stored) for every task whose counters are off"""
+        stored = {
+            task_id: (total, completed)
+            for task_id, total, completed in cls.objects.values_list(
+                'id', 'total_descendants', 'completed_descendants'
+            )
+        }
+        return [
+            (task_id, expected, stored.get(task_id))
+            for task_id, expected in sorted(cls.expected_progress().items())
+            if stored.get(task_id) != expected
+        ]
+
+    @classmethod
+    def rebuild_progress(cls):
+        """Rewrites every progress counter from the paths; returns the number of tasks"""
+        with transaction.atomic():
+            tasks = [
+                cls(pk=task_id, total_descendants=total, completed_descendants=completed)
+                for task_id, (total, completed) in cls.expected_progress().items()
+            ]
+            cls.objects.bulk_update(tasks, ['total_descendants', 'completed_descendants'], batch_size=500)
+        return len(tasks)
+
+    def progress_percentage(self):
+        if not self.total_descendants:
+            return 100 if self.completed else 0
+        return self.completed_descendants * 100 // self.total_descendants
+
     def get_all_subtasks(self):
         return self.subtasks.all()
 
-    def is_overdue(self):
+    def is_overdue(self, today=None):
         if self.deadline and not self.completed:
-            return self.deadline < timezone.now().date()
+            return self.deadline < (today or timezone.now().date())
         return False
 
 
@@ -87,10 +632,15 @@ class Account(models.Model):
         decimal_places=2,
         validators=[MinValueValidator(Decimal('0.00'))]
     )
+    # Goes up on every change written through core.ledger or the account views
+    version = models.IntegerField(_('Version'), default=0, editable=False)
     created_at = models.DateTimeField(_('Created At'), auto_now_add=True)
     updated_at = models.DateTimeField(_('Updated At'), auto_now=True)
 
     class Meta:
+        indexes = [
+            models.Index(fields=['name', 'id']),
+        ]
         ordering = ['name']
         verbose_name = _('Account')
         verbose_name_plural = _('Accounts')
@@ -108,6 +658,77 @@ class Account(models.Model):
         return max(self.goal - self.balance, Decimal('0.00'))
 
 
+class AccountTransaction(models.Model):
+    """One signed change to an account balance; rows are never updated or deleted
+
+    Corrections are recorded as new ADJUSTMENT rows. Written through
+    core.ledger, which keeps Account.balance and the snapshots in step.
+    """
+    KINDS = [
+        ('OPENING', _('Opening Balance')),
+        ('DEPOSIT', _('Deposit')),
+        ('WITHDRAWAL', _('Withdrawal')),
+        ('ADJUSTMENT', _('Adjustment')),
+    ]
+
+    account = models.ForeignKey(
+        Account,
+        verbose_name=_('Account'),
+        on_delete=models.CASCADE,
+        related_name='transactions'
+    )
+    kind = models.CharField(_('Kind'), max_length=20, choices=KINDS)
+    amount = models.DecimalField(_('Amount'), max_digits=12, decimal_places=2)
+    note = models.CharField(_('Note'), max_length=200, blank=True)
+    occurred_at = models.DateTimeField(_('Occurred At'), default=timezone.now)
+    created_at = models.DateTimeField(_('Created At'), auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['account', 'occurred_at']),
+        ]
+        ordering = ['-occurred_at', '-id']
+        verbose_name = _('Account Transaction')
+        verbose_name_plural = _('Account Transactions')
+
+    def __str__(self):
+        return f"{self.account_id} {self.kind}: {self.amount}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError(_('Account transactions cannot be changed; record an adjustment instead'))
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError(_('Account transactions cannot be deleted; record an adjustment instead'))
+
+
+class AccountSnapshot(models.Model):
+    """Balance of an account including every transaction up to `as_of`
+
+    Taken by core.ledger every LEDGER['SNAPSHOT_EVERY'] transactions, so a
+    point-in-time balance never sums more than that many rows.
+    """
+    account = models.ForeignKey(
+        Account,
+        verbose_name=_('Account'),
+        on_delete=models.CASCADE,
+        related_name='snapshots'
+    )
+    as_of = models.DateTimeField(_('As Of'))
+    balance = models.DecimalField(_('Balance'), max_digits=14, decimal_places=2)
+    created_at = models.DateTimeField(_('Created At'), auto_now_add=True)
+
+    class Meta:
+        unique_together = ['account', 'as_of']
+        ordering = ['-as_of']
+        verbose_name = _('Account Snapshot')
+        verbose_name_plural = _('Account Snapshots')
+
+    def __str__(self):
+        return f"{self.account_id} @ {self.as_of}: {self.balance}"
+
+
 class InventoryItem(models.Model):
     name = models.CharField(_('Name'), max_length=100, unique=True)
     cost = models.DecimalField(
@@ -144,6 +765,8 @@ class WeeklyInventory(models.Model):
     year = models.IntegerField(_('Year'))
     inventory_type = models.CharField(_('Type'), max_length=5, choices=INVENTORY_TYPES)
     quantity = models.IntegerField(_('Quantity'), validators=[MinValueValidator(0)])
+    # Monday of the ISO week, derived from year/week_number on save
+    week_start = models.DateField(_('Week Start'), editable=False)
     created_at = models.DateTimeField(_('Created At'), auto_now_add=True)
     updated_at = models.DateTimeField(_('Updated At'), auto_now=True)
 
@@ -151,6 +774,7 @@ class WeeklyInventory(models.Model):
         unique_together = ['item', 'week_number', 'year', 'inventory_type']
         indexes = [
             models.Index(fields=['week_number', 'year']),
+            models.Index(fields=['inventory_type', 'week_start', 'item']),
         ]
         ordering = ['-year', '-week_number', 'item']
         verbose_name = _('Weekly Inventory')
@@ -159,47 +783,276 @@ class WeeklyInventory(models.Model):
     def __str__(self):
         return f"{self.item.name} - Week {self.week_number}/{self.year} - {self.get_inventory_type_display()}"
 
+    def save(self, *args, **kwargs):
+        self.week_start = iso_week_start(self.year, self.week_number)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'year', 'week_number'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'week_start'}
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def between(start_date, end_date):
+        """Counts of every ISO week overlapping the inclusive date range, as one range scan"""
+        return WeeklyInventory.objects.filter(week_start__range=(
+            start_date - datetime.timedelta(days=start_date.weekday()),
+            end_date - datetime.timedelta(days=end_date.weekday()),
+        ))
+
+    @staticmethod
+    def weeks_q(weeks):
+        """Q matching any of the given (year, week_number) pairs"""
+        condition = models.Q(pk__in=[])
+        for year, week_number in weeks:
+            condition |= models.Q(year=year, week_number=week_number)
+        return condition
+
     @staticmethod
     def get_completed_weeks():
         """Returns weeks that have both start and end counts for all items"""
-        weeks = WeeklyInventory.objects.values('week_number', 'year').distinct()
-        completed_weeks = []
-        for week in weeks:
-            items_count = InventoryItem.objects.count()
-            week_counts = WeeklyInventory.objects.filter(
-                week_number=week['week_number'],
-                year=week['year']
-            ).count()
-            if week_counts == items_count * 2:  # Both START and END for all items
-                completed_weeks.append({
-                    'week_number': week['week_number'],
-                    'year': week['year'],
-                    'is_complete': True
-                })
-        return completed_weeks
+        return list(
+            WeekCompletion.objects
+            .filter(is_complete=True)
+            .values('week_number', 'year', 'is_complete')
+        )
 
     @classmethod
     def generate_report(cls, year, week):
         """Generates usage report for a specific week"""
-        inventories = cls.objects.filter(year=year, week_number=week)
-        report = {}
+        from .inventory_reports import week_usage
+
+        return {
+            row['name']: {
+                'start': row['start'],
+                'end': row['end'],
+                'used': row['units_used'],
+                'cost': row['cost_of_used']
+            }
+            for row in week_usage(year, week) if row['units_used'] is not None
+        }
+
+class WeekCompletion(models.Model):
+    """How many START/END counts exist per week, and whether every item has both
+
+    Kept in sync by core.signals so the inventory page lists completed weeks
+    with one indexed query however many weeks have been recorded.
+    """
+    year = models.IntegerField(_('Year'))
+    week_number = models.IntegerField(_('Week Number'))
+    count = models.IntegerField(_('Count'), default=0)
+    is_complete = models.BooleanField(_('Complete'), default=False)
+
+    class Meta:
+        unique_together = ['year', 'week_number']
+        indexes = [
+            models.Index(fields=['is_complete', 'year', 'week_number']),
+        ]
+        ordering = ['-year', '-week_number']
+        verbose_name = _('Week Completion')
+        verbose_name_plural = _('Week Completions')
+
+    def __str__(self):
+        return f"Week {self.week_number}/{self.year}: {self.count}"
+
+    @staticmethod
+    def week_counts(weeks=None):
+        """COUNT(*) per (year, week_number), optionally limited to `weeks`"""
+        counts = WeeklyInventory.objects.all()
+        if weeks is not None:
+            weeks = list(weeks)
+            if not weeks:
+                return {}
+            counts = counts.filter(WeeklyInventory.weeks_q(weeks))
+        rows = counts.values('year', 'week_number').annotate(count=Count('id')).order_by()
+        return {(row['year'], row['week_number']): row['count'] for row in rows}
+
+    @staticmethod
+    def completed_weeks_query():
+        """The GROUP BY ... HAVING COUNT(*) = 2 * items query the index replaces"""
+        items = InventoryItem.objects.count()
+        return (
+            WeeklyInventory.objects
+            .values('year', 'week_number')
+            .annotate(count=Count('id'))
+            .filter(count=2 * items)
+            .order_by('-year', '-week_number')
+        )
+
+    @classmethod
+    def refresh_for_weeks(cls, weeks):
+        """Recounts the given (year, week_number) pairs in one GROUP BY query"""
+        weeks = set(weeks)
+        counts = cls.week_counts(weeks)
+        complete = 2 * InventoryItem.objects.count()
+
+        empty = weeks - set(counts)
+        if empty:
+            cls.objects.filter(WeeklyInventory.weeks_q(empty)).delete()
+
+        cls.objects.bulk_create(
+            [
+                cls(year=year, week_number=week_number, count=count, is_complete=count == complete)
+                for (year, week_number), count in counts.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['year', 'week_number'],
+            update_fields=['count', 'is_complete'],
+        )
+
+    @classmethod
+    def refresh_completeness(cls):
+        """Re-evaluates every week after the number of items changed, in one UPDATE"""
+        complete = 2 * InventoryItem.objects.count()
+        return cls.objects.update(is_complete=models.Case(
+            models.When(count=complete, then=Value(True)),
+            default=Value(False),
+        ))
+
+    @classmethod
+    def rebuild(cls):
+        """Recreates the whole index from WeeklyInventory"""
+        complete = 2 * InventoryItem.objects.count()
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(
+                [
+                    cls(year=year, week_number=week_number, count=count, is_complete=count == complete)
+                    for (year, week_number), count in cls.week_counts().items()
+                ],
+                batch_size=500
+            )
+        return cls.objects.count()
+
+
+class WeeklyUsage(models.Model):
+    """Usage of one item in one closed ISO week, snapshotted when END counts are saved
+
+    Rows exist for every item with an END count in the week; `cost` uses the
+    item price at the time the week was closed. Kept in sync by core.signals.
+    """
+    item = models.ForeignKey(
+        InventoryItem,
+        verbose_name=_('Item'),
+        on_delete=models.CASCADE,
+        related_name='weekly_usage'
+    )
+    year = models.IntegerField(_('Year'))
+    week_number = models.IntegerField(_('Week Number'))
+    week_start = models.DateField(_('Week Start'))
+    start = models.IntegerField(_('Start of Week'), null=True, blank=True)
+    end = models.IntegerField(_('End of Week'))
+    used = models.IntegerField(_('Units Used'))
+    unit_cost = models.DecimalField(_('Item Price'), max_digits=10, decimal_places=2)
+    cost = models.DecimalField(_('Cost of Used'), max_digits=14, decimal_places=2)
+    closed_at = models.DateTimeField(_('Closed At'), auto_now=True)
+
+    class Meta:
+        unique_together = ['item', 'year', 'week_number']
+        indexes = [
+            models.Index(fields=['year', 'week_number']),
+            models.Index(fields=['week_start']),
+        ]
+        ordering = ['-year', '-week_number', 'item']
+        verbose_name = _('Weekly Usage')
+        verbose_name_plural = _('Weekly Usage')
+
+    def __str__(self):
+        return f"{self.item_id} - Week {self.week_number}/{self.year}: {self.used}"
+
+    @classmethod
+    def refresh_for_weeks(cls, weeks):
+        """Re-snapshots the given (year, week_number) pairs; weeks without END counts get no rows"""
+        weeks = set(weeks)
+        if not weeks:
+            return
+        with transaction.atomic():
+            existing = cls.objects.filter(WeeklyInventory.weeks_q(weeks))
+            unit_costs = cls.stored_unit_costs(existing)
+            existing.delete()
+            cls.objects.bulk_create(
+                cls.snapshots(WeeklyInventory.objects.filter(WeeklyInventory.weeks_q(weeks)), unit_costs),
+                batch_size=500
+            )
+
+    @staticmethod
+    def stored_unit_costs(usage):
+        """Maps (item_id, year, week_number) to the price already snapshotted for that week"""
+        rows = usage.values_list('item_id', 'year', 'week_number', 'unit_cost').order_by()
+        return {(item_id, year, week_number): unit_cost for item_id, year, week_number, unit_cost in rows}
+
+    @classmethod
+    def snapshots(cls, counts, unit_costs=None):
+        """Unsaved WeeklyUsage rows for every item/week in `counts` that has an END count
 
-        for item in InventoryItem.objects.all():
-            start = inventories.filter(item=item, inventory_type='START').first()
-            end = inventories.filter(item=item, inventory_type='END').first()
+        Weeks found in `unit_costs` keep their stored price; only new rows take
+        the item's current cost.
+        """
+        unit_costs = unit_costs or {}
+        pivot = {}
+        rows = counts.values_list(
+            'item_id', 'year', 'week_number', 'week_start', 'inventory_type', 'quantity', 'item__cost'
+        ).order_by()
+        for item_id, year, week_number, week_start, inventory_type, quantity, unit_cost in rows:
+            count = pivot.setdefault((item_id, year, week_number), {
+                'week_start': week_start,
+                'unit_cost': unit_costs.get((item_id, year, week_number), unit_cost),
+            })
+            count[inventory_type] = quantity
 
-            if start and end:
-                used = start.quantity - end.quantity
-                cost = used * item.cost
-                report[item.name] = {
-                    'start': start.quantity,
-                    'end': end.quantity,
-                    'used': used,
-                    'cost': cost
-                }
+        snapshots = []
+        for (item_id, year, week_number), count in pivot.items():
+            if 'END' not in count:
+                continue
+            used = units_used(count.get('START'), count['END'])
+            snapshots.append(cls(
+                item_id=item_id, year=year, week_number=week_number, week_start=count['week_start'],
+                start=count.get('START'), end=count['END'], used=used,
+                unit_cost=count['unit_cost'], cost=used * count['unit_cost'],
+            ))
+        return snapshots
 
-        return report
+    @classmethod
+    def rebuild(cls):
+        """Recreates every snapshot from WeeklyInventory, keeping the price of weeks already closed"""
+        with transaction.atomic():
+            unit_costs = cls.stored_unit_costs(cls.objects.all())
+            cls.objects.all().delete()
+            cls.objects.bulk_create(cls.snapshots(WeeklyInventory.objects.all(), unit_costs), batch_size=500)
+        return cls.objects.count()
+
+
+class Job(models.Model):
+    """A unit of background work queued in the database and run by `manage.py run_worker`
+
+    `kind` names a handler registered in core.jobs and `payload` holds its
+    keyword arguments. See core.jobs for claiming and retries.
+    """
+    STATUSES = [
+        ('PENDING', _('Pending')),
+        ('RUNNING', _('Running')),
+        ('DONE', _('Done')),
+        ('FAILED', _('Failed')),
+    ]
+
+    kind = models.CharField(_('Kind'), max_length=50)
+    payload = models.JSONField(_('Payload'), default=dict)
+    status = models.CharField(_('Status'), max_length=10, choices=STATUSES, default='PENDING')
+    attempts = models.IntegerField(_('Attempts'), default=0)
+    run_after = models.DateTimeField(_('Run After'), default=timezone.now)
+    error = models.TextField(_('Error'), blank=True)
+    created_at = models.DateTimeField(_('Created At'), auto_now_add=True)
+    started_at = models.DateTimeField(_('Started At'), null=True, blank=True)
+    finished_at = models.DateTimeField(_('Finished At'), null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
+        ordering = ['run_after', 'id']
+        verbose_name = _('Job')
+        verbose_name_plural = _('Jobs')
 
+    def __str__(self):
+        return f"{self.kind} {self.payload}: {self.status}"
 
 # core/models.py
 def check_database():
@@ -0,0 +1,132 @@
+"""Keyset (cursor) pagination for the JSON listing endpoints
+
+A page is read as "the first `limit` rows after the last row of the
+previous page" in a fixed ordering that ends with the primary key, so
+fetching page 1000 costs the same as page 1 and rows inserted meanwhile
+never shift or repeat entries. Cursors are opaque URL-safe strings holding
+the ordering values of the last row.
+
+NULLs sort where the database puts them by default, the same as
+Meta.ordering and the indexes. A page query is bounded on the leading
+column (`deadline >= ?`) so it is an index range read; when that column is
+nullable, its NULLs are a segment of their own that a page continues into
+with a second query.
+"""
+import base64
+import json
+from dataclasses import dataclass
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import F, Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Key:
+    """One column of a keyset ordering, with NULLs where the database sorts them"""
+    field: str
+    descending: bool = False
+
+    def order_by(self):
+        expression = F(self.field)
+        return expression.desc() if self.descending else expression.asc()
+
+    def nulls_last(self, nulls_order_largest):
+        """Whether NULLs come after the values, given the backend's features.nulls_order_largest"""
+        return nulls_order_largest != self.descending
+
+    def after(self, value, nullable, nulls_last):
+        """Rows strictly after `value` in this column"""
+        if value is None:
+            return Q(**{f'{self.field}__isnull': False}) if nullable and not nulls_last else None
+        query = Q(**{f"{self.field}__{'lt' if self.descending else 'gt'}": value})
+        if nullable and nulls_last:
+            query |= Q(**{f'{self.field}__isnull': True})
+        return query
+
+    def bound(self, value):
+        """Rows at or after `value` in this column, within its NULL or non-NULL segment"""
+        if value is None:
+            return Q(**{f'{self.field}__isnull': True})
+        return Q(**{f"{self.field}__{'lte' if self.descending else 'gte'}": value})
+
+    def equal(self, value):
+        if value is None:
+            return Q(**{f'{self.field}__isnull': True})
+        return Q(**{self.field: value})
+
+
+def encode_cursor(values):
+    data = json.dumps([None if value is None else str(value) for value in values])
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(model, keys, cursor):
+    """Ordering values of `keys` stored in `cursor`, converted to Python by the model fields"""
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if not isinstance(raw, list) or len(raw) != len(keys):
+            raise InvalidCursor(cursor)
+        return [
+            None if value is None else model._meta.get_field(key.field).to_python(value)
+            for key, value in zip(keys, raw)
+        ]
+    except (ValueError, TypeError, ValidationError) as e:
+        raise InvalidCursor(cursor) from e
+
+
+def keyset_q(model, keys, values, nulls_order_largest=False):
+    """Rows after `values` in the `keys` ordering, within the leading value's NULL or non-NULL segment
+
+    Rows are bounded on the leading column, then equal on a prefix of keys
+    and strictly after on the next one.
+    """
+    query = Q(pk__in=[])
+    prefix = Q()
+    for index, (key, value) in enumerate(zip(keys, values)):
+        # The leading column never crosses into the other segment here, see paginate()
+        nullable = index > 0 and model._meta.get_field(key.field).null
+        after = key.after(value, nullable, key.nulls_last(nulls_order_largest))
+        if after is not None:
+            query |= prefix & after
+        prefix &= key.equal(value)
+    return keys[0].bound(values[0]) & query
+
+
+def paginate(queryset, keys, cursor=None, limit=20):
+    """(rows, next cursor or None) for the page after `cursor`
+
+    `keys` must end with a unique column so the ordering is total. Raises
+    InvalidCursor for cursors that cannot be decoded.
+    """
+    model = queryset.model
+    # One extra row tells whether there is a next page
+    ordering = [key.order_by() for key in keys]
+    if not cursor:
+        rows = list(queryset.order_by(*ordering)[:limit + 1])
+    else:
+        values = decode_cursor(model, keys, cursor)
+        first = keys[0]
+        nulls_order_largest = connections[queryset.db].features.nulls_order_largest
+        nulls_last = first.nulls_last(nulls_order_largest)
+        rows = list(
+            queryset.filter(keyset_q(model, keys, values, nulls_order_largest)).order_by(*ordering)[:limit + 1]
+        )
+        # A page that runs off the end of the cursor's segment continues at the start of the next one
+        next_segment = (values[0] is None) != nulls_last
+        if len(rows) <= limit and next_segment and model._meta.get_field(first.field).null:
+            rows += queryset.filter(**{f'{first.field}__isnull': values[0] is not None}).order_by(
+                *ordering
+            )[:limit + 1 - len(rows)]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([
+            last[key.field] if isinstance(last, dict) else getattr(last, key.field) for key in keys
+        ])
+    return rows, next_cursor
@@ -0,0 +1,118 @@
+"""Write services shared by the entry views, the bulk API and management commands"""
+from django.db import transaction
+from django.utils.translation import gettext as _
+
+from .forms import DailyEntryRowForm, WeeklyInventoryRowForm
+from .models import DailyEntry, InventoryItem, WeeklyInventory, iso_week_start
+from .signals import daily_entries_changed, weekly_inventory_changed
+
+
+def upsert_daily_entries(rows):
+    """Validates every row up front, then writes them all in one transaction
+
+    `rows` is an iterable of dicts with date, entry_type and value. Returns
+    one result dict per row, in order. If any row is invalid nothing is
+    written and the invalid rows carry their form errors.
+    """
+    results = []
+    entries = {}
+    for index, row in enumerate(rows):
+        form = DailyEntryRowForm(row)
+        if not form.is_valid():
+            results.append({'index': index, 'status': 'error', 'errors': form.errors.get_json_data()})
+            continue
+
+        key = (form.cleaned_data['date'], form.cleaned_data['entry_type'])
+        if key in entries:
+            results.append({'index': index, 'status': 'error', 'errors': {
+                '__all__': [{'message': _('Duplicate date and entry type in request'), 'code': 'duplicate'}]
+            }})
+            continue
+
+        entries[key] = DailyEntry(date=key[0], entry_type=key[1], value=form.cleaned_data['value'])
+        results.append({'index': index, 'status': 'valid', 'key': key})
+
+    if not entries or any(result['status'] == 'error' for result in results):
+        for result in results:
+            result.pop('key', None)
+        return results
+
+    dates = {date for date, _entry_type in entries}
+    with transaction.atomic():
+        existing = set(
+            DailyEntry.objects
+            .filter(date__in=dates, entry_type__in={entry_type for _date, entry_type in entries})
+            .values_list('date', 'entry_type')
+        )
+        DailyEntry.objects.bulk_create(
+            entries.values(),
+            update_conflicts=True,
+            unique_fields=['date', 'entry_type'],
+            update_fields=['value', 'updated_at'],
+        )
+        daily_entries_changed(dates, {entry_type for _date, entry_type in entries})
+
+    for result in results:
+        result['status'] = 'updated' if result.pop('key') in existing else 'created'
+    return results
+
+
+def upsert_weekly_inventory(rows):
+    """Validates every count up front, then writes them all in one transaction
+
+    `rows` is an iterable of dicts with item_id, week_number, year,
+    inventory_type and quantity. Results follow upsert_daily_entries().
+    """
+    results = []
+    counts = {}
+    for index, row in enumerate(rows):
+        form = WeeklyInventoryRowForm(row)
+        if not form.is_valid():
+            results.append({'index': index, 'status': 'error', 'errors': form.errors.get_json_data()})
+            continue
+
+        data = form.cleaned_data
+        key = (data['item_id'], data['week_number'], data['year'], data['inventory_type'])
+        if key in counts:
+            results.append({'index': index, 'status': 'error', 'errors': {
+                '__all__': [{'message': _('Duplicate count in request'), 'code': 'duplicate'}]
+            }})
+            continue
+
+        counts[key] = WeeklyInventory(
+            item_id=key[0], week_number=key[1], year=key[2], week_start=iso_week_start(key[2], key[1]),
+            inventory_type=key[3], quantity=data['quantity']
+        )
+        results.append({'index': index, 'status': 'valid', 'key': key})
+
+    item_ids = {key[0] for key in counts}
+    known_items = set(InventoryItem.objects.filter(id__in=item_ids).values_list('id', flat=True))
+    for result in results:
+        if result['status'] == 'valid' and result['key'][0] not in known_items:
+            result['status'] = 'error'
+            result['errors'] = {'item_id': [{'message': _('Unknown inventory item'), 'code': 'invalid_choice'}]}
+
+    if not counts or any(result['status'] == 'error' for result in results):
+        for result in results:
+            result.pop('key', None)
+        return results
+
+    weeks = {(key[2], key[1]) for key in counts}
+    with transaction.atomic():
+        existing = set(
+            WeeklyInventory.objects
+            .filter(item_id__in=item_ids, year__in={year for year, _week in weeks},
+                    week_number__in={week for _year, week in weeks})
+            .values_list('item_id', 'week_number', 'year', 'inventory_type')
+        )
+        WeeklyInventory.objects.bulk_create(
+            counts.values(),
+            update_conflicts=True,
+            unique_fields=['item', 'week_number', 'year', 'inventory_type'],
+            update_fields=['quantity', 'updated_at'],
+        )
+        weekly_inventory_changed(weeks)
+
+    for result in results:
+        result['status'] = 'updated' if result.pop('key') in existing else 'created'
+    return results
@@ -0,0 +1,89 @@
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import caching, ledger
+from .models import (
+    Account, CumulativeTotal, DailyEntry, InventoryItem, WeekCompletion, WeeklyInventory, WeeklyUsage
+)
+
+
+_deferred = threading.local()
+
+
+@contextmanager
+def deferred_rollups():
+    """Skips the running total upkeep of DailyEntry writes in the block, then rebuilds them once
+
+    For bulk loads, where refreshing the running totals after every batch
+    would rewrite them over and over.
+    """
+    _deferred.depth = getattr(_deferred, 'depth', 0) + 1
+    try:
+        yield
+    finally:
+        _deferred.depth -= 1
+        if not _deferred.depth:
+            CumulativeTotal.rebuild()
+            transaction.on_commit(caching.bump_data_version)
+
+
+def daily_entries_changed(dates, entry_types=None):
+    """Brings every rollup derived from DailyEntry up to date for the given dates
+
+    `entry_types` lists the types written, None when unknown.
+    """
+    dates = set(dates)
+    with transaction.atomic():
+        if not getattr(_deferred, 'depth', 0):
+            CumulativeTotal.refresh_for_dates(dates)
+        transaction.on_commit(caching.bump_data_version)
+        if entry_types is None or caching.INVENTORY_ENTRY_TYPES & set(entry_types):
+            transaction.on_commit(lambda: caching.bump_inventory_dates(dates))
+
+
+def weekly_inventory_changed(weeks):
+    """Brings everything derived from WeeklyInventory up to date for (year, week) pairs"""
+    weeks = set(weeks)
+    with transaction.atomic():
+        WeekCompletion.refresh_for_weeks(weeks)
+        WeeklyUsage.refresh_for_weeks(weeks)
+        transaction.on_commit(caching.bump_data_version)
+        transaction.on_commit(lambda: caching.bump_inventory_weeks(weeks))
+
+
+@receiver(post_save, sender=DailyEntry)
+@receiver(post_delete, sender=DailyEntry)
+def daily_entry_changed(sender, instance, **kwargs):
+    dates = {instance.date}
+    loaded_date = getattr(instance, '_loaded_date', None)
+    if loaded_date:
+        dates.add(loaded_date)
+    daily_entries_changed(dates, [instance.entry_type])
+
+
+@receiver(post_save, sender=WeeklyInventory)
+@receiver(post_delete, sender=WeeklyInventory)
+def weekly_count_changed(sender, instance, **kwargs):
+    weekly_inventory_changed([(instance.year, instance.week_number)])
+
+
+@receiver(post_save, sender=InventoryItem)
+@receiver(post_delete, sender=InventoryItem)
+def inventory_changed(sender, instance, **kwargs):
+    # Adding or removing an item changes how many counts a complete week needs
+    if kwargs.get('created', True):
+        WeekCompletion.refresh_completeness()
+    transaction.on_commit(caching.bump_data_version)
+    transaction.on_commit(caching.bump_inventory_items)
+
+
+@receiver(post_save, sender=Account)
+def account_created(sender, instance, created, **kwargs):
+    # A non-zero starting balance is the first ledger entry (migration 0014 seeds the same
+    # way); later changes go through core.ledger
+    if created and instance.balance:
+        ledger.open_account(instance)
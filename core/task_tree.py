@@ -0,0 +1,99 @@
+"""Task forest loaded with one query and assembled in memory"""
+from dataclasses import dataclass, field
+
+from django.utils import timezone
+
+from .models import Task
+
+
+@dataclass
+class TaskNode:
+    """A task with its subtasks, at any depth"""
+    task: Task
+    depth: int = 0
+    overdue: bool = False
+    children: list = field(default_factory=list)
+
+    @property
+    def subtask_count(self):
+        return len(self.children)
+
+    @property
+    def descendant_count(self):
+        return self.task.total_descendants
+
+    @property
+    def completed_descendants(self):
+        return self.task.completed_descendants
+
+    def as_dict(self):
+        """This task's fields; the tree shape is carried by `parent_id` and `depth`, see flatten()"""
+        return {
+            'id': self.task.id,
+            'parent_id': self.task.parent_task_id,
+            'name': self.task.name,
+            'description': self.task.description,
+            'deadline': self.task.deadline.strftime('%Y-%m-%d') if self.task.deadline else None,
+            'completed': self.task.completed,
+            'overdue': self.overdue,
+            'depth': self.depth,
+            'subtask_count': self.subtask_count,
+            'descendant_count': self.descendant_count,
+            'completed_descendants': self.completed_descendants,
+            'progress': self.task.progress_percentage(),
+            'version': self.task.version,
+        }
+
+
+def build_forest(tasks, today=None):
+    """Root TaskNodes for `tasks`, with children in the order given
+
+    Tasks whose parent is not among `tasks` become roots. Deeply nested
+    trees are walked iteratively, so depth is not limited by recursion.
+    Subtree progress is read from the task's counter columns.
+    """
+    today = today or timezone.now().date()
+    nodes = {}
+    for task in tasks:
+        nodes[task.id] = TaskNode(
+            task=task,
+            overdue=task.is_overdue(today),
+        )
+
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get(node.task.parent_task_id)
+        if parent is None:
+            roots.append(node)
+        else:
+            parent.children.append(node)
+
+    stack = list(roots)
+    while stack:
+        node = stack.pop()
+        for child in node.children:
+            child.depth = node.depth + 1
+            stack.append(child)
+    return roots
+
+
+def flatten(roots):
+    """Every node under `roots` in display order, each followed by its subtree
+
+    Pages and the JSON endpoint render this flat list indented by depth, so
+    neither template nesting nor JSON encoding recurses per level.
+    """
+    nodes = []
+    stack = list(reversed(roots))
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        stack.extend(reversed(node.children))
+    return nodes
+
+
+def load_forest(queryset=None, today=None):
+    """Every task as a forest of TaskNodes, loaded in a single query"""
+    if queryset is None:
+        queryset = Task.objects.all()
+    return build_forest(list(queryset), today)
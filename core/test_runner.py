@@ -0,0 +1,26 @@
+"""Test runner that gives the run a private in-memory cache"""
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """DiscoverRunner whose runs never read or clear the server's cache entries
+
+    Tests run in one process, where LocMemCache's add() and incr() are atomic.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_settings = override_settings(CACHES={
+            alias: {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': f'test-{alias}',
+            }
+            for alias in settings.CACHES
+        })
+        self.cache_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_settings.disable()
+        super().teardown_test_environment(**kwargs)
@@ -1,9 +1,41 @@
-from django.test import TestCase, Client
-from django.urls import reverse
+import datetime
+import importlib
+import json
+import os
+import tempfile
+import threading
+import time
+from io import StringIO
+from asgiref.sync import async_to_sync
+from django.apps import apps as django_apps
+from django.db import connection
+from django.db.models import Sum
+from django.test import AsyncClient, TestCase, TransactionTestCase, Client, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.template.loader import render_to_string
+from django.urls import resolve, reverse
 from django.utils import timezone
 from decimal import Decimal
-from .models import DailyEntry, Task, Account, InventoryItem, WeeklyInventory
-from .forms import ShoeShopForm, BarberShopForm, MeatballStandForm
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.cache import cache
+from . import caching, forecasting, inventory_reports, jobs, ledger, metrics, pagination, services, task_tree, views
+from .models import (
+    AccountSnapshot, AccountTransaction, ConflictError, CumulativeTotal, DailyEntry, Task, Account, InventoryItem, Job,
+    WeekCompletion, WeeklyInventory, WeeklyUsage, iso_week_start
+)
+from .forms import ShoeShopForm, BarberShopForm, MeatballStandForm, TaskForm
+
+
+class SetInventoryMixin:
+    """Posts a count sheet of (item, quantity) pairs to set_inventory, running its on-commit work"""
+
+    def set_inventory(self, date, inventory_type, quantities, **kwargs):
+        data = {'date': date, 'inventory_type': inventory_type}
+        data.update({f'quantity_{item.id}': quantity for item, quantity in quantities})
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('set_inventory'), data, **kwargs)
+
 
 class DailyEntryTests(TestCase):
     def setUp(self):
@@ -34,6 +66,915 @@ class DailyEntryTests(TestCase):
             Decimal('5')
         )
 
+class ProfitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.today = timezone.now().date()
+
+    def home_profits(self):
+        return self.client.get(reverse('home'), {'start_date': self.today.strftime('%Y-%m-%d')}).context['profits']
+
+    def test_profits_follow_entry_writes(self):
+        self.client.post(reverse('save_barber_entry'), {
+            'date': self.today,
+            'adult_haircuts': '5',
+            'child_haircuts': '3',
+            'free_haircuts': '1'
+        })
+        self.client.post(reverse('save_shoe_entry'), {'date': self.today, 'revenue': '500'})
+        profits = self.home_profits()
+        self.assertEqual(profits['barber'], Decimal('190'))
+        self.assertEqual(profits['shoe'], Decimal('390'))
+        self.assertEqual(profits['meatball'], Decimal('-200'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DailyEntry.objects.filter(date=self.today).delete()
+        self.assertEqual(self.home_profits()['shoe'], Decimal('-110'))
+
+    def test_home_charges_fixed_costs_for_days_without_entries(self):
+        yesterday = self.today - timezone.timedelta(days=1)
+        DailyEntry.objects.create(date=self.today, entry_type='SHOE_REVENUE', value=Decimal('1000'))
+        response = self.client.get(reverse('home'), {
+            'start_date': yesterday.strftime('%Y-%m-%d'),
+            'end_date': self.today.strftime('%Y-%m-%d'),
+        })
+        profits = response.context['profits']
+        self.assertEqual(profits['shoe'], Decimal('780'))
+        self.assertEqual(profits['barber'], Decimal('-520'))
+        self.assertEqual(profits['total'], Decimal('780') - 520 - 400)
+
+
+class CumulativeTotalTests(TestCase):
+    def setUp(self):
+        self.day = timezone.now().date() - timezone.timedelta(days=10)
+
+    def add(self, offset, entry_type, value):
+        return DailyEntry.objects.create(
+            date=self.day + timezone.timedelta(days=offset),
+            entry_type=entry_type,
+            value=Decimal(value)
+        )
+
+    def test_range_totals_follow_back_dated_edits(self):
+        self.add(0, 'SHOE_REVENUE', '100')
+        self.add(5, 'SHOE_REVENUE', '300')
+        entry = self.add(2, 'SHOE_REVENUE', '50')
+        entry.value = Decimal('70')
+        entry.save()
+
+        totals = CumulativeTotal.range_totals(self.day + timezone.timedelta(days=1), self.day + timezone.timedelta(days=9))
+        self.assertEqual(totals['SHOE_REVENUE'], Decimal('370'))
+        self.assertEqual(CumulativeTotal.totals_at(self.day + timezone.timedelta(days=5))['SHOE_REVENUE'], Decimal('470'))
+
+        entry.delete()
+        self.assertEqual(CumulativeTotal.totals_at(self.day + timezone.timedelta(days=9))['SHOE_REVENUE'], Decimal('400'))
+        self.assertEqual(CumulativeTotal.find_inconsistencies(), [])
+
+    def test_consistency_checker_detects_and_repairs(self):
+        self.add(0, 'MEATBALL_SALES', '200')
+        self.add(1, 'MEATBALL_SALAD', '20')
+        CumulativeTotal.objects.filter(date=self.day).update(meatball_sales=Decimal('1'))
+
+        with self.assertRaises(CommandError):
+            call_command('check_cumulative_totals', stdout=StringIO())
+        call_command('check_cumulative_totals', '--repair', stdout=StringIO())
+        self.assertEqual(CumulativeTotal.find_inconsistencies(), [])
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.monday = datetime.date(2024, 3, 4)
+        self.sunday = self.monday + datetime.timedelta(days=6)
+        for offset, (sales, salad) in enumerate([('100', '10'), ('300', '30')]):
+            day = self.monday + datetime.timedelta(days=offset)
+            DailyEntry.objects.create(date=day, entry_type='MEATBALL_SALES', value=Decimal(sales))
+            DailyEntry.objects.create(date=day, entry_type='MEATBALL_SALAD', value=Decimal(salad))
+        DailyEntry.objects.create(date=self.monday, entry_type='BARBER_ADULT', value=Decimal('4'))
+
+        for index in range(5):
+            item = InventoryItem.objects.create(name=f"Item {index}", cost=Decimal('2.00'))
+            for inventory_type, quantity in [('START', 10), ('END', 4)]:
+                WeeklyInventory.objects.create(
+                    item=item, week_number=self.monday.isocalendar()[1], year=2024,
+                    inventory_type=inventory_type, quantity=quantity
+                )
+
+    def test_collect_groups_every_entry_type(self):
+        range_metrics = metrics.collect(self.monday, self.sunday)
+        self.assertEqual(range_metrics['MEATBALL_SALES'], metrics.EntryStats(Decimal('400'), Decimal('200'), 2))
+        self.assertEqual(range_metrics['SHOE_REVENUE'].count, 0)
+
+        report = range_metrics.report()
+        self.assertEqual(report['total_revenue'], Decimal('404'))
+        self.assertEqual(report['meatball_stand']['net_profit'], Decimal('360'))
+        self.assertEqual(
+            metrics.collect_totals(self.monday, self.sunday).profits(),
+            range_metrics.profits()
+        )
+
+    def test_views_run_a_constant_number_of_queries(self):
+        params = {'start_date': self.monday.strftime('%Y-%m-%d'), 'end_date': self.sunday.strftime('%Y-%m-%d')}
+        with self.assertNumQueries(2):
+            self.client.get(reverse('home'), params)
+        with self.assertNumQueries(1):
+            self.client.get(reverse('reports'), params)
+        with self.assertNumQueries(3):
+            self.client.get(reverse('inventory_report'), params)
+        # Both views share the report cache
+        cache.clear()
+        with self.assertNumQueries(3):
+            self.client.get(reverse('inventory_report_ajax'), params)
+
+
+class ProfitSeriesTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        DailyEntry.objects.create(date=datetime.date(2024, 1, 3), entry_type='SHOE_REVENUE', value=Decimal('500'))
+        DailyEntry.objects.create(date=datetime.date(2024, 3, 15), entry_type='SHOE_REVENUE', value=Decimal('200'))
+
+    def test_monthly_buckets_are_zero_filled(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('profit_series'), {
+                'start_date': '2024-01-01', 'end_date': '2024-12-31', 'bucket': 'month'
+            })
+        data = response.json()
+        self.assertEqual(len(data['labels']), 12)
+        self.assertEqual(data['labels'][2], '2024-03-01')
+        self.assertEqual(data['series']['shoe']['revenue'][:4], [500.0, 0.0, 200.0, 0.0])
+        self.assertEqual(data['series']['shoe']['profit'][1], -110.0 * 29)
+
+    def test_weekly_buckets_start_on_monday(self):
+        data = metrics.series(datetime.date(2024, 1, 3), datetime.date(2024, 1, 14), 'week')
+        self.assertEqual(data['labels'], [datetime.date(2024, 1, 1), datetime.date(2024, 1, 8)])
+        # Only the five days of the first week inside the range are charged
+        self.assertEqual(data['series']['shoe']['profit'][0], Decimal('500') - 110 * 5)
+
+    def test_unknown_bucket_is_rejected(self):
+        response = self.client.get(reverse('profit_series'), {
+            'start_date': '2024-01-01', 'end_date': '2024-01-31', 'bucket': 'year'
+        })
+        self.assertEqual(response.status_code, 400)
+
+
+class ReportCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.params = {'start_date': '2024-05-01', 'end_date': '2024-05-31'}
+
+    def test_repeated_reads_are_served_from_cache(self):
+        self.client.get(reverse('home'), self.params)
+        with self.assertNumQueries(0):
+            self.client.get(reverse('home'), self.params)
+        self.client.get(reverse('reports'), self.params)
+        self.client.get(reverse('reports'), self.params)
+
+        stats = self.client.get(reverse('cache_stats')).json()['stats']
+        self.assertEqual(stats['home'], {'hits': 1, 'misses': 1})
+        self.assertEqual(stats['reports'], {'hits': 1, 'misses': 1})
+
+    def test_writes_invalidate_cached_totals(self):
+        before = self.client.get(reverse('home'), self.params).context['profits']
+        with self.captureOnCommitCallbacks(execute=True):
+            DailyEntry.objects.create(date=datetime.date(2024, 5, 2), entry_type='SHOE_REVENUE', value=Decimal('90'))
+        after = self.client.get(reverse('home'), self.params).context['profits']
+        self.assertEqual(after['shoe'] - before['shoe'], Decimal('90'))
+
+        version = caching.data_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            InventoryItem.objects.create(name="Bun", cost=Decimal('3.00'))
+        self.assertNotEqual(caching.data_version(), version)
+
+
+class WeekCompletionTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.items = [InventoryItem.objects.create(name=name, cost=Decimal('1.00')) for name in ("Meat", "Bread")]
+
+    def count_week(self, year, week, items=None):
+        for item in items or self.items:
+            for inventory_type in ('START', 'END'):
+                WeeklyInventory.objects.create(
+                    item=item, year=year, week_number=week, inventory_type=inventory_type, quantity=5
+                )
+
+    def completed(self):
+        return [(week['year'], week['week_number']) for week in WeeklyInventory.get_completed_weeks()]
+
+    def test_index_tracks_counts_and_items(self):
+        self.count_week(2024, 10)
+        self.count_week(2024, 11, self.items[:1])
+        self.assertEqual(self.completed(), [(2024, 10)])
+        self.assertEqual(
+            [(row['year'], row['week_number']) for row in WeekCompletion.completed_weeks_query()],
+            self.completed()
+        )
+
+        extra = InventoryItem.objects.create(name="Sauce", cost=Decimal('1.00'))
+        self.assertEqual(self.completed(), [])
+        extra.delete()
+        self.assertEqual(self.completed(), [(2024, 10)])
+
+        self.items[1].delete()
+        self.assertEqual(self.completed(), [(2024, 11), (2024, 10)])
+        WeeklyInventory.objects.filter(week_number=11).delete()
+        self.assertFalse(WeekCompletion.objects.filter(week_number=11).exists())
+
+    def test_bulk_upsert_updates_index(self):
+        services.upsert_weekly_inventory([
+            {'item_id': item.id, 'year': 2024, 'week_number': 3, 'inventory_type': inventory_type, 'quantity': 1}
+            for item in self.items for inventory_type in ('START', 'END')
+        ])
+        self.assertEqual(self.completed(), [(2024, 3)])
+        self.assertEqual(WeekCompletion.objects.get().count, 4)
+
+    def test_inventory_page_query_count_does_not_grow_with_weeks(self):
+        self.count_week(2024, 1)
+        with self.assertNumQueries(4):
+            self.client.get(reverse('inventory'))
+        for week in range(2, 12):
+            self.count_week(2024, week)
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('inventory'))
+        self.assertEqual(len(response.context['weekly_counts']), 11)
+
+    def test_rebuild(self):
+        self.count_week(2024, 5)
+        WeekCompletion.objects.all().delete()
+        self.assertEqual(WeekCompletion.rebuild(), 1)
+        self.assertEqual(self.completed(), [(2024, 5)])
+
+
+class WeeklyUsageReportTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        DailyEntry.objects.create(date=datetime.date(2024, 3, 6), entry_type='MEATBALL_SALES', value=Decimal('500'))
+        DailyEntry.objects.create(date=datetime.date(2024, 3, 6), entry_type='MEATBALL_SALAD', value=Decimal('40'))
+        for index in range(30):
+            item = InventoryItem.objects.create(name=f"Item {index:02d}", cost=Decimal('2.50'))
+            WeeklyInventory.objects.create(item=item, year=2024, week_number=10, inventory_type='START', quantity=10)
+            if index:
+                WeeklyInventory.objects.create(item=item, year=2024, week_number=10, inventory_type='END', quantity=index % 10)
+            # Counts from other weeks must not leak into the pivot
+            WeeklyInventory.objects.create(item=item, year=2024, week_number=11, inventory_type='START', quantity=99)
+
+    def test_week_usage_pivots_every_item_in_one_query(self):
+        with self.assertNumQueries(1):
+            usage = inventory_reports.week_usage(2024, 10)
+        self.assertEqual(len(usage), 30)
+        self.assertEqual(usage[0]['end'], None)
+        self.assertEqual(usage[0]['units_used'], None)
+        self.assertEqual(usage[3], {
+            'item_id': usage[3]['item_id'], 'name': 'Item 03', 'price': Decimal('2.50'),
+            'start': 10, 'end': 3, 'units_used': 7, 'cost_of_used': Decimal('17.50'),
+        })
+
+        with self.assertNumQueries(1):
+            report = WeeklyInventory.generate_report(2024, 10)
+        self.assertEqual(len(report), 29)
+        self.assertEqual(report['Item 03'], {'start': 10, 'end': 3, 'used': 7, 'cost': Decimal('17.50')})
+
+    def test_live_report_and_snapshot_share_the_usage_rule(self):
+        item = InventoryItem.objects.create(name="Item 99", cost=Decimal('2.00'))
+        with self.captureOnCommitCallbacks(execute=True):
+            WeeklyInventory.objects.create(item=item, year=2024, week_number=10, inventory_type='END', quantity=6)
+        # No START count: the whole END stock counts as used, live and snapshotted
+        live = next(row for row in inventory_reports.week_usage(2024, 10) if row['name'] == "Item 99")
+        self.assertEqual((live['units_used'], live['cost_of_used']), (6, Decimal('12.00')))
+        self.assertEqual(WeeklyInventory.generate_report(2024, 10)['Item 99']['used'], 6)
+        snapshot = WeeklyUsage.objects.get(item=item, year=2024, week_number=10)
+        self.assertEqual((snapshot.used, snapshot.cost), (6, Decimal('12.00')))
+
+    def test_view_inventory_report_query_count_is_constant(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('view_inventory_report', args=[2024, 10]))
+        report_data = response.context['report_data']
+        self.assertEqual(len(report_data['items']), 29)
+        self.assertEqual(report_data['totals']['total_revenue'], Decimal('500'))
+        self.assertEqual(
+            report_data['totals']['total_profit'],
+            Decimal('460') - sum(item['cost_of_used'] for item in report_data['items'])
+        )
+
+        response = self.client.get(reverse('view_inventory_report', args=[2024, 11]))
+        self.assertIsNone(response.context['report_data'])
+        self.assertTrue(response.context['report_error'])
+
+
+class RangeInventoryReportTests(SetInventoryMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.meat = InventoryItem.objects.create(name="Meat", cost=Decimal('10.00'))
+        self.bread = InventoryItem.objects.create(name="Bread", cost=Decimal('1.00'))
+
+    def test_set_inventory_stores_iso_year(self):
+        self.set_inventory('2024-12-30', 'START', [(self.meat, 5)])
+        self.set_inventory('2021-01-03', 'END', [(self.meat, 1)])
+        self.assertEqual(
+            set(WeeklyInventory.objects.values_list('year', 'week_number', 'inventory_type')),
+            {(2025, 1, 'START'), (2020, 53, 'END')}
+        )
+
+    def test_range_spans_53_week_year_boundary(self):
+        self.assertEqual(
+            inventory_reports.iso_weeks(datetime.date(2020, 12, 21), datetime.date(2021, 1, 10)),
+            [(2020, 52), (2020, 53), (2021, 1)]
+        )
+        for monday, start, end in [('2020-12-21', 10, 7), ('2020-12-28', 7, 2), ('2021-01-04', 20, 15)]:
+            sunday = (datetime.date.fromisoformat(monday) + datetime.timedelta(days=6)).isoformat()
+            self.set_inventory(monday, 'START', [(self.meat, start), (self.bread, start)])
+            self.set_inventory(sunday, 'END', [(self.meat, end), (self.bread, end)])
+        # Outside the range
+        self.set_inventory('2021-01-17', 'END', [(self.meat, 0)])
+
+        with self.assertNumQueries(3):
+            report_data, report_error = inventory_reports.range_report(
+                datetime.date(2020, 12, 21), datetime.date(2021, 1, 10)
+            )
+        self.assertIsNone(report_error)
+        self.assertEqual([week['units_used'] for week in report_data['weeks']], [6, 10, 10])
+        meat = next(item for item in report_data['items'] if item['name'] == "Meat")
+        self.assertEqual(meat['units_used'], 13)
+        self.assertEqual(meat['cost_of_used'], Decimal('130.00'))
+        self.assertEqual(report_data['totals']['total_cost'], Decimal('143.00'))
+
+    def test_year_long_report_query_count_is_constant(self):
+        for week in range(1, 53):
+            for item in (self.meat, self.bread):
+                WeeklyInventory.objects.create(item=item, year=2023, week_number=week, inventory_type='START', quantity=9)
+                WeeklyInventory.objects.create(item=item, year=2023, week_number=week, inventory_type='END', quantity=4)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('inventory_report_ajax'), {
+                'start_date': '2023-01-02', 'end_date': '2023-12-31'
+            })
+        report_data = response.context['report_data']
+        self.assertEqual(len(report_data['weeks']), 52)
+        self.assertEqual(report_data['totals']['total_cost'], 52 * 5 * Decimal('11.00'))
+
+    def test_missing_end_counts_is_an_error(self):
+        self.set_inventory('2024-03-04', 'START', [(self.meat, 5)])
+        report_data, report_error = inventory_reports.range_report(datetime.date(2024, 3, 4), datetime.date(2024, 3, 10))
+        self.assertIsNone(report_data)
+        self.assertTrue(report_error)
+
+    def test_reversed_range_is_an_error(self):
+        self.set_inventory('2024-03-10', 'END', [(self.meat, 5)])
+        with self.assertNumQueries(0):
+            report_data, report_error = inventory_reports.range_report(
+                datetime.date(2024, 3, 10), datetime.date(2024, 3, 4)
+            )
+        self.assertIsNone(report_data)
+        self.assertEqual(report_error, 'End date must be after start date')
+
+        response = self.client.get(reverse('inventory_report_ajax'), {
+            'start_date': '2024-03-17', 'end_date': '2024-03-04'
+        })
+        self.assertIsNone(response.context['report_data'])
+        self.assertEqual(response.context['report_error'], 'End date must be after start date')
+
+
+class InventoryReportCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.params = {'start_date': '2024-03-04', 'end_date': '2024-03-17'}
+        self.meat = InventoryItem.objects.create(name="Meat", cost=Decimal('10.00'))
+        WeeklyInventory.objects.create(item=self.meat, year=2024, week_number=10, inventory_type='START', quantity=9)
+        WeeklyInventory.objects.create(item=self.meat, year=2024, week_number=10, inventory_type='END', quantity=4)
+
+    def report(self):
+        return self.client.get(reverse('inventory_report_ajax'), self.params).context['report_data']
+
+    def assertCached(self):
+        with self.assertNumQueries(0):
+            self.report()
+
+    def test_repeated_reports_are_served_from_cache(self):
+        self.report()
+        self.assertCached()
+        self.assertEqual(caching.cache_stats()['inventory'], {'hits': 1, 'misses': 1})
+
+    def test_only_changes_in_range_invalidate(self):
+        self.report()
+        with self.captureOnCommitCallbacks(execute=True):
+            WeeklyInventory.objects.create(item=self.meat, year=2024, week_number=12, inventory_type='END', quantity=1)
+            DailyEntry.objects.create(date=datetime.date(2024, 3, 5), entry_type='SHOE_REVENUE', value=Decimal('50'))
+        self.assertCached()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DailyEntry.objects.create(date=datetime.date(2024, 3, 12), entry_type='MEATBALL_SALES', value=Decimal('80'))
+        self.assertEqual(self.report()['totals']['total_revenue'], Decimal('80'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            WeeklyInventory.objects.filter(week_number=10, inventory_type='END').update(quantity=6)
+            WeeklyInventory.objects.get(week_number=10, inventory_type='END').save()
+        self.assertEqual(self.report()['totals']['total_cost'], Decimal('30.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            InventoryItem.objects.filter(pk=self.meat.pk).update(name="Beef")
+            InventoryItem.objects.get(pk=self.meat.pk).save()
+        self.assertEqual(self.report()['items'][0]['name'], "Beef")
+
+    def test_concurrent_misses_compute_once(self):
+        calls = []
+        started = threading.Event()
+
+        def compute():
+            calls.append(1)
+            started.set()
+            time.sleep(0.1)
+            return 'report'
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(caching.single_flight('flight-key', compute, 60)))
+            for _index in range(5)
+        ]
+        threads[0].start()
+        started.wait(1)
+        for thread in threads[1:]:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(sorted(results), [('report', False)] * 4 + [('report', True)])
+        self.assertEqual(caching.single_flight('flight-key', compute, 60), ('report', False))
+
+
+class WeeklyUsageSnapshotTests(SetInventoryMixin, TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.meat = InventoryItem.objects.create(name="Meat", cost=Decimal('10.00'))
+        self.bread = InventoryItem.objects.create(name="Bread", cost=Decimal('1.00'))
+
+    def test_end_counts_close_the_week(self):
+        self.set_inventory('2024-03-04', 'START', [(self.meat, 10), (self.bread, 8)])
+        self.assertFalse(WeeklyUsage.objects.exists())
+
+        self.set_inventory('2024-03-10', 'END', [(self.meat, 4), (self.bread, 8)])
+        usage = WeeklyUsage.objects.get(item=self.meat, year=2024, week_number=10)
+        self.assertEqual((usage.start, usage.end, usage.used, usage.cost), (10, 4, 6, Decimal('60.00')))
+
+        # Closed weeks keep the price they were closed at
+        self.meat.cost = Decimal('20.00')
+        self.meat.save()
+        report_data, _error = inventory_reports.range_report(datetime.date(2024, 3, 4), datetime.date(2024, 3, 10))
+        self.assertEqual(report_data['totals']['total_cost'], Decimal('60.00'))
+
+        WeeklyInventory.objects.filter(inventory_type='END').delete()
+        self.assertFalse(WeeklyUsage.objects.exists())
+
+    def test_reports_read_snapshots_only(self):
+        self.set_inventory('2024-03-10', 'END', [(self.meat, 3)])
+        # Rows written without signals are invisible until backfilled
+        WeeklyInventory.objects.bulk_create([
+            WeeklyInventory(
+                item=self.bread, year=2024, week_number=10, week_start=datetime.date(2024, 3, 4),
+                inventory_type='END', quantity=5
+            )
+        ])
+        report_data, _error = inventory_reports.range_report(datetime.date(2024, 3, 4), datetime.date(2024, 3, 10))
+        self.assertEqual(report_data['totals']['total_cost'], Decimal('30.00'))
+
+        out = StringIO()
+        call_command('backfill_weekly_usage', stdout=out)
+        self.assertIn('Snapshotted 2 weekly usage rows', out.getvalue())
+        report_data, _error = inventory_reports.range_report(datetime.date(2024, 3, 4), datetime.date(2024, 3, 10))
+        self.assertEqual(report_data['totals']['total_cost'], Decimal('35.00'))
+
+    def test_refreshes_keep_the_closing_price(self):
+        self.set_inventory('2024-03-10', 'END', [(self.meat, 3)])
+        self.meat.cost = Decimal('20.00')
+        self.meat.save()
+        self.bread.cost = Decimal('2.00')
+        self.bread.save()
+
+        # Recounting a closed week keeps its price; items new to the week take today's
+        self.set_inventory('2024-03-10', 'END', [(self.meat, 2), (self.bread, 5)])
+        meat = WeeklyUsage.objects.get(item=self.meat, year=2024, week_number=10)
+        bread = WeeklyUsage.objects.get(item=self.bread, year=2024, week_number=10)
+        self.assertEqual((meat.unit_cost, meat.cost), (Decimal('10.00'), Decimal('20.00')))
+        self.assertEqual((bread.unit_cost, bread.cost), (Decimal('2.00'), Decimal('10.00')))
+
+        call_command('backfill_weekly_usage', stdout=StringIO())
+        meat = WeeklyUsage.objects.get(item=self.meat, year=2024, week_number=10)
+        self.assertEqual((meat.unit_cost, meat.cost), (Decimal('10.00'), Decimal('20.00')))
+
+
+class SetInventoryTests(SetInventoryMixin, TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.items = [InventoryItem.objects.create(name=f"Item {index}", cost=Decimal('1.00')) for index in range(40)]
+
+    def test_one_bad_value_writes_nothing(self):
+        quantities = [(item, 5) for item in self.items]
+        quantities[20] = (self.items[20], -1)
+        self.set_inventory('2024-03-04', 'START', quantities)
+        self.assertFalse(WeeklyInventory.objects.exists())
+
+        self.set_inventory('2024-03-04', 'START', [(item, 'abc') if item == self.items[3] else (item, 5) for item in self.items])
+        self.assertFalse(WeeklyInventory.objects.exists())
+
+    def test_rejected_rows_are_reported_per_item(self):
+        quantities = [(item, 5) for item in self.items]
+        quantities[3] = (self.items[3], 'abc')
+        quantities[20] = (self.items[20], -1)
+        response = self.set_inventory('2024-03-04', 'START', quantities, follow=True)
+        errors = sorted(str(message) for message in response.context['messages'])
+        self.assertEqual(len(errors), 2)
+        self.assertTrue(errors[0].startswith("Item 20: "))
+        self.assertIn("greater than or equal to 0", errors[0])
+        self.assertTrue(errors[1].startswith("Item 3: "))
+        self.assertIn("whole number", errors[1])
+
+    def test_query_count_does_not_grow_with_items(self):
+        with self.assertNumQueries(19) as small:
+            self.set_inventory('2024-03-04', 'START', [(item, 5) for item in self.items[:5]])
+        with self.assertNumQueries(len(small.captured_queries)):
+            self.set_inventory('2024-03-11', 'START', [(item, 5) for item in self.items])
+        self.assertEqual(WeeklyInventory.objects.count(), 45)
+
+    def test_deltas_update_only_sent_cells(self):
+        self.set_inventory('2024-03-04', 'START', [(item, 5) for item in self.items])
+        self.set_inventory('2024-03-04', 'START', [(self.items[0], 2)])
+        self.assertEqual(
+            dict(WeeklyInventory.objects.filter(item__in=self.items[:2]).values_list('item_id', 'quantity')),
+            {self.items[0].id: 2, self.items[1].id: 5}
+        )
+
+        response = self.client.get(reverse('inventory_counts'), {'date': '2024-03-06', 'inventory_type': 'START'})
+        data = response.json()
+        self.assertEqual((data['year'], data['week_number']), (2024, 10))
+        self.assertEqual(data['counts'][str(self.items[0].id)], 2)
+        self.assertEqual(len(data['counts']), 40)
+        self.assertEqual(
+            self.client.get(reverse('inventory_counts'), {'date': '2024-03-06', 'inventory_type': 'MID'}).status_code,
+            400
+        )
+
+
+class JobQueueTests(SetInventoryMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.meat = InventoryItem.objects.create(name="Meat", cost=Decimal('10.00'))
+
+    def test_closing_a_week_warms_its_reports(self):
+        self.set_inventory('2024-03-04', 'START', [(self.meat, 9)])
+        self.assertFalse(Job.objects.exists())
+        self.set_inventory('2024-03-10', 'END', [(self.meat, 4)])
+        self.set_inventory('2024-03-10', 'END', [(self.meat, 3)])
+        job = Job.objects.get()
+        self.assertEqual((job.kind, job.payload), ('warm_week', {'year': 2024, 'week': 10}))
+
+        call_command('run_worker', '--once', stdout=StringIO())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('DONE', 1))
+
+        self.assertEqual(
+            jobs.week_ranges(2024, 10),
+            [(datetime.date(2024, 3, 4), datetime.date(2024, 3, 10)), (datetime.date(2024, 3, 1), datetime.date(2024, 3, 31))]
+        )
+        for params in [{'start_date': '2024-03-04', 'end_date': '2024-03-10'},
+                       {'start_date': '2024-03-01', 'end_date': '2024-03-31'}]:
+            # A fresh client has no session for the save messages to load
+            client = Client()
+            with self.assertNumQueries(0):
+                response = client.get(reverse('inventory_report_ajax'), params)
+                client.get(reverse('home'), params)
+                client.get(reverse('reports'), params)
+            self.assertEqual(response.context['report_data']['totals']['total_cost'], Decimal('60.00'))
+
+    def test_failed_jobs_are_retried_then_given_up(self):
+        jobs.HANDLERS['explode'] = lambda: 1 / 0
+        self.addCleanup(jobs.HANDLERS.pop, 'explode')
+        job = jobs.enqueue('explode')
+
+        self.assertEqual(jobs.run_pending(), 1)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('PENDING', 1))
+        self.assertIn('division by zero', job.error)
+        self.assertIsNone(jobs.claim())
+
+        Job.objects.filter(id=job.id).update(run_after=timezone.now(), attempts=2)
+        jobs.run_pending()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('FAILED', 3))
+
+    def test_a_job_is_claimed_once(self):
+        job = jobs.enqueue('warm_week', year=2024, week=10)
+        self.assertEqual(jobs.claim(), job)
+        self.assertIsNone(jobs.claim())
+
+        Job.objects.filter(id=job.id).update(started_at=timezone.now() - datetime.timedelta(hours=1))
+        self.assertEqual(jobs.requeue_stale(), 1)
+        self.assertEqual(jobs.claim(), job)
+
+
+class WeekStartTests(TestCase):
+    def setUp(self):
+        self.item = InventoryItem.objects.create(name="Meat", cost=Decimal('1.00'))
+
+    def test_iso_week_start(self):
+        for year, week in [(2020, 53), (2021, 1), (2024, 1), (2024, 52), (2026, 53)]:
+            self.assertEqual(iso_week_start(year, week), datetime.date.fromisocalendar(year, week, 1))
+        self.assertEqual(iso_week_start(2024, 53), datetime.date(2024, 12, 30))
+
+    def test_week_start_is_kept_in_sync(self):
+        count = WeeklyInventory.objects.create(item=self.item, year=2020, week_number=53, inventory_type='END', quantity=1)
+        self.assertEqual(count.week_start, datetime.date(2020, 12, 28))
+        count.week_number = 52
+        count.save(update_fields=['week_number'])
+        count.refresh_from_db()
+        self.assertEqual(count.week_start, datetime.date(2020, 12, 21))
+
+        results = services.upsert_weekly_inventory([
+            {'item_id': self.item.id, 'year': 2021, 'week_number': 1, 'inventory_type': 'START', 'quantity': 3},
+            {'item_id': self.item.id, 'year': 2021, 'week_number': 53, 'inventory_type': 'START', 'quantity': 3},
+        ])
+        self.assertEqual(results[1]['status'], 'error')
+        self.assertIn('week_number', results[1]['errors'])
+        self.assertEqual(WeeklyInventory.objects.count(), 1)
+
+        services.upsert_weekly_inventory([
+            {'item_id': self.item.id, 'year': 2021, 'week_number': 1, 'inventory_type': 'START', 'quantity': 3},
+        ])
+        self.assertEqual(WeeklyInventory.objects.get(year=2021).week_start, datetime.date(2021, 1, 4))
+
+    def test_between_is_an_indexed_range_scan(self):
+        for year, week in [(2020, 52), (2020, 53), (2021, 1), (2021, 2)]:
+            WeeklyInventory.objects.create(item=self.item, year=year, week_number=week, inventory_type='END', quantity=1)
+        counts = WeeklyInventory.between(datetime.date(2020, 12, 31), datetime.date(2021, 1, 6))
+        self.assertEqual(sorted(counts.values_list('year', 'week_number')), [(2020, 53), (2021, 1)])
+        self.assertIn('core_weekly_invento_7d2277_idx', counts.filter(inventory_type='END').explain())
+
+
+class ForecastTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.today = timezone.now().date()
+        self.current_week = self.today - datetime.timedelta(days=self.today.weekday())
+        self.meat = InventoryItem.objects.create(name="Meat", cost=Decimal('1.00'))
+        self.bread = InventoryItem.objects.create(name="Bread", cost=Decimal('1.00'))
+        self.sauce = InventoryItem.objects.create(name="Sauce", cost=Decimal('1.00'))
+        # Meat: 10, 12, 14, 16 units used over the last four closed weeks, 40 left
+        for weeks_ago, (start, end) in zip(range(4, 0, -1), [(110, 100), (112, 100), (114, 100), (56, 40)]):
+            self.count(self.meat, weeks_ago, start, end)
+        self.count(self.bread, 2, 20, 15)
+
+    def count(self, item, weeks_ago, start, end):
+        year, week = (self.current_week - datetime.timedelta(weeks=weeks_ago)).isocalendar()[:2]
+        for inventory_type, quantity in [('START', start), ('END', end)]:
+            WeeklyInventory.objects.create(
+                item=item, year=year, week_number=week, inventory_type=inventory_type, quantity=quantity
+            )
+
+    def test_forecast_all_items_in_one_pass(self):
+        with self.assertNumQueries(2):
+            forecast = {item.name: item for item in forecasting.forecast(today=self.today, weeks=8, window=4)}
+
+        meat = forecast["Meat"]
+        self.assertEqual(meat.weeks_recorded, 4)
+        self.assertAlmostEqual(meat.average_usage, 13)
+        self.assertAlmostEqual(meat.rolling_usage, 13)
+        self.assertAlmostEqual(meat.trend, 2)
+        self.assertEqual(meat.stock, 40)
+        self.assertAlmostEqual(meat.weeks_left, 40 / 13)
+        # Counted last week, lasts three more full weeks, runs out in the fourth
+        self.assertEqual(meat.runout_week, self.current_week + datetime.timedelta(weeks=3))
+        self.assertFalse(meat.reorder)
+
+        bread = forecast["Bread"]
+        self.assertIsNone(bread.trend)
+        self.assertAlmostEqual(bread.weeks_left, 3)
+        self.assertEqual(bread.runout_week, self.current_week + datetime.timedelta(weeks=2))
+
+        sauce = forecast["Sauce"]
+        self.assertEqual((sauce.weeks_recorded, sauce.average_usage, sauce.runout_week), (0, None, None))
+
+    def test_rolling_mean_and_trend_ignore_missing_weeks(self):
+        nan = float('nan')
+        values = forecasting.np.array([[1.0, nan, 3.0, 5.0], [nan, nan, nan, nan]])
+        rolling = forecasting.rolling_mean(values, 2)
+        self.assertEqual(rolling[0].tolist(), [1.0, 1.0, 3.0, 4.0])
+        self.assertTrue(forecasting.np.isnan(rolling[1]).all())
+        slopes = forecasting.trend(values)
+        self.assertAlmostEqual(slopes[0], forecasting.np.polyfit([0, 2, 3], [1, 3, 5], 1)[0])
+        self.assertTrue(forecasting.np.isnan(slopes[1]))
+
+    def test_forecast_page_and_json(self):
+        response = self.client.get(reverse('inventory'))
+        self.assertContains(response, "Usage Forecast")
+        self.assertEqual(len(response.context['forecast']), 3)
+
+        data = self.client.get(reverse('inventory_forecast'), {'weeks': 8}).json()
+        meat = next(item for item in data['forecast'] if item['name'] == "Meat")
+        self.assertEqual(meat['average_usage'], 13.0)
+        self.assertEqual(meat['runout_week'], (self.current_week + datetime.timedelta(weeks=3)).strftime('%Y-%m-%d'))
+        self.assertEqual(self.client.get(reverse('inventory_forecast'), {'weeks': 'x'}).status_code, 400)
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.params = {'start_date': '2024-03-04', 'end_date': '2024-03-10'}
+        DailyEntry.objects.create(date=datetime.date(2024, 3, 5), entry_type='MEATBALL_SALES', value=Decimal('300'))
+        DailyEntry.objects.create(date=datetime.date(2024, 3, 5), entry_type='MEATBALL_SALAD', value=Decimal('20'))
+        DailyEntry.objects.create(date=datetime.date(2024, 3, 6), entry_type='BARBER_ADULT', value=Decimal('3'))
+        item = InventoryItem.objects.create(name="Meat", cost=Decimal('5.00'))
+        WeeklyInventory.objects.create(item=item, week_number=10, year=2024, inventory_type='END', quantity=4)
+        WeeklyInventory.objects.create(item=item, week_number=10, year=2024, inventory_type='START', quantity=10)
+
+    def async_get(self, name, params):
+        return async_to_sync(AsyncClient().get)(reverse(name), params)
+
+    def test_async_views_match_sync_views(self):
+        for name, key in [('home', 'profits'), ('reports', 'report_data'), ('inventory_report_ajax', 'report_data')]:
+            cache.clear()
+            expected = self.client.get(reverse(name), self.params).context[key]
+            cache.clear()
+            response = self.async_get(f'async_{name}', self.params)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.context[key], expected)
+
+    def test_async_json_endpoints(self):
+        params = dict(self.params, bucket='week')
+        self.assertEqual(
+            self.async_get('async_profit_series', params).json(),
+            self.client.get(reverse('profit_series'), params).json()
+        )
+        self.assertEqual(self.async_get('async_profit_series', dict(params, bucket='year')).status_code, 400)
+
+        self.async_get('async_reports', self.params)
+        self.client.get(reverse('reports'), self.params)
+        stats = self.async_get('async_cache_stats', {}).json()['stats']
+        self.assertEqual(stats['reports'], {'hits': 1, 'misses': 1})
+
+    def test_async_inventory_report_is_cached(self):
+        self.client.get(reverse('inventory_report_ajax'), self.params)
+        with self.assertNumQueries(0):
+            response = self.async_get('async_inventory_report_ajax', self.params)
+        self.assertEqual(response.context['report_data']['items'][0]['units_used'], 6)
+        stats = self.async_get('async_cache_stats', {}).json()['stats']
+        self.assertEqual(stats['inventory'], {'hits': 1, 'misses': 1})
+
+
+class BulkEntryTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        DailyEntry.objects.create(date=datetime.date(2024, 6, 3), entry_type='SHOE_REVENUE', value=Decimal('10'))
+
+    def post(self, rows):
+        return self.client.post(
+            reverse('bulk_save_entries'),
+            data=json.dumps({'entries': rows}),
+            content_type='application/json'
+        )
+
+    def test_week_of_entries_is_upserted_in_one_request(self):
+        rows = [
+            {'date': f'2024-06-0{day}', 'entry_type': 'SHOE_REVENUE', 'value': '100'}
+            for day in range(3, 10)
+        ]
+        with self.assertNumQueries(14):
+            response = self.post(rows)
+        results = response.json()['results']
+        self.assertEqual(results[0]['status'], 'updated')
+        self.assertEqual({result['status'] for result in results[1:]}, {'created'})
+        self.assertEqual(
+            CumulativeTotal.range_totals(datetime.date(2024, 6, 3), datetime.date(2024, 6, 9))['SHOE_REVENUE'],
+            Decimal('700')
+        )
+
+    def test_invalid_row_rejects_the_whole_batch(self):
+        response = self.post([
+            {'date': '2024-06-04', 'entry_type': 'SHOE_REVENUE', 'value': '100'},
+            {'date': '2024-06-05', 'entry_type': 'UNKNOWN', 'value': '100'},
+            {'date': '2024-06-04', 'entry_type': 'SHOE_REVENUE', 'value': '5'},
+        ])
+        self.assertEqual(response.status_code, 400)
+        statuses = [result['status'] for result in response.json()['results']]
+        self.assertEqual(statuses, ['valid', 'error', 'error'])
+        self.assertEqual(DailyEntry.objects.count(), 1)
+
+    def test_home_forms_report_rejected_rows(self):
+        response = self.client.post(reverse('save_barber_entry'), {
+            'date': '2024-06-04', 'adult_haircuts': 10 ** 9, 'child_haircuts': 1, 'free_haircuts': 0
+        }, follow=True)
+        self.assertEqual(DailyEntry.objects.count(), 1)
+        self.assertEqual([message.level_tag for message in response.context['messages']], ['error'])
+
+        response = self.client.post(reverse('save_shoe_entry'), {
+            'date': '2024-06-04', 'revenue': '123456789012.00'
+        }, follow=True)
+        self.assertEqual(DailyEntry.objects.count(), 1)
+        self.assertEqual([message.level_tag for message in response.context['messages']], ['error'])
+
+
+class ImportEntriesTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(content)
+        return path
+
+    def test_csv_import_resumes_from_checkpoint(self):
+        path = self.write('entries.csv', (
+            'date,entry_type,value\n'
+            '2024-01-01,SHOE_REVENUE,100\n'
+            '2024-01-02,SHOE_REVENUE,200\n'
+            '2024-01-03,SHOE_REVENUE,oops\n'
+            '2024-01-04,SHOE_REVENUE,400\n'
+        ))
+        with self.assertRaises(CommandError):
+            call_command('import_entries', path, '--batch-size', '2', stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(DailyEntry.objects.count(), 2)
+
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(
+                'date,entry_type,value\n'
+                '2024-01-01,SHOE_REVENUE,999\n'
+                '2024-01-02,SHOE_REVENUE,999\n'
+                '2024-01-03,SHOE_REVENUE,300\n'
+                '2024-01-04,SHOE_REVENUE,400\n'
+            )
+        call_command('import_entries', path, '--batch-size', '2', '--resume', stdout=StringIO())
+        self.assertEqual(
+            list(DailyEntry.objects.order_by('date').values_list('value', flat=True)),
+            [Decimal('100'), Decimal('200'), Decimal('300'), Decimal('400')]
+        )
+        self.assertFalse(os.path.exists(f'{path}.checkpoint'))
+
+    def test_rollups_are_rebuilt_once_after_the_import(self):
+        DailyEntry.objects.create(date=datetime.date(2024, 1, 10), entry_type='SHOE_REVENUE', value=Decimal('5'))
+        path = self.write('entries.ndjson', '\n'.join(
+            json.dumps({'date': f'2024-01-{day:02d}', 'entry_type': 'SHOE_REVENUE', 'value': '10'})
+            for day in (9, 3, 7, 1, 5)
+        ))
+        with CaptureQueriesContext(connection) as queries:
+            call_command('import_entries', path, '--batch-size', '2', stdout=StringIO())
+        self.assertFalse([query for query in queries if 'UPDATE "core_cumulativetotal"' in query['sql']])
+        self.assertEqual(CumulativeTotal.find_inconsistencies(), [])
+        self.assertEqual(
+            CumulativeTotal.range_totals(datetime.date(2024, 1, 1), datetime.date(2024, 1, 31))['SHOE_REVENUE'],
+            Decimal('55')
+        )
+
+    def test_malformed_json_names_the_line(self):
+        path = self.write('entries.ndjson', '{"date": "2024-01-01", "entry_type": "SHOE_REVENUE", "value": 1}\n\n{oops\n')
+        with self.assertRaisesMessage(CommandError, 'Line 3: invalid JSON'):
+            call_command('import_entries', path, stdout=StringIO())
+
+    def test_ndjson_inventory_import_resolves_item_names(self):
+        InventoryItem.objects.create(name="Meatballs", cost=Decimal('5.00'))
+        path = self.write('counts.ndjson', '\n'.join(json.dumps(row) for row in [
+            {'item': 'Meatballs', 'week_number': 10, 'year': 2024, 'inventory_type': 'START', 'quantity': 50},
+            {'item': 'Meatballs', 'week_number': 10, 'year': 2024, 'inventory_type': 'END', 'quantity': 20},
+        ]))
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('import_entries', path, '--model', 'inventory', stdout=StringIO())
+        self.assertEqual(WeeklyInventory.objects.get(inventory_type='END').quantity, 20)
+        # Historical weeks are not queued for warming
+        self.assertFalse(Job.objects.exists())
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        DailyEntry.objects.create(date=datetime.date(2024, 2, 1), entry_type='SHOE_REVENUE', value=Decimal('150'))
+        DailyEntry.objects.create(date=datetime.date(2024, 2, 2), entry_type='MEATBALL_SALES', value=Decimal('80'))
+
+    def test_entries_stream_as_csv_and_ndjson(self):
+        response = self.client.get(reverse('export_entries'), {'start_date': '2024-02-01', 'end_date': '2024-02-01'})
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines, ['date,entry_type,value', '2024-02-01,SHOE_REVENUE,150.00'])
+
+        response = self.client.get(reverse('export_entries'), {'format': 'ndjson'})
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['entry_type'] for row in rows], ['SHOE_REVENUE', 'MEATBALL_SALES'])
+
+    def test_report_export_requires_a_range(self):
+        response = self.client.get(reverse('export_report'))
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get(reverse('export_report'), {'start_date': '2024-02-01', 'end_date': '2024-02-29'})
+        rows = [line.split(',') for line in b''.join(response.streaming_content).decode().splitlines()[1:]]
+        values = {(section, metric): Decimal(value) for section, metric, value in rows}
+        self.assertEqual(values[('meatball_stand', 'total_sales')], Decimal('80'))
+        self.assertEqual(values[('total', 'total_revenue')], Decimal('230'))
+
+
 class TaskTests(TestCase):
     def setUp(self):
         self.task = Task.objects.create(
@@ -53,6 +994,292 @@ class TaskTests(TestCase):
         )
         self.assertEqual(subtask.parent_task, self.task)
 
+
+class TaskTreeTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.today = datetime.date(2024, 6, 10)
+        self.root = Task.objects.create(name="Open stand", deadline=datetime.date(2024, 6, 1))
+        self.child = Task.objects.create(name="Buy tables", parent_task=self.root, completed=True)
+        self.grandchild = Task.objects.create(
+            name="Compare prices", parent_task=self.child, deadline=datetime.date(2024, 6, 20)
+        )
+
+    def test_forest_nests_every_level(self):
+        with self.assertNumQueries(1):
+            forest = task_tree.load_forest(today=self.today)
+        self.assertEqual([node.task for node in forest], [self.root])
+        root = forest[0]
+        self.assertTrue(root.overdue)
+        self.assertEqual((root.subtask_count, root.descendant_count, root.completed_descendants), (1, 2, 1))
+        grandchild = root.children[0].children[0]
+        self.assertEqual((grandchild.task, grandchild.depth, grandchild.overdue), (self.grandchild, 2, False))
+
+    def test_deep_chains_do_not_recurse(self):
+        tasks = [self.root, self.child, self.grandchild]
+        parent = self.grandchild
+        for index in range(1500):
+            parent = Task(name=f"Step {index}", parent_task_id=parent.id, id=10000 + index)
+            tasks.append(parent)
+        forest = task_tree.build_forest(tasks, self.today)
+        node = forest[0]
+        while node.children:
+            node = node.children[0]
+        self.assertEqual(node.depth, 1502)
+
+        # The flat rows encode and render without nesting per level
+        rows = json.loads(json.dumps([node.as_dict() for node in task_tree.flatten(forest)], default=str))
+        self.assertEqual([row['depth'] for row in rows], list(range(1503)))
+        self.assertEqual(rows[-1]['parent_id'], rows[-2]['id'])
+        self.assertIn('margin-left: 1502rem', render_to_string('core/task_node.html', {'node': node}))
+
+    def test_page_and_endpoint_query_counts_do_not_grow(self):
+        def page_queries():
+            # Page: forest, parent task choices, accounts; endpoint: forest
+            with self.assertNumQueries(4):
+                self.client.get(reverse('move_forward'))
+                self.client.get(reverse('task_forest'))
+
+        page_queries()
+        Task.objects.bulk_create(
+            [Task(name=f"Sub {index}", parent_task=self.grandchild) for index in range(50)]
+        )
+        page_queries()
+
+        data = self.client.get(reverse('task_forest')).json()
+        self.assertEqual(
+            [(row['id'], row['parent_id'], row['depth']) for row in data['tasks'][:3]],
+            [(self.root.id, None, 0), (self.child.id, self.root.id, 1), (self.grandchild.id, self.child.id, 2)]
+        )
+        self.assertEqual(data['tasks'][2]['subtask_count'], 50)
+        self.assertEqual(data['tasks'][0]['descendant_count'], 52)
+
+
+class TaskHierarchyTests(TestCase):
+    def setUp(self):
+        self.root = Task.objects.create(name="Root")
+        self.child = Task.objects.create(name="Child", parent_task=self.root)
+        self.grandchild = Task.objects.create(
+            name="Grandchild", parent_task=self.child, deadline=datetime.date(2020, 1, 1)
+        )
+        self.other = Task.objects.create(name="Other")
+
+    def test_paths_and_lookups(self):
+        self.assertEqual(self.grandchild.path, f'{self.root.id}/{self.child.id}/{self.grandchild.id}/')
+        self.assertEqual(self.grandchild.depth, 2)
+        with self.assertNumQueries(1):
+            self.assertEqual(set(self.root.descendants()), {self.child, self.grandchild})
+        with self.assertNumQueries(1):
+            self.assertEqual(list(self.grandchild.ancestors()), [self.root, self.child])
+        with self.assertNumQueries(1):
+            summary = self.root.subtree_summary()
+        self.assertEqual((summary['total'], summary['overdue'], summary['max_depth']), (2, 1, 2))
+
+        created = Task.objects.bulk_create([Task(name="Bulk", parent_task=self.grandchild)])
+        self.assertEqual(created[0].depth, 3)
+        self.assertEqual(self.root.descendants().count(), 3)
+
+    def test_moving_a_task_moves_its_subtree(self):
+        self.child.parent_task = self.other
+        self.child.save()
+        self.grandchild.refresh_from_db()
+        self.assertEqual(self.grandchild.path, f'{self.other.id}/{self.child.id}/{self.grandchild.id}/')
+        self.assertEqual(list(self.grandchild.ancestors()), [self.other, self.child])
+
+        self.child.parent_task = None
+        self.child.save()
+        self.grandchild.refresh_from_db()
+        self.assertEqual((self.grandchild.path, self.grandchild.depth), (f'{self.child.id}/{self.grandchild.id}/', 1))
+
+    def test_cycles_are_rejected(self):
+        form = TaskForm({'name': "Root", 'parent_task': self.grandchild.id}, instance=self.root)
+        self.assertIn('parent_task', form.errors)
+        self.root.parent_task = self.grandchild
+        with self.assertRaises(ValueError):
+            self.root.save()
+
+    def test_deleting_a_subtree_does_not_load_descendants(self):
+        def delete_queries(task):
+            with CaptureQueriesContext(connection) as context:
+                task.delete()
+            return len(context.captured_queries)
+
+        small = delete_queries(self.child)
+        self.assertEqual(set(Task.objects.all()), {self.root, self.other})
+
+        # Same depth as the child, so the same number of ancestors to update
+        big = parent = Task.objects.create(name="Big", parent_task=self.other)
+        for index in range(30):
+            parent = Task.objects.create(name=f"Level {index}", parent_task=parent)
+        Task.objects.bulk_create([Task(name=f"Leaf {index}", parent_task=parent) for index in range(100)])
+        self.assertEqual(delete_queries(big), small)
+        self.other.delete()
+        self.assertEqual(list(Task.objects.all()), [self.root])
+
+        Task.objects.create(name="Child", parent_task=self.root)
+        Task.objects.filter(pk=self.root.pk).delete()
+        self.assertFalse(Task.objects.exists())
+
+        Task.objects.create(name="Rebuilt")
+        Task.objects.update(path='', depth=5)
+        self.assertEqual(Task.rebuild_paths(), 1)
+        self.assertEqual(Task.objects.get().depth, 0)
+
+    def test_tasks_without_a_path_can_be_deleted(self):
+        # A parent cycle written around save() leaves both tasks without a path
+        Task.objects.filter(pk=self.root.pk).update(parent_task=self.grandchild)
+        Task.rebuild_paths()
+        self.assertEqual(set(Task.objects.filter(path='')), {self.root, self.child, self.grandchild})
+
+        Task.objects.filter(pk=self.child.pk).delete()
+        self.assertEqual(list(Task.objects.all()), [self.other])
+
+
+class TaskProgressTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.root = Task.objects.create(name="Root")
+        self.child = Task.objects.create(name="Child", parent_task=self.root)
+        self.leaves = [Task.objects.create(name=f"Leaf {index}", parent_task=self.child) for index in range(3)]
+
+    def counters(self, task):
+        task.refresh_from_db()
+        return task.total_descendants, task.completed_descendants
+
+    def test_views_keep_counters_up_to_date(self):
+        self.client.post(reverse('add_subtask', args=[self.child.id]), {'name': "Leaf 3"})
+        self.client.post(reverse('add_task'), {'name': "Leaf 4", 'parent_task': self.child.id})
+        self.assertEqual(self.counters(self.root), (6, 0))
+
+        self.client.post(reverse('complete_task', args=[self.leaves[0].id]))
+        self.client.post(reverse('complete_task', args=[self.leaves[0].id]))
+        self.assertEqual(self.counters(self.root), (6, 1))
+        self.assertEqual(self.counters(self.child), (5, 1))
+
+        other = Task.objects.create(name="Other")
+        self.client.post(reverse('edit_task', args=[self.child.id]), {'name': "Child", 'parent_task': other.id})
+        self.assertEqual(self.counters(self.root), (0, 0))
+        self.assertEqual(self.counters(other), (6, 1))
+
+        self.client.post(reverse('delete_task', args=[self.leaves[0].id]))
+        self.assertEqual(self.counters(other), (5, 0))
+        self.assertEqual(self.counters(self.child), (4, 0))
+        self.assertEqual(Task.find_progress_inconsistencies(), [])
+
+    def test_stale_instances_do_not_overwrite_counters(self):
+        stale_root = Task.objects.get(pk=self.root.pk)
+        Task.objects.create(name="Late", parent_task=self.child, completed=True)
+        stale_root.name = "Renamed"
+        stale_root.save()
+        self.assertEqual(self.counters(self.root), (5, 1))
+        self.assertEqual(self.root.progress_percentage(), 20)
+
+    def test_page_reads_progress_from_columns(self):
+        self.leaves[1].completed = True
+        self.leaves[1].save()
+        response = self.client.get(reverse('move_forward'))
+        self.assertContains(response, "1 of 4 subtasks done")
+        root = self.client.get(reverse('task_forest')).json()['tasks'][0]
+        self.assertEqual((root['descendant_count'], root['progress']), (4, 25))
+
+    def test_check_command_repairs_drift(self):
+        Task.objects.filter(pk=self.leaves[0].pk).update(completed=True)
+        with self.assertRaises(CommandError):
+            call_command('check_task_progress', stdout=StringIO())
+        call_command('check_task_progress', '--repair', stdout=StringIO())
+        self.assertEqual(Task.find_progress_inconsistencies(), [])
+        self.assertEqual(self.counters(self.root), (4, 1))
+
+
+class UrgentTaskTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.today = timezone.now().date()
+        self.late = Task.objects.create(name="Late", deadline=self.today - datetime.timedelta(days=2))
+        self.soon = Task.objects.create(name="Soon", deadline=self.today + datetime.timedelta(days=3))
+        self.later = Task.objects.create(name="Later", deadline=self.today + datetime.timedelta(days=30))
+        Task.objects.create(name="Someday")
+        Task.objects.create(name="Done", deadline=self.today - datetime.timedelta(days=5), completed=True)
+
+    def test_queryset_filters(self):
+        self.assertEqual(list(Task.objects.overdue()), [self.late])
+        self.assertEqual(list(Task.objects.due_within(7)), [self.soon])
+        self.assertEqual(list(Task.objects.by_urgency()), [self.late, self.soon, self.later])
+        self.assertIn('SEARCH core_task USING INDEX', Task.objects.overdue().explain())
+
+    def test_endpoint_is_unaffected_by_completed_tasks(self):
+        def fetch():
+            with self.assertNumQueries(2):
+                return self.client.get(reverse('urgent_tasks'), {'limit': 2}).json()
+
+        data = fetch()
+        self.assertEqual((data['overdue'], data['due_soon']), (1, 1))
+        self.assertEqual([task['name'] for task in data['tasks']], ["Late", "Soon"])
+        self.assertTrue(data['tasks'][0]['overdue'])
+
+        Task.objects.bulk_create([
+            Task(name=f"Old {index}", deadline=self.today - datetime.timedelta(days=index + 1), completed=True)
+            for index in range(200)
+        ])
+        self.assertEqual(fetch(), data)
+        self.assertEqual(self.client.get(reverse('urgent_tasks'), {'limit': 0}).status_code, 400)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        today = timezone.now().date()
+        deadlines = [None, today, today, today + datetime.timedelta(days=1), None, today - datetime.timedelta(days=3)]
+        self.tasks = [Task.objects.create(name=f"Task {index}", deadline=deadline) for index, deadline in enumerate(deadlines * 4)]
+        Account.objects.bulk_create([Account(name=f"Account {index % 5}", balance=1, goal=10) for index in range(12)])
+
+    def pages(self, name, params=None):
+        ids, cursor, query_counts = [], None, []
+        while True:
+            with CaptureQueriesContext(connection) as context:
+                data = self.client.get(reverse(name), dict(params or {}, limit=5, **({'cursor': cursor} if cursor else {}))).json()
+            query_counts.append(len(context.captured_queries))
+            ids.extend(row['id'] for row in data['results'])
+            cursor = data['next_cursor']
+            if not cursor:
+                return ids, query_counts
+
+    def test_pages_follow_meta_ordering_without_gaps(self):
+        ids, query_counts = self.pages('task_list')
+        self.assertEqual(ids, list(Task.objects.order_by('deadline', '-created_at', '-id').values_list('id', flat=True)))
+        # Only the page that runs from the NULL deadlines into the others takes a second query
+        self.assertLessEqual(sum(count - query_counts[0] for count in query_counts), 1)
+
+        ids, _counts = self.pages('account_list')
+        self.assertEqual(ids, list(Account.objects.order_by('name', 'id').values_list('id', flat=True)))
+
+    def test_cursors_are_stable_across_inserts(self):
+        first = self.client.get(reverse('task_list'), {'limit': 5}).json()
+        Task.objects.create(name="Urgent", deadline=datetime.date(2000, 1, 1))
+        second = self.client.get(reverse('task_list'), {'limit': 5, 'cursor': first['next_cursor']}).json()
+        first_ids = {row['id'] for row in first['results']}
+        self.assertFalse(first_ids & {row['id'] for row in second['results']})
+        self.assertEqual(len(second['results']), 5)
+
+    def test_deep_pages_seek_the_listing_index(self):
+        keys = views.TASK_KEYS
+        for task in (self.tasks[1], self.tasks[0]):
+            values = [task.deadline, task.created_at, task.id]
+            page = Task.objects.filter(pagination.keyset_q(Task, keys, values, connection.features.nulls_order_largest))
+            plan = page.order_by(*[key.order_by() for key in keys])[:21].explain()
+            self.assertIn('SEARCH core_task USING INDEX core_task_listing_idx', plan)
+            self.assertNotIn('SCAN core_task', plan)
+
+    def test_filters_and_bad_requests(self):
+        Task.objects.filter(pk=self.tasks[0].pk).update(completed=True)
+        data = self.client.get(reverse('task_list'), {'completed': '1'}).json()
+        self.assertEqual([row['id'] for row in data['results']], [self.tasks[0].id])
+        self.assertIsNone(data['next_cursor'])
+        self.assertEqual(self.client.get(reverse('task_list'), {'cursor': 'not-a-cursor'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('account_list'), {'limit': 500}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('task_list'), {'parent': 'x'}).status_code, 400)
+
+
 class AccountTests(TestCase):
     def setUp(self):
         self.account = Account.objects.create(
@@ -67,6 +1294,226 @@ class AccountTests(TestCase):
     def test_remaining_amount(self):
         self.assertEqual(self.account.remaining_amount(), Decimal('1000.00'))
 
+@override_settings(LEDGER={'SNAPSHOT_EVERY': 5})
+class LedgerTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.account = Account.objects.create(name="Savings", balance=Decimal('1000.00'), goal=Decimal('5000.00'))
+        self.start = self.account.created_at
+
+    def at(self, hours):
+        return self.start + datetime.timedelta(hours=hours)
+
+    def brute_force(self, moment):
+        return AccountTransaction.objects.filter(account=self.account, occurred_at__lte=moment).aggregate(
+            total=Sum('amount'))['total']
+
+    def test_views_record_every_change(self):
+        self.client.post(reverse('update_account_balance', args=[self.account.id]), {'balance': '1500'})
+        self.client.post(reverse('edit_account', args=[self.account.id]), {
+            'name': "Savings", 'balance': '1200', 'goal': '5000'
+        })
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('1200.00'))
+        self.assertEqual(
+            list(self.account.transactions.order_by('id').values_list('kind', 'amount')),
+            [('OPENING', Decimal('1000.00')), ('ADJUSTMENT', Decimal('500.00')), ('ADJUSTMENT', Decimal('-300.00'))]
+        )
+
+        yesterday = (timezone.localdate(self.start) - datetime.timedelta(days=1)).strftime('%Y-%m-%d')
+        response = self.client.get(reverse('account_balance', args=[self.account.id]), {'date': yesterday})
+        self.assertEqual(Decimal(response.json()['balance']), 0)
+        response = self.client.get(reverse('account_balance', args=[self.account.id]))
+        self.assertEqual(Decimal(response.json()['balance']), Decimal('1200.00'))
+        self.assertEqual(
+            self.client.get(reverse('account_balance', args=[self.account.id]), {'date': 'soon'}).status_code, 400
+        )
+
+    def test_point_in_time_balance_uses_snapshots(self):
+        for hour in range(1, 24):
+            ledger.record(self.account, Decimal(hour), 'DEPOSIT', occurred_at=self.at(hour))
+        self.assertEqual(AccountSnapshot.objects.filter(account=self.account).count(), 4)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('1276.00'))
+
+        # Backdated entries are folded into the snapshots taken after them
+        ledger.record(self.account, Decimal('-50'), 'WITHDRAWAL', occurred_at=self.at(2.5))
+        for hours in (0, 2, 3, 10.5, 20, 30):
+            with self.assertNumQueries(2):
+                balance = ledger.balance_at(self.account, self.at(hours))
+            self.assertEqual(balance, self.brute_force(self.at(hours)))
+
+    def test_transactions_are_append_only(self):
+        entry = self.account.transactions.get()
+        entry.amount = Decimal('1')
+        with self.assertRaises(ValueError):
+            entry.save()
+        with self.assertRaises(ValueError):
+            entry.delete()
+
+    def test_ledger_seed_skips_zero_balances_like_new_accounts(self):
+        empty = Account.objects.create(name="Empty", balance=Decimal('0.00'), goal=Decimal('100.00'))
+        self.assertFalse(empty.transactions.exists())
+
+        # Accounts that predate the ledger get the same rule from the data migration
+        Account.objects.bulk_create([
+            Account(name="Old empty", balance=Decimal('0.00'), goal=Decimal('100.00')),
+            Account(name="Old savings", balance=Decimal('250.00'), goal=Decimal('100.00')),
+        ])
+        migration = importlib.import_module('core.migrations.0014_account_ledger')
+        migration.open_ledgers(django_apps, None)
+        self.assertEqual(
+            list(AccountTransaction.objects.filter(account__name__startswith="Old").values_list('account__name', 'amount')),
+            [("Old savings", Decimal('250.00'))]
+        )
+
+
+class ConcurrentUpdateTests(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.account = Account.objects.create(name="Savings", balance=Decimal('1000.00'), goal=Decimal('5000.00'))
+        self.parent = Task.objects.create(name="Parent")
+        self.task = Task.objects.create(name="Child", description="Old", parent_task=self.parent)
+
+    def test_stale_account_writes_conflict(self):
+        url = reverse('update_account_balance', args=[self.account.id])
+        response = self.client.post(url, {'amount': '25', 'version': 0})
+        self.assertEqual(response.json(), {'status': 'success', 'balance': '1025.00', 'version': 1})
+
+        # A client still holding version 0 must not overwrite the deposit it has not seen
+        response = self.client.post(url, {'balance': '900', 'version': 0})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['version'], 1)
+        response = self.client.post(reverse('edit_account', args=[self.account.id]), {
+            'name': "Holiday", 'balance': '1000', 'goal': '5000', 'version': 0
+        })
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.client.post(url, {'amount': '1', 'version': 'x'}).status_code, 400)
+
+        self.account.refresh_from_db()
+        self.assertEqual((self.account.name, self.account.balance, self.account.version), ("Savings", Decimal('1025.00'), 1))
+
+    def test_unversioned_edit_only_writes_changed_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('edit_account', args=[self.account.id]), {
+                'name': "Holiday", 'balance': '1000', 'goal': '5000'
+            })
+        self.account.refresh_from_db()
+        self.assertEqual((self.account.name, self.account.balance, self.account.version), ("Holiday", Decimal('1000.00'), 1))
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('"balance"', updates[0])
+
+    def test_task_versions(self):
+        response = self.client.post(reverse('edit_task', args=[self.task.id]), {
+            'name': "Child", 'description': "New", 'parent_task': self.parent.id, 'version': 0
+        })
+        self.assertEqual(response.json()['version'], 1)
+        response = self.client.post(reverse('edit_task', args=[self.task.id]), {
+            'name': "Child", 'description': "Stale", 'parent_task': self.parent.id, 'version': 0
+        })
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.client.post(reverse('complete_task', args=[self.task.id]), {'version': 0}).status_code, 409)
+
+        response = self.client.post(reverse('complete_task', args=[self.task.id]), {'version': 1})
+        self.assertEqual(response.json(), {'status': 'success', 'version': 2})
+        # Completing again is a no-op that neither bumps the version nor the counters
+        self.assertEqual(self.client.post(reverse('complete_task', args=[self.task.id])).json()['version'], 2)
+        self.task.refresh_from_db()
+        self.parent.refresh_from_db()
+        self.assertEqual((self.task.description, self.task.completed), ("New", True))
+        self.assertEqual((self.parent.completed_descendants, self.parent.version), (1, 0))
+
+    def test_stale_instances_keep_concurrent_changes(self):
+        stale = Task.objects.get(pk=self.task.pk)
+        self.task.complete()
+        stale.description = "Edited"
+        stale.save(update_fields=['description', 'updated_at'])
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.description, self.task.completed, self.task.version), ("Edited", True, 2))
+        with self.assertRaises(ConflictError):
+            stale.save(expected_version=1)
+
+
+def _post_to_view(url, data):
+    """Posts straight to the view; the test Client would mix up exceptions raised in other threads"""
+    match = resolve(url)
+    return match.func(RequestFactory().post(url, data), *match.args, **match.kwargs)
+
+
+class ConcurrentStressTests(TransactionTestCase):
+    THREADS = 8
+    REQUESTS = 25
+
+    def run_threads(self, work):
+        errors = []
+
+        def worker(number):
+            try:
+                work(number)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(number,)) for number in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_no_lost_balance_updates(self):
+        account = Account.objects.create(name="Savings", balance=Decimal('0.00'), goal=Decimal('5000.00'))
+        url = reverse('update_account_balance', args=[account.id])
+        applied = []
+
+        def work(number):
+            for request in range(self.REQUESTS):
+                if request % 5 == 4:
+                    # Version-checked adjustments race the deposits and may be refused
+                    version = Account.objects.values_list('version', flat=True).get(pk=account.pk)
+                    response = _post_to_view(url, {'amount': '-1', 'version': version})
+                    self.assertIn(response.status_code, (200, 409))
+                    if response.status_code == 200:
+                        applied.append(Decimal('-1'))
+                else:
+                    response = _post_to_view(url, {'amount': str(number + 1)})
+                    self.assertEqual(response.status_code, 200)
+                    applied.append(Decimal(number + 1))
+
+        self.run_threads(work)
+        account.refresh_from_db()
+        self.assertEqual(account.balance, sum(applied))
+        self.assertEqual(account.version, len(applied))
+        self.assertEqual(account.transactions.aggregate(total=Sum('amount'))['total'], account.balance)
+
+    def test_no_lost_task_updates(self):
+        parent = Task.objects.create(name="Parent")
+        tasks = [Task.objects.create(name=f"Task {number}", parent_task=parent) for number in range(self.THREADS)]
+
+        def work(number):
+            for request in range(self.REQUESTS):
+                # Everyone completes the same tasks while editing their own
+                target = tasks[request % len(tasks)]
+                response = _post_to_view(reverse('complete_task', args=[target.id]), {})
+                self.assertEqual(response.status_code, 200)
+                own = tasks[number]
+                response = _post_to_view(reverse('edit_task', args=[own.id]), {
+                    'name': own.name, 'description': f"Edit {request}", 'parent_task': parent.id
+                })
+                self.assertEqual(response.status_code, 200)
+
+        self.run_threads(work)
+        parent.refresh_from_db()
+        self.assertEqual((parent.total_descendants, parent.completed_descendants), (self.THREADS, self.THREADS))
+        for task in Task.objects.filter(parent_task=parent):
+            # One completion plus every edit, and no edit undid the completion
+            self.assertTrue(task.completed)
+            self.assertEqual(task.version, 1 + self.REQUESTS)
+            self.assertEqual(task.description, f"Edit {self.REQUESTS - 1}")
+
+
 class InventoryTests(TestCase):
     def setUp(self):
         self.item = InventoryItem.objects.create(
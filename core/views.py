@@ -1,26 +1,30 @@
 
 from .models import (
-    DailyEntry, Task, Account, InventoryItem, WeeklyInventory
+    DailyEntry, Task, Account, InventoryItem, WeeklyInventory, ConflictError
 )
 from .forms import (
     ShoeShopForm, BarberShopForm, MeatballStandForm,
     TaskForm, AccountForm, InventoryItemForm,
     WeeklyInventoryForm, DateRangeForm
 )
+from . import (
+    caching, exports, forecasting, inventory_reports, jobs, ledger, metrics, pagination, services, task_tree
+)
 
 from decimal import Decimal, InvalidOperation
-import datetime
+import itertools
+import json
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
-from django.db.models import Sum, Avg, F, Q
+from django.core.exceptions import ValidationError
+from django.db import transaction
 from django.utils import timezone
 from django.utils.translation import gettext as _
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
-from django.db.models import Sum, Avg, F, Q, Case, When, Value, DecimalField
+from django.db.models import Sum, Avg, Count, F, Q, Case, When, Value, DecimalField
 from django.db.models.functions import Coalesce
-from datetime import datetime
-from decimal import Decimal
+from datetime import datetime, timedelta
 
 
 def home(request):
@@ -33,77 +37,7 @@ def home(request):
     if isinstance(end_date, str):
         end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
 
-    # Calculate number of days
-    days = Decimal((end_date - selected_date).days + 1)
-
-    # Barber Shop Profits
-    barber_profits = (
-        DailyEntry.objects
-        .filter(
-            entry_type__in=['BARBER_ADULT', 'BARBER_CHILD'],
-            date__gte=selected_date,
-            date__lte=end_date
-        )
-        .aggregate(
-            total=Coalesce(
-                Sum(
-                    Case(
-                        When(entry_type='BARBER_ADULT',
-                             then=F('value') * Value(Decimal('120'))),
-                        When(entry_type='BARBER_CHILD',
-                             then=F('value') * Value(Decimal('100'))),
-                        default=Value(Decimal('0')),
-                        output_field=DecimalField(max_digits=10, decimal_places=2)
-                    )
-                ),
-                Value(Decimal('0'))
-            )
-        )
-    )
-    barber_profit = Decimal(barber_profits['total']) / 2 - (Decimal('260') * days)
-
-    # Shoe Shop Profits
-    shoe_profits = (
-        DailyEntry.objects
-        .filter(
-            entry_type='SHOE_REVENUE',
-            date__gte=selected_date,
-            date__lte=end_date
-        )
-        .aggregate(
-            total=Coalesce(
-                Sum('value'),
-                Value(Decimal('0'))
-            )
-        )
-    )
-    shoe_profit = shoe_profits['total'] - (Decimal('110') * days)  # Changed from division by 2
-
-    # Meatball Stand Profits
-    meatball_profits = (
-        DailyEntry.objects
-        .filter(
-            entry_type__in=['MEATBALL_SALES', 'MEATBALL_SALAD'],
-            date__gte=selected_date,
-            date__lte=end_date
-        )
-        .aggregate(
-            sales=Coalesce(
-                Sum('value', filter=Q(entry_type='MEATBALL_SALES')),
-                Value(Decimal('0'))
-            ),
-            salad_cost=Coalesce(
-                Sum('value', filter=Q(entry_type='MEATBALL_SALAD')),
-                Value(Decimal('0'))
-            )
-        )
-    )
-    meatball_profit = (Decimal(meatball_profits['sales']) / 2 -
-                       Decimal(meatball_profits['salad_cost']) -
-                       (Decimal('200') * days))
-
-    # Calculate total profit
-    total_profit = barber_profit + shoe_profit + meatball_profit
+    profits = caching.home_profits(selected_date, end_date)
 
     context = {
         'barber_form': BarberShopForm(initial={'date': timezone.now().date()}),
@@ -111,28 +45,41 @@ def home(request):
         'meatball_form': MeatballStandForm(initial={'date': timezone.now().date()}),
         'selected_date': selected_date,
         'end_date': end_date,
-        'profits': {
-            'barber': barber_profit,
-            'shoe': shoe_profit,
-            'meatball': meatball_profit,
-            'total': total_profit
-        }
+        'profits': profits
     }
 
     return render(request, 'core/home.html', context)
 
 
+def _rejected_rows(results):
+    """(index, message) for every row an upsert service rejected, its field errors joined"""
+    return [
+        (result['index'], ' '.join(
+            error['message'] for field_errors in result['errors'].values() for error in field_errors
+        ))
+        for result in results if result['status'] == 'error'
+    ]
+
+
+def _save_form_entries(request, rows, success_message):
+    """Upserts the entries of a home page form, reporting rejected rows as an error message"""
+    rejected = _rejected_rows(services.upsert_daily_entries(rows))
+    if rejected:
+        messages.error(request, ' '.join(message for _index, message in rejected))
+    else:
+        messages.success(request, success_message)
+
+
 @require_http_methods(["POST"])
 def save_shoe_entry(request):
     form = ShoeShopForm(request.POST)
     if form.is_valid():
         try:
-            DailyEntry.objects.update_or_create(
-                date=form.cleaned_data['date'],
-                entry_type='SHOE_REVENUE',
-                defaults={'value': form.cleaned_data['revenue']}
-            )
-            messages.success(request, _('Shoe shop entry saved successfully!'))
+            _save_form_entries(request, [{
+                'date': form.cleaned_data['date'],
+                'entry_type': 'SHOE_REVENUE',
+                'value': form.cleaned_data['revenue'],
+            }], _('Shoe shop entry saved successfully!'))
         except Exception as e:
             messages.error(request, str(e))
     else:
@@ -152,13 +99,10 @@ def save_barber_entry(request):
                 ('BARBER_FREE', form.cleaned_data['free_haircuts']),
             ]
 
-            for entry_type, value in entries:
-                DailyEntry.objects.update_or_create(
-                    date=date,
-                    entry_type=entry_type,
-                    defaults={'value': value}
-                )
-            messages.success(request, _('Barber shop entry saved successfully!'))
+            _save_form_entries(request, [
+                {'date': date, 'entry_type': entry_type, 'value': value}
+                for entry_type, value in entries
+            ], _('Barber shop entry saved successfully!'))
         except Exception as e:
             messages.error(request, str(e))
     else:
@@ -177,13 +121,10 @@ def save_meatball_entry(request):
                 ('MEATBALL_SALAD', form.cleaned_data['salad_cost']),
             ]
 
-            for entry_type, value in entries:
-                DailyEntry.objects.update_or_create(
-                    date=date,
-                    entry_type=entry_type,
-                    defaults={'value': value}
-                )
-            messages.success(request, _('Meatball stand entry saved successfully!'))
+            _save_form_entries(request, [
+                {'date': date, 'entry_type': entry_type, 'value': value}
+                for entry_type, value in entries
+            ], _('Meatball stand entry saved successfully!'))
         except Exception as e:
             messages.error(request, str(e))
     else:
@@ -191,6 +132,26 @@ def save_meatball_entry(request):
     return redirect('home')
 
 
+@require_http_methods(["POST"])
+def bulk_save_entries(request):
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': _('Invalid JSON body')}, status=400)
+
+    rows = payload.get('entries') if isinstance(payload, dict) else payload
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        return JsonResponse({
+            'status': 'error',
+            'message': _('Expected a list of entries with date, entry_type and value')
+        }, status=400)
+
+    results = services.upsert_daily_entries(rows)
+    if any(result['status'] == 'error' for result in results):
+        return JsonResponse({'status': 'error', 'results': results}, status=400)
+    return JsonResponse({'status': 'success', 'results': results})
+
+
 def inventory(request):
     if request.method == 'POST':
         if 'add_item' in request.POST:
@@ -217,14 +178,23 @@ def inventory(request):
         'inventory_form': inventory_form,
         'items': items,
         'weekly_counts': weekly_counts,
+        'forecast': forecasting.forecast(),
     }
     return render(request, 'core/inventory.html', context)
 
 def view_inventory_report(request, year, week):
     try:
-        report_data = WeeklyInventory.generate_report(year, week)
+        report_data = inventory_reports.week_report(year, week)
+        report_error = None
+        if report_data is None:
+            report_error = _("No start and end counts found for week %(week)s/%(year)s.") % {
+                'week': week, 'year': year
+            }
         context = {
             'report_data': report_data,
+            'report_error': report_error,
+            'start_date': datetime.fromisocalendar(year, week, 1).date(),
+            'end_date': datetime.fromisocalendar(year, week, 7).date(),
             'year': year,
             'week': week
         }
@@ -299,32 +269,41 @@ def set_inventory(request):
             messages.error(request, _('End of week inventory must be set on Sunday'))
             return redirect('inventory')
 
-        # Get week number and year
-        week_number = date_obj.isocalendar()[1]
-        year = date_obj.year
-
-        # Save inventory entries
-        for key, value in request.POST.items():
-            if key.startswith('quantity_'):
-                item_id = int(key.split('_')[1])
-
-                # Validate quantity
-                try:
-                    quantity = int(value)
-                    if quantity < 0:
-                        raise ValueError("Quantity cannot be negative")
-                except ValueError:
-                    messages.error(request, _('Invalid quantity for item'))
-                    return redirect('inventory')
-
-                # Update or create inventory entry
-                WeeklyInventory.objects.update_or_create(
-                    item_id=item_id,
-                    week_number=week_number,
-                    year=year,
-                    inventory_type=inventory_type,
-                    defaults={'quantity': quantity}
-                )
+        # Get ISO year and week number (late December can be week 1 of next year)
+        year, week_number = date_obj.isocalendar()[:2]
+
+        # Collect every submitted count; unchanged cells may be left out by the client
+        rows = [
+            {
+                'item_id': key[len('quantity_'):],
+                'week_number': week_number,
+                'year': year,
+                'inventory_type': inventory_type,
+                'quantity': value,
+            }
+            for key, value in request.POST.items() if key.startswith('quantity_')
+        ]
+        if not rows:
+            messages.info(request, _('No changes to save.'))
+            return redirect('inventory')
+
+        # Validate everything first, then write all counts in one transaction
+        rejected = _rejected_rows(services.upsert_weekly_inventory(rows))
+        if rejected:
+            item_ids = [rows[index]['item_id'] for index, _message in rejected]
+            names = {
+                str(item_id): name for item_id, name in InventoryItem.objects.filter(
+                    id__in=[item_id for item_id in item_ids if item_id.isdigit()]
+                ).values_list('id', 'name')
+            }
+            for item_id, (_index, message) in zip(item_ids, rejected):
+                messages.error(request, _('%(item)s: %(errors)s') % {
+                    'item': names.get(item_id, item_id), 'errors': message
+                })
+            return redirect('inventory')
+        # END counts close the week; warm its reports in the background
+        if inventory_type == 'END':
+            jobs.enqueue_week_warmups([(year, week_number)])
 
         messages.success(request, _('Inventory saved successfully!'))
     except Exception as e:
@@ -332,6 +311,45 @@ def set_inventory(request):
 
     return redirect('inventory')
 
+@require_http_methods(["GET"])
+def inventory_counts(request):
+    """Saved quantities for the week and type of `date`, so the count sheet can send only changes"""
+    try:
+        date_obj = datetime.strptime(request.GET.get('date', ''), '%Y-%m-%d').date()
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': _('Invalid date')}, status=400)
+    inventory_type = request.GET.get('inventory_type')
+    if inventory_type not in dict(WeeklyInventory.INVENTORY_TYPES):
+        return JsonResponse({'status': 'error', 'message': _('Invalid inventory type')}, status=400)
+
+    year, week_number = date_obj.isocalendar()[:2]
+    counts = WeeklyInventory.between(date_obj, date_obj).filter(
+        inventory_type=inventory_type
+    ).values_list('item_id', 'quantity')
+    return JsonResponse({
+        'status': 'success',
+        'year': year,
+        'week_number': week_number,
+        'counts': {str(item_id): quantity for item_id, quantity in counts},
+    })
+
+@require_http_methods(["GET"])
+def inventory_forecast(request):
+    try:
+        weeks = int(request.GET.get('weeks', 0)) or None
+        window = int(request.GET.get('window', 0)) or None
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': _('weeks and window must be integers')}, status=400)
+    if (weeks and not 2 <= weeks <= 520) or (window and window < 1):
+        return JsonResponse({
+            'status': 'error', 'message': _('weeks must be between 2 and 520 and window at least 1')
+        }, status=400)
+
+    return JsonResponse({
+        'status': 'success',
+        'forecast': [item.as_dict() for item in forecasting.forecast(weeks=weeks, window=window)],
+    })
+
 @require_http_methods(["POST"])
 def add_inventory_item(request):
     form = InventoryItemForm(request.POST)
@@ -447,6 +465,8 @@ def delete_inventory_item(request, item_id):
 #     }
 #
 #     return render(request, 'core/inventory_report.html', context)
+
+
 def inventory_report(request):
     start_date = request.GET.get('start_date')
     end_date = request.GET.get('end_date')
@@ -457,96 +477,7 @@ def inventory_report(request):
         try:
             start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
             end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-
-            # Use isocalendar to get the correct week number
-            start_week = start_date.isocalendar()[1]
-            end_week = end_date.isocalendar()[1]
-            year = end_date.year  # Use end date's year
-
-            # Check for END inventory entries
-            end_inventories = WeeklyInventory.objects.filter(
-                inventory_type='END',
-                year=year,
-                week_number=end_week
-            )
-
-            # If no END inventory, return error
-            if not end_inventories.exists():
-                report_error = _("No ending inventory found for the selected week. Please set end of week inventory before generating the report.")
-                return render(request, 'core/inventory_report.html', {
-                    'start_date': start_date,
-                    'end_date': end_date,
-                    'report_error': report_error
-                })
-
-            # Collect sales and salad costs
-            meatball_sales = DailyEntry.objects.filter(
-                entry_type='MEATBALL_SALES',
-                date__range=[start_date, end_date]
-            ).aggregate(total_sales=Coalesce(Sum('value'), Value(Decimal('0'))))['total_sales']
-
-            salad_costs = DailyEntry.objects.filter(
-                entry_type='MEATBALL_SALAD',
-                date__range=[start_date, end_date]
-            ).aggregate(total_cost=Coalesce(Sum('value'), Value(Decimal('0'))))['total_cost']
-
-            # Prepare report items
-            items_report = []
-
-            # Get all inventory items
-            for item in InventoryItem.objects.all():
-                # Find the END inventory for the week
-                end_inv = WeeklyInventory.objects.filter(
-                    item=item,
-                    inventory_type='END',
-                    year=year,
-                    week_number=end_week
-                ).first()
-
-                # Find the START inventory from the previous week
-                previous_week = end_week - 1 if end_week > 1 else 52
-                previous_year = year if end_week > 1 else year - 1
-
-                start_inv = WeeklyInventory.objects.filter(
-                    item=item,
-                    inventory_type='START',
-                    year=previous_year,
-                    week_number=previous_week
-                ).first()
-
-                # Calculate units used
-                if start_inv and end_inv:
-                    units_used = start_inv.quantity - end_inv.quantity
-                    cost_of_used = Decimal(units_used) * item.cost
-                else:
-                    # If no previous START inventory, assume all current inventory was used
-                    units_used = end_inv.quantity if end_inv else Decimal('0')
-                    cost_of_used = units_used * item.cost
-
-                # Profit calculation
-                item_profit = meatball_sales - (cost_of_used + salad_costs)
-
-                items_report.append({
-                    'name': item.name,
-                    'price': item.cost,
-                    'units_used': units_used,
-                    'cost_of_used': cost_of_used,
-                    'salad_cost': salad_costs,
-                    'revenue': meatball_sales,
-                    'profit': item_profit
-                })
-
-            # Calculate totals
-            report_data = {
-                'items': items_report,
-                'totals': {
-                    'total_cost': sum(item['cost_of_used'] for item in items_report),
-                    'total_salad': salad_costs,
-                    'total_revenue': meatball_sales,
-                    'total_profit': meatball_sales - sum(item['cost_of_used'] for item in items_report) - salad_costs
-                }
-            }
-
+            report_data, report_error = caching.inventory_report(start_date, end_date)
         except Exception as e:
             report_error = f"Error generating report: {str(e)}"
 
@@ -559,6 +490,7 @@ def inventory_report(request):
 
     return render(request, 'core/inventory_report.html', context)
 
+
 def inventory_report_ajax(request):
     start_date = request.GET.get('start_date')
     end_date = request.GET.get('end_date')
@@ -569,95 +501,7 @@ def inventory_report_ajax(request):
         try:
             start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
             end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-
-            # Use isocalendar to get the correct week number
-            start_week = start_date.isocalendar()[1]
-            end_week = end_date.isocalendar()[1]
-            year = end_date.year  # Use end date's year
-
-            # Check for END inventory
-            end_inventories = WeeklyInventory.objects.filter(
-                inventory_type='END',
-                year=year,
-                week_number=end_week
-            )
-
-            if not end_inventories.exists():
-                report_error = _("No ending inventory found for the selected week. Please set end of week inventory before generating the report.")
-                return render(request, 'core/inventory_report_ajax.html', {
-                    'start_date': start_date,
-                    'end_date': end_date,
-                    'report_error': report_error
-                })
-
-            # Collect sales and salad costs
-            meatball_sales = DailyEntry.objects.filter(
-                entry_type='MEATBALL_SALES',
-                date__range=[start_date, end_date]
-            ).aggregate(total_sales=Coalesce(Sum('value'), Value(Decimal('0'))))['total_sales']
-
-            salad_costs = DailyEntry.objects.filter(
-                entry_type='MEATBALL_SALAD',
-                date__range=[start_date, end_date]
-            ).aggregate(total_cost=Coalesce(Sum('value'), Value(Decimal('0'))))['total_cost']
-
-            # Prepare report items
-            items_report = []
-
-            # Get all inventory items
-            for item in InventoryItem.objects.all():
-                # Find the END inventory for the week
-                end_inv = WeeklyInventory.objects.filter(
-                    item=item,
-                    inventory_type='END',
-                    year=year,
-                    week_number=end_week
-                ).first()
-
-                # Find the START inventory from the previous week
-                previous_week = end_week - 1 if end_week > 1 else 52
-                previous_year = year if end_week > 1 else year - 1
-
-                start_inv = WeeklyInventory.objects.filter(
-                    item=item,
-                    inventory_type='START',
-                    year=previous_year,
-                    week_number=previous_week
-                ).first()
-
-                # Calculate units used
-                if start_inv and end_inv:
-                    units_used = start_inv.quantity - end_inv.quantity
-                    cost_of_used = Decimal(units_used) * item.cost
-                else:
-                    # If no previous START inventory, assume all current inventory was used
-                    units_used = end_inv.quantity if end_inv else Decimal('0')
-                    cost_of_used = units_used * item.cost
-
-                # Profit calculation
-                item_profit = meatball_sales - (cost_of_used + salad_costs)
-
-                items_report.append({
-                    'name': item.name,
-                    'price': item.cost,
-                    'units_used': units_used,
-                    'cost_of_used': cost_of_used,
-                    'salad_cost': salad_costs,
-                    'revenue': meatball_sales,
-                    'profit': item_profit
-                })
-
-            # Calculate totals
-            report_data = {
-                'items': items_report,
-                'totals': {
-                    'total_cost': sum(item['cost_of_used'] for item in items_report),
-                    'total_salad': salad_costs,
-                    'total_revenue': meatball_sales,
-                    'total_profit': meatball_sales - sum(item['cost_of_used'] for item in items_report) - salad_costs
-                }
-            }
-
+            report_data, report_error = caching.inventory_report(start_date, end_date)
         except Exception as e:
             report_error = f"Error generating report: {str(e)}"
 
@@ -669,6 +513,8 @@ def inventory_report_ajax(request):
     }
 
     return render(request, 'core/inventory_report_ajax.html', context)
+
+
 def move_forward(request):
     if request.method == 'POST':
         if 'add_task' in request.POST:
@@ -687,7 +533,8 @@ def move_forward(request):
         task_form = TaskForm()
         account_form = AccountForm()
 
-    tasks = Task.objects.filter(parent_task=None)
+    # Whole forest in one query instead of one subtask query per task
+    tasks = task_tree.flatten(task_tree.load_forest())
     accounts = Account.objects.all()
 
     context = {
@@ -706,7 +553,7 @@ def reports(request):
     if form.is_valid():
         start_date = form.cleaned_data['start_date']
         end_date = form.cleaned_data['end_date']
-        report_data = generate_report(start_date, end_date)
+        report_data = caching.range_report(start_date, end_date)
 
     context = {
         'form': form,
@@ -715,60 +562,128 @@ def reports(request):
     return render(request, 'core/reports.html', context)
 
 
-# Helper function for generating reports
-def generate_report(start_date, end_date):
-    report = {
-        'shoe_shop': {},
-        'barber_shop': {},
-        'meatball_stand': {},
-    }
+@require_http_methods(["GET"])
+def profit_series(request):
+    form = DateRangeForm(request.GET)
+    bucket = request.GET.get('bucket', 'day')
+    if not form.is_valid():
+        return JsonResponse({'status': 'error', 'errors': form.errors}, status=400)
+    if bucket not in metrics.BUCKETS:
+        return JsonResponse({
+            'status': 'error',
+            'message': _('Bucket must be one of: %s') % ', '.join(metrics.BUCKETS)
+        }, status=400)
 
-    # Shoe Shop Data
-    shoe_data = DailyEntry.objects.filter(
-        entry_type='SHOE_REVENUE',
-        date__range=[start_date, end_date]
-    )
-    report['shoe_shop'] = {
-        'total': shoe_data.aggregate(Sum('value'))['value__sum'] or 0,
-        'average': shoe_data.aggregate(Avg('value'))['value__avg'] or 0,
-    }
+    data = metrics.series(form.cleaned_data['start_date'], form.cleaned_data['end_date'], bucket)
+    return series_response(data)
 
-    # Barber Shop Data
-    barber_data = DailyEntry.objects.filter(
-        entry_type__startswith='BARBER_',
-        date__range=[start_date, end_date]
-    )
-    report['barber_shop'] = {
-        'total_haircuts': barber_data.exclude(
-            entry_type='BARBER_FREE'
-        ).aggregate(Sum('value'))['value__sum'] or 0,
-        'free_haircuts': barber_data.filter(
-            entry_type='BARBER_FREE'
-        ).aggregate(Sum('value'))['value__sum'] or 0,
-    }
 
-    # Meatball Stand Data
-    meatball_data = DailyEntry.objects.filter(
-        entry_type__startswith='MEATBALL_',
-        date__range=[start_date, end_date]
+def series_response(data):
+    return JsonResponse({
+        'status': 'success',
+        'bucket': data['bucket'],
+        'labels': [label.strftime('%Y-%m-%d') for label in data['labels']],
+        'series': {
+            business: {key: [float(value) for value in values] for key, values in series.items()}
+            for business, series in data['series'].items()
+        }
+    })
+
+
+@require_http_methods(["GET"])
+def cache_stats(request):
+    return JsonResponse({
+        'status': 'success',
+        'data_version': caching.data_version(),
+        'stats': caching.cache_stats()
+    })
+
+
+def _export_range(request, required=False):
+    """Returns (start_date, end_date, error_response) for an export request"""
+    if not required and not request.GET.get('start_date') and not request.GET.get('end_date'):
+        return None, None, None
+    form = DateRangeForm(request.GET)
+    if not form.is_valid():
+        return None, None, JsonResponse({'status': 'error', 'errors': form.errors}, status=400)
+    return form.cleaned_data['start_date'], form.cleaned_data['end_date'], None
+
+
+def _export_format(request):
+    file_format = request.GET.get('format', 'csv')
+    return file_format if file_format in exports.FORMATS else None
+
+
+@require_http_methods(["GET"])
+def export_entries(request):
+    file_format = _export_format(request)
+    start_date, end_date, error = _export_range(request)
+    if error:
+        return error
+    if not file_format:
+        return JsonResponse({'status': 'error', 'message': _('Unknown export format')}, status=400)
+
+    entries = DailyEntry.objects.order_by('date', 'entry_type')
+    if start_date:
+        entries = entries.filter(date__range=[start_date, end_date])
+    header = ['date', 'entry_type', 'value']
+    rows = entries.values_list(*header).iterator(chunk_size=exports.CHUNK_SIZE)
+    return exports.stream('daily_entries', file_format, header, rows)
+
+
+@require_http_methods(["GET"])
+def export_inventory(request):
+    file_format = _export_format(request)
+    if not file_format:
+        return JsonResponse({'status': 'error', 'message': _('Unknown export format')}, status=400)
+
+    start_date, end_date, error = _export_range(request)
+    if error:
+        return error
+
+    counts = WeeklyInventory.objects.order_by('year', 'week_number', 'item__name', 'inventory_type')
+    if start_date:
+        counts = WeeklyInventory.between(start_date, end_date).order_by('week_start', 'item__name', 'inventory_type')
+    if request.GET.get('year', '').isdigit():
+        counts = counts.filter(year=int(request.GET['year']))
+    header = ['year', 'week_number', 'item', 'inventory_type', 'quantity']
+    rows = counts.values_list(
+        'year', 'week_number', 'item__name', 'inventory_type', 'quantity'
+    ).iterator(chunk_size=exports.CHUNK_SIZE)
+    return exports.stream('weekly_inventory', file_format, header, rows)
+
+
+@require_http_methods(["GET"])
+def export_report(request):
+    file_format = _export_format(request)
+    start_date, end_date, error = _export_range(request, required=True)
+    if error:
+        return error
+    if not file_format:
+        return JsonResponse({'status': 'error', 'message': _('Unknown export format')}, status=400)
+
+    if request.GET.get('report') == 'inventory':
+        report_data, report_error = caching.inventory_report(start_date, end_date)
+        if report_error:
+            return JsonResponse({'status': 'error', 'message': report_error}, status=400)
+        header = ['name', 'price', 'units_used', 'cost_of_used', 'salad_cost', 'revenue', 'profit']
+        rows = ([item[field] for field in header] for item in report_data['items'])
+        return exports.stream('inventory_report', file_format, header, rows)
+
+    report = generate_report(start_date, end_date)
+    header = ['section', 'metric', 'value']
+    rows = (
+        [section, metric, value]
+        for section, values in report.items() if isinstance(values, dict)
+        for metric, value in values.items()
     )
-    sales = meatball_data.filter(entry_type='MEATBALL_SALES').aggregate(Sum('value'))['value__sum'] or 0
-    costs = meatball_data.filter(entry_type='MEATBALL_SALAD').aggregate(Sum('value'))['value__sum'] or 0
+    totals = (['total', key, value] for key, value in report.items() if not isinstance(value, dict))
+    return exports.stream('report', file_format, header, itertools.chain(rows, totals))
 
-    report['meatball_stand'] = {
-        'total_sales': sales,
-        'total_costs': costs,
-        'net_profit': sales - costs,
-    }
-
-    # Calculate overall totals
-    report['total_revenue'] = (
-            report['shoe_shop']['total'] +
-            report['barber_shop']['total_haircuts'] +
-            report['meatball_stand']['total_sales']
-    )
 
-    return report
+# Helper function for generating reports
+def generate_report(start_date, end_date):
+    return metrics.collect(start_date, end_date).report()
 
 @require_http_methods(["POST"])
 def add_task(request):
@@ -797,20 +712,48 @@ def add_task(request):
         }, status=400)
 
 
+def _expected_version(request):
+    """The `version` the client last read, or None if it sent none; raises ValueError"""
+    version = request.POST.get('version', '')
+    return int(version) if version != '' else None
+
+
+def _invalid_version():
+    return JsonResponse({'status': 'error', 'message': _('version must be an integer')}, status=400)
+
+
+def _conflict(model, pk):
+    """409 with the current version, for a write based on a stale one"""
+    return JsonResponse({
+        'status': 'error',
+        'message': _('This was changed by someone else. Reload and try again.'),
+        'version': model.objects.filter(pk=pk).values_list('version', flat=True).first(),
+    }, status=409)
+
+
 @require_http_methods(["POST"])
 def edit_task(request, task_id):
     task = get_object_or_404(Task, id=task_id)
+    try:
+        version = _expected_version(request)
+    except ValueError:
+        return _invalid_version()
     form = TaskForm(request.POST, instance=task)
 
     if form.is_valid():
         try:
-            task = form.save()
+            task = form.save(commit=False)
+            # Only the fields the client changed, so concurrent edits of the others survive
+            task.save(expected_version=version, update_fields=form.changed_data + ['updated_at'])
             return JsonResponse({
                 'status': 'success',
                 'name': task.name,
                 'description': task.description,
-                'deadline': task.deadline.strftime('%Y-%m-%d') if task.deadline else None
+                'deadline': task.deadline.strftime('%Y-%m-%d') if task.deadline else None,
+                'version': task.version,
             })
+        except ConflictError:
+            return _conflict(Task, task_id)
         except Exception as e:
             return JsonResponse({
                 'status': 'error',
@@ -833,9 +776,127 @@ def delete_task(request, task_id):
 @require_http_methods(["POST"])
 def complete_task(request, task_id):
    task = get_object_or_404(Task, id=task_id)
-   task.completed = True
-   task.save()
-   return JsonResponse({'status': 'success'})
+   try:
+       task.complete(expected_version=_expected_version(request))
+   except ValueError:
+       return _invalid_version()
+   except ConflictError:
+       return _conflict(Task, task_id)
+   return JsonResponse({'status': 'success', 'version': task.version})
+
+@require_http_methods(["GET"])
+def task_forest(request):
+    """Every task in tree order with its parent id, depth, subtask counts and overdue flag"""
+    return JsonResponse({
+        'status': 'success',
+        'tasks': [node.as_dict() for node in task_tree.flatten(task_tree.load_forest())],
+    })
+
+@require_http_methods(["GET"])
+def urgent_tasks(request):
+    """Overdue and due-soon counts plus the most urgent open tasks, read from the open-deadline index"""
+    try:
+        limit = int(request.GET.get('limit', 10))
+        days = int(request.GET.get('days', 7))
+    except ValueError:
+        return JsonResponse({'status': 'error', 'message': _('limit and days must be integers')}, status=400)
+    if not 1 <= limit <= 100 or not 0 <= days <= 365:
+        return JsonResponse({
+            'status': 'error', 'message': _('limit must be between 1 and 100 and days between 0 and 365')
+        }, status=400)
+
+    today = timezone.now().date()
+    counts = Task.objects.by_urgency().filter(deadline__lte=today + timedelta(days=days)).aggregate(
+        overdue=Count('id', filter=Q(deadline__lt=today)),
+        due_soon=Count('id', filter=Q(deadline__gte=today)),
+    )
+    tasks = Task.objects.by_urgency().values('id', 'name', 'deadline', 'parent_task_id')[:limit]
+    return JsonResponse({
+        'status': 'success',
+        'today': today.strftime('%Y-%m-%d'),
+        'days': days,
+        'overdue': counts['overdue'],
+        'due_soon': counts['due_soon'],
+        'tasks': [
+            {
+                'id': task['id'],
+                'name': task['name'],
+                'deadline': task['deadline'].strftime('%Y-%m-%d'),
+                'parent_task_id': task['parent_task_id'],
+                'overdue': task['deadline'] < today,
+            }
+            for task in tasks
+        ],
+    })
+
+# Task.Meta.ordering and Account.Meta.ordering, made total with the primary key
+TASK_KEYS = [pagination.Key('deadline'), pagination.Key('created_at', descending=True), pagination.Key('id', descending=True)]
+ACCOUNT_KEYS = [pagination.Key('name'), pagination.Key('id')]
+
+
+def _paginate(request, queryset, keys):
+    """Returns (rows, next_cursor, error_response) for a listing request"""
+    try:
+        limit = int(request.GET.get('limit', 20))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= 100:
+        return None, None, JsonResponse({
+            'status': 'error', 'message': _('limit must be between 1 and 100')
+        }, status=400)
+    try:
+        rows, next_cursor = pagination.paginate(queryset, keys, request.GET.get('cursor'), limit)
+    except pagination.InvalidCursor:
+        return None, None, JsonResponse({'status': 'error', 'message': _('Invalid cursor')}, status=400)
+    return rows, next_cursor, None
+
+
+@require_http_methods(["GET"])
+def task_list(request):
+    """Tasks in deadline order, a page at a time; filter with completed=0/1 and parent=<id>/root"""
+    tasks = Task.objects.all()
+    completed = request.GET.get('completed')
+    if completed in ('0', '1'):
+        tasks = tasks.filter(completed=completed == '1')
+    parent = request.GET.get('parent')
+    if parent == 'root':
+        tasks = tasks.filter(parent_task=None)
+    elif parent:
+        if not parent.isdigit():
+            return JsonResponse({'status': 'error', 'message': _('parent must be a task id or root')}, status=400)
+        tasks = tasks.filter(parent_task_id=int(parent))
+
+    rows, next_cursor, error = _paginate(request, tasks.values(
+        'id', 'name', 'description', 'deadline', 'completed', 'parent_task_id',
+        'total_descendants', 'completed_descendants', 'version', 'created_at'
+    ), TASK_KEYS)
+    if error:
+        return error
+    return JsonResponse({
+        'status': 'success',
+        'results': [
+            dict(row, deadline=row['deadline'].strftime('%Y-%m-%d') if row['deadline'] else None,
+                 created_at=row['created_at'].isoformat())
+            for row in rows
+        ],
+        'next_cursor': next_cursor,
+    })
+
+
+@require_http_methods(["GET"])
+def account_list(request):
+    """Accounts by name, a page at a time"""
+    rows, next_cursor, error = _paginate(
+        request, Account.objects.values('id', 'name', 'balance', 'goal', 'version'), ACCOUNT_KEYS
+    )
+    if error:
+        return error
+    return JsonResponse({
+        'status': 'success',
+        'results': [dict(row, balance=str(row['balance']), goal=str(row['goal'])) for row in rows],
+        'next_cursor': next_cursor,
+    })
+
 
 @require_http_methods(["POST"])
 def add_subtask(request, task_id):
@@ -865,10 +926,28 @@ def add_account(request):
 @require_http_methods(["POST"])
 def edit_account(request, account_id):
    account = get_object_or_404(Account, id=account_id)
+   try:
+       version = _expected_version(request)
+   except ValueError:
+       return _invalid_version()
    form = AccountForm(request.POST, instance=account)
    if form.is_valid():
-       form.save()
-       return JsonResponse({'status': 'success'})
+       # Fields the client left as they were are not written, so concurrent changes to them survive
+       changes = {field: form.cleaned_data[field] for field in ('name', 'goal') if field in form.changed_data}
+       accounts = Account.objects.filter(pk=account.pk)
+       if version is not None:
+           accounts = accounts.filter(version=version)
+       try:
+           with transaction.atomic():
+               if not accounts.update(version=F('version') + 1, updated_at=timezone.now(), **changes):
+                   raise ConflictError(account.pk)
+               # The balance only changes through the ledger
+               if 'balance' in form.changed_data:
+                   ledger.set_balance(account, form.cleaned_data['balance'], note=_('Edited'))
+       except ConflictError:
+           return _conflict(Account, account.pk)
+       account.refresh_from_db(fields=['version'])
+       return JsonResponse({'status': 'success', 'version': account.version})
    return JsonResponse({'status': 'error'}, status=400)
 
 @require_http_methods(["POST"])
@@ -879,15 +958,48 @@ def delete_account(request, account_id):
 
 @require_http_methods(["POST"])
 def update_account_balance(request, account_id):
+   """Sets the balance, or moves it by `amount` with a single F() update when that is given"""
    account = get_object_or_404(Account, id=account_id)
    try:
-       new_balance = Decimal(request.POST.get('balance', 0))
-       account.balance = new_balance
-       account.save()
-       return JsonResponse({'status': 'success'})
-   except Exception as e:
+       version = _expected_version(request)
+       note = request.POST.get('note', '')[:200]
+       if request.POST.get('amount'):
+           amount = Decimal(request.POST['amount'])
+           ledger.record(
+               account, amount, 'DEPOSIT' if amount >= 0 else 'WITHDRAWAL', note, expected_version=version
+           )
+       else:
+           new_balance = Decimal(request.POST.get('balance', 0))
+           ledger.set_balance(account, new_balance, note=note, expected_version=version)
+       return JsonResponse({'status': 'success', 'balance': str(account.balance), 'version': account.version})
+   except ConflictError:
+       return _conflict(Account, account.pk)
+   except (InvalidOperation, ValueError, ValidationError) as e:
        return JsonResponse({'status': 'error', 'message': str(e)}, status=400)
 
+@require_http_methods(["GET"])
+def account_balance(request, account_id):
+   """Balance at the end of `date`, or at the ISO `at` datetime; now by default"""
+   account = get_object_or_404(Account, id=account_id)
+   try:
+       if request.GET.get('date'):
+           day = datetime.strptime(request.GET['date'], '%Y-%m-%d').date()
+           at = timezone.make_aware(datetime.combine(day, datetime.max.time()))
+       elif request.GET.get('at'):
+           at = datetime.fromisoformat(request.GET['at'])
+           if timezone.is_naive(at):
+               at = timezone.make_aware(at)
+       else:
+           at = timezone.now()
+   except ValueError:
+       return JsonResponse({'status': 'error', 'message': _('Invalid date')}, status=400)
+   return JsonResponse({
+       'status': 'success',
+       'account_id': account.id,
+       'at': at.isoformat(),
+       'balance': str(ledger.balance_at(account, at)),
+   })
+
 import logging
 logger = logging.getLogger('core')
 
@@ -36,14 +36,51 @@ INSTALLED_APPS = [
 ]
 
 
-# Cache settings
+# Cache settings. The cache must be shared by every process: the web
+# server workers and `manage.py run_worker` all read the report versions
+# and the reports warmed in the background from it. It must also make
+# add() and incr() atomic across processes, which the report locks and
+# hit/miss counters in core.caching rely on; file and database caches don't.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/1'),
     }
 }
 
+# Tests run against a private in-memory cache
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
+# Dashboard/report result cache, invalidated by the data version
+REPORT_CACHE = {
+    'TIMEOUT': 300,  # seconds
+    'LOCK_TIMEOUT': 30,  # seconds a concurrent miss waits for the request computing the report
+    'LOCK_POLL': 0.05,  # seconds between cache checks while another process computes
+}
+
+# Database job queue run by `manage.py run_worker`. Reports warmed by the
+# worker reach the web server through the shared cache above; a
+# per-process backend such as LocMemCache would keep them to the worker.
+JOBS = {
+    'POLL_INTERVAL': 2,  # seconds between queue checks when idle
+    'MAX_ATTEMPTS': 3,
+    'RETRY_DELAY': 60,  # seconds, multiplied by the attempts made so far
+    'STALE_AFTER': 600,  # seconds before a RUNNING job is assumed abandoned
+}
+
+# Account ledger: snapshot the running balance after this many transactions,
+# which bounds the rows summed for a point-in-time balance
+LEDGER = {
+    'SNAPSHOT_EVERY': 100,
+}
+
+# Inventory consumption forecast shown on the inventory page
+INVENTORY_FORECAST = {
+    'WEEKS': 12,  # weeks of usage history
+    'WINDOW': 4,  # weeks averaged for the consumption rate
+    'REORDER_WEEKS': 2,  # flag items expected to run out sooner than this
+}
+
 # Rate limiting settings
 RATE_LIMIT = {
     'WINDOW': 60,  # seconds
@@ -94,6 +131,17 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Concurrent writers wait up to `timeout` seconds for the write lock
+        # instead of failing; IMMEDIATE takes it when a transaction begins, so
+        # two transactions never deadlock upgrading from a read
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+        # A file rather than shared-cache memory, whose table locks fail at once
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
     }
 }
 
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.urls import path, include
 from django.conf.urls.i18n import i18n_patterns
-from core import views
+from core import async_views, views
 from django.conf import settings
 from django.conf.urls.static import static
 
@@ -20,17 +20,34 @@ urlpatterns += i18n_patterns(
     path('inventory/', views.inventory, name='inventory'),
     path('reports/', views.reports, name='reports'),
     path('move-forward/', views.move_forward, name='move_forward'),
+    path('api/series/', views.profit_series, name='profit_series'),
+    path('api/cache-stats/', views.cache_stats, name='cache_stats'),
+
+    # Async read path (served concurrently under ASGI)
+    path('async/', async_views.home, name='async_home'),
+    path('async/reports/', async_views.reports, name='async_reports'),
+    path('async/inventory-report-ajax/', async_views.inventory_report_ajax, name='async_inventory_report_ajax'),
+    path('async/api/series/', async_views.profit_series, name='async_profit_series'),
+    path('async/api/cache-stats/', async_views.cache_stats, name='async_cache_stats'),
+
+    # Exports
+    path('export/entries/', views.export_entries, name='export_entries'),
+    path('export/inventory/', views.export_inventory, name='export_inventory'),
+    path('export/report/', views.export_report, name='export_report'),
 
     # Daily Entries
     path('save-shoe-entry/', views.save_shoe_entry, name='save_shoe_entry'),
     path('save-barber-entry/', views.save_barber_entry, name='save_barber_entry'),
     path('save-meatball-entry/', views.save_meatball_entry, name='save_meatball_entry'),
+    path('api/entries/bulk/', views.bulk_save_entries, name='bulk_save_entries'),
 
     # Inventory Management
     path('add-inventory-item/', views.add_inventory_item, name='add_inventory_item'),
     path('edit-inventory-item/<int:item_id>/', views.edit_inventory_item, name='edit_inventory_item'),
     path('delete-inventory-item/<int:item_id>/', views.delete_inventory_item, name='delete_inventory_item'),
     path('set-inventory/', views.set_inventory, name='set_inventory'),
+    path('api/inventory/counts/', views.inventory_counts, name='inventory_counts'),
+    path('api/inventory/forecast/', views.inventory_forecast, name='inventory_forecast'),
     path('view-inventory-report/<int:year>/<int:week>/', views.view_inventory_report, name='view_inventory_report'),
     path('inventory-report/', views.inventory_report, name='inventory_report'),
     path('inventory-report-ajax/', views.inventory_report_ajax, name='inventory_report_ajax'),
@@ -40,12 +57,17 @@ urlpatterns += i18n_patterns(
     path('delete-task/<int:task_id>/', views.delete_task, name='delete_task'),
     path('complete-task/<int:task_id>/', views.complete_task, name='complete_task'),
     path('add-subtask/<int:task_id>/', views.add_subtask, name='add_subtask'),
+    path('api/tasks/tree/', views.task_forest, name='task_forest'),
+    path('api/tasks/', views.task_list, name='task_list'),
+    path('api/tasks/urgent/', views.urgent_tasks, name='urgent_tasks'),
 
     # Account Management
     path('add-account/', views.add_account, name='add_account'),
     path('edit-account/<int:account_id>/', views.edit_account, name='edit_account'),
     path('delete-account/<int:account_id>/', views.delete_account, name='delete_account'),
     path('update-account-balance/<int:account_id>/', views.update_account_balance, name='update_account_balance'),
+    path('api/accounts/', views.account_list, name='account_list'),
+    path('api/accounts/<int:account_id>/balance/', views.account_balance, name='account_balance'),
 
     prefix_default_language=False,
 ) + static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file